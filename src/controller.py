@@ -5,8 +5,9 @@ import base64
 import time
 import re
 import copy
+from collections import OrderedDict
 
-from .tools import Tool, ToolRegistry, ToolResult
+from .tools import Tool, ToolCallScheduler, ToolRegistry, ToolResult
 from .skills import SkillManager
 from .modes import ModeManager
 from .utility.media import chat_contains_vision, get_image_base64, get_image_path, extract_supported_files
@@ -19,6 +20,8 @@ from .handlers.stt import STTHandler
 from .handlers.rag import RAGHandler
 from .handlers.memory import MemoryHandler
 from .handlers.embeddings import EmbeddingHandler
+from .handlers.embeddings.embedding_cache import CachedEmbeddingHandler, EmbeddingStore
+from .handlers.tts.tts_cache import CachedTTSHandler, TTSAudioStore
 from .handlers.websearch import WebSearchHandler
 from .handlers.image_generator import ImageGeneratorHandler
 from .handlers.interfaces.interface import Interface
@@ -30,15 +33,15 @@ from .utility.source_attribution import format_source_context
 from .constants import AVAILABLE_INTEGRATIONS, AVAILABLE_WEBSEARCH, AVAILABLE_IMAGE_GENERATORS, DIR_NAME, SCHEMA_ID, PROMPTS, AVAILABLE_STT, AVAILABLE_TTS, AVAILABLE_LLMS, AVAILABLE_RAGS, AVAILABLE_PROMPTS, AVAILABLE_MEMORIES, AVAILABLE_EMBEDDINGS, AVAILABLE_INTERFACES, SETTINGS_GROUPS, restore_handlers, restore_prompts
 from .constants import AVAILABLE_AVATARS, AVAILABLE_TRANSLATORS
 import threading
-import pickle
-import tempfile
 import json
 import datetime
 import uuid as uuid_lib
 from .extensions import ExtensionLoader
 from .utility import override_prompts
-from .utility.strings import clean_bot_response, clean_prompt, count_tokens, extract_reasoning_content, get_edited_messages
-from .utility.context_manager import ContextManager, TrimResult
+from .utility.strings import clean_bot_response, clean_prompt, count_tokens, count_tokens_many, extract_reasoning_content, get_edited_messages
+from .utility.context_manager import ContextManager, MessageEmbeddingCache, TrimResult
+from .utility.chat_store import ChatStore, LazyChat
+from .utility.streaming import StreamUpdate, accepts_stream_updates, stream_updates
 from .utility.replacehelper import PromptFormatter, replace_variables_dict
 from enum import Enum 
 from .handlers import Handler
@@ -61,6 +64,9 @@ else:
 Manage Newelle Application, create handlers, check integrity, manage settings...
 """
 
+# Chat messages whose history record is kept by NewelleController.get_history
+HISTORY_RECORDS_CACHE_SIZE = 20000
+
 class ReloadType(Enum):
     """
     Enum for reload type
@@ -178,6 +184,30 @@ class NewelleController:
         if hasattr(self, 'chats') and self.chats and chat_id in self.chats:
             self.chats[chat_id]["chat"] = value
 
+    def get_chat_message_count(self, chat_id) -> int:
+        """Get the number of messages of a chat without loading them from the chat store."""
+        if not hasattr(self, 'chats') or chat_id not in self.chats:
+            return 0
+        chat = self.chats[chat_id]
+        if isinstance(chat, LazyChat):
+            return chat.message_count
+        return len(chat.get("chat", []))
+
+    def pin_chat(self, chat_id: int):
+        """Keep the messages of a chat in memory while it is shown or generating."""
+        if hasattr(self, 'chat_store'):
+            self.chat_store.pin(chat_id)
+
+    def unpin_chat(self, chat_id: int):
+        """Release a pin taken with pin_chat."""
+        if hasattr(self, 'chat_store'):
+            self.chat_store.unpin(chat_id)
+
+    def mark_message_changed(self, chat_id: int, index: int):
+        """Report an edit inside a stored message, so the next save writes it."""
+        if hasattr(self, 'chat_store'):
+            self.chat_store.message_changed(chat_id, index)
+
     def append_chat_message(self, chat_id: int, message: dict) -> bool:
         """Append a message to a specific chat, regardless of selected tab.
 
@@ -243,16 +273,24 @@ class NewelleController:
         self.ui_controller : UIController | None = None
         self.installing_handlers = {}
         self.tools = ToolRegistry()
+        self.tool_scheduler = ToolCallScheduler()
         # Tool names whose full schema has been fetched via tool_search. They are
         # emitted with full parameters afterwards so lazy-loaded tools can also be
         # invoked through native tool calling (which needs the schema up front).
         self.expanded_tools: set[str] = set()
         self.msgid = 0
         self.chat_documents_index = {}
+        # (sender, text) -> converted (sender, text, reasoning), least recently
+        # used first, see _get_history_record
+        self._history_records = OrderedDict()
+        self._history_records_lock = threading.Lock()
+        self.message_embedding_cache = MessageEmbeddingCache()
         self.is_call_request = False
         self.scheduled_tasks = []
         self.scheduled_tasks_lock = threading.Lock()
         self.save_lock = threading.Lock()
+        self.chat_id_lock = threading.Lock()
+        self.extension_tools_lock = threading.Lock()
         self.scheduler_source_id = None
 
     def ui_init(self):
@@ -293,6 +331,8 @@ class NewelleController:
             self.data_dir = os.path.join(self.config_dir, DIR_NAME)
             self.cache_dir = os.path.join(self.cache_dir, DIR_NAME)
             self.chats_path = os.path.join(self.data_dir, "chats.pkl")
+        # Legacy pickle at chats_path is migrated into this database
+        self.chats_db_path = os.path.splitext(self.chats_path)[0] + ".db"
 
         self.pip_path = os.path.join(self.config_dir, "pip")
         self.models_dir = os.path.join(self.config_dir, "models")
@@ -362,10 +402,10 @@ class NewelleController:
 
     def load_chats(self, chat_id):
         """Load chats"""
-        self.filename = "chats.pkl"
-        if os.path.exists(self.chats_path):
-            with open(self.chats_path, 'rb') as f:
-                raw = pickle.load(f)
+        self.filename = "chats.db"
+        self.chat_store = ChatStore(self.chats_db_path)
+        raw = self.chat_store.load(legacy_path=self.chats_path)
+        if raw is not None:
             self._ensure_chats_dict(raw)
         else:
             self.chats = {0: {"name": _("Chat ") + "1", "chat": []}}
@@ -379,42 +419,15 @@ class NewelleController:
                 self.newelle_settings.chat_id = min(self.chats.keys())
 
     def save_chats(self):
-        """Save chats without exposing a partially written storage file."""
+        """Save chats, writing only the messages and chats that changed since the last save."""
         with self.save_lock:
-            storage_dir = os.path.dirname(self.chats_path) or "."
-            storage_name = os.path.basename(self.chats_path)
-            temporary_path = None
-            try:
-                with tempfile.NamedTemporaryFile(
-                    mode="wb",
-                    dir=storage_dir,
-                    prefix=f".{storage_name}.",
-                    suffix=".tmp",
-                    delete=False,
-                ) as temporary_file:
-                    temporary_path = temporary_file.name
-                    pickle.dump({
-                        "chats": self.chats,
-                        "next_chat_id": self.next_chat_id,
-                        "folders": self.folders,
-                        "next_folder_id": self.next_folder_id,
-                    }, temporary_file)
-                    temporary_file.flush()
-                    os.fsync(temporary_file.fileno())
-
-                os.replace(temporary_path, self.chats_path)
-                temporary_path = None
-            finally:
-                if temporary_path is not None:
-                    try:
-                        os.unlink(temporary_path)
-                    except FileNotFoundError:
-                        pass
+            self.chat_store.save(self.chats, self.next_chat_id, self.folders, self.next_folder_id)
 
     def create_call_chat(self):
         """Create a new call chat that won't be displayed in the chat list"""
-        chat_id = self.next_chat_id
-        self.next_chat_id += 1
+        with self.chat_id_lock:
+            chat_id = self.next_chat_id
+            self.next_chat_id += 1
         new_chat = {
             "name": _("Call ") + str(chat_id),
             "chat": [],
@@ -426,8 +439,9 @@ class NewelleController:
 
     def create_visible_chat(self, name: str | None = None, profile: str | None = None, folder_id: int | None = None):
         """Create a new visible chat entry and refresh history."""
-        chat_id = self.next_chat_id
-        self.next_chat_id += 1
+        with self.chat_id_lock:
+            chat_id = self.next_chat_id
+            self.next_chat_id += 1
         if name is None:
             name = _("Chat %d") % chat_id
         new_chat = {
@@ -1172,8 +1186,29 @@ class NewelleController:
     def update_mcp_tools(self):
         mcp_integration = self.get_mcp_integration()
         if mcp_integration is not None:
+            # The registry is patched as servers answer
             mcp_integration.update_tools()
-            self.tools.update_tools(mcp_integration.get_tools())
+
+    def update_extension_tools(self, extension, removed: list[str]):
+        """Register the current tools of an extension without rebuilding the registry
+
+        Safe to call from worker threads, e.g. MCP discovery reporting each
+        server as it answers.
+
+        Args:
+            extension: the extension or integration whose tools changed
+            removed: names of the tools it does not provide anymore
+        """
+        with self.extension_tools_lock:
+            tools = self.tools
+            for name in removed:
+                # A tool with the same name from another extension stays
+                tools.remove_tool(name, owner=extension)
+            for loader in (self.extensionloader, self.integrationsloader):
+                if loader is not None and extension in loader.disabled_extensions:
+                    return
+            for tool in extension.get_tools():
+                tools.register_tool(tool, owner=extension)
     
     def get_commands(self):
         commands = []
@@ -1555,33 +1590,71 @@ class NewelleController:
 
         Args:
             chat (): chat history, if None current is taken
+            include_last_message: include the last message of the chat
+            copy_chat: kept for compatibility, the records are always new dicts. Their
+                nested values are shared with the chat and must not be modified
 
         Returns:
            chat history
         """
         if chat is None:
             chat = self.chat
-        if copy_chat:
-            chat = copy.deepcopy(chat)
         history = []
         use_fixed = self.newelle_settings.context_mode == "fixed"
         count = self.newelle_settings.memory if use_fixed else -1
-        msgs = chat[:-1] if not include_last_message else chat
-        msgs.reverse()
-        for msg in msgs:
+        end = len(chat) if include_last_message else len(chat) - 1
+        for i in range(end - 1, -1, -1):
             if count == 0:
                 break
-            if msg["User"] == "Console" and msg["Message"] == "None":
+            record = self._get_history_record(chat[i])
+            if record is None:
                 continue
-            msg["Reasoning"], msg["Message"] = extract_reasoning_content(msg["Message"])
-            if msg["User"] == "File" or msg["User"] == "Folder":
-                msg["Message"] = f"```{msg['User'].lower()}\n{msg['Message'].strip()}\n```"
-                msg["User"] = "User"
-            history.insert(0,msg)
+            history.append(record)
             if count > 0:
                 count -= 1
+        history.reverse()
         return history
 
+    def _get_history_record(self, msg: dict) -> dict | None:
+        """Return the history record of a chat message.
+
+        The record has the reasoning split from the message and files or folders
+        converted to codeblocks. None is returned for messages excluded from the history.
+        The conversion is cached by sender and text, so an edited message just misses
+        the cache.
+        """
+        user, message = msg["User"], msg["Message"]
+        if user == "Console" and message == "None":
+            return None
+        key = (user, message)
+        with self._history_records_lock:
+            converted = self._history_records.get(key)
+            if converted is not None:
+                self._history_records.move_to_end(key)
+        if converted is None:
+            reasoning, text = extract_reasoning_content(message)
+            if user == "File" or user == "Folder":
+                text = f"```{user.lower()}\n{text.strip()}\n```"
+                user = "User"
+            converted = (user, text, reasoning)
+            with self._history_records_lock:
+                self._history_records[key] = converted
+                while len(self._history_records) > HISTORY_RECORDS_CACHE_SIZE:
+                    self._history_records.popitem(last=False)
+        record = dict(msg)
+        record["User"], record["Message"], record["Reasoning"] = converted
+        return record
+
+    def get_token_model(self, llm: LLMHandler | None = None) -> str:
+        """Model whose tokenizer counts the tokens of the chat, the one of llm or of the main LLM"""
+        if llm is None:
+            llm = getattr(self.handlers, "llm", None)
+        try:
+            model = llm.get_selected_model() if llm is not None else None
+        except Exception:
+            model = None
+        return str(model) if model else "gpt-4o-mini"
+
     def _trim_context(
         self,
         history: list[dict[str, str]],
@@ -1595,7 +1668,8 @@ class NewelleController:
         if self.newelle_settings.context_mode != "context-manager":
             return history, None
 
-        prompts_token_count = sum(count_tokens(p) for p in prompts)
+        token_model = self.get_token_model()
+        prompts_token_count = sum(count_tokens_many(prompts, token_model))
 
         embedding = getattr(self.handlers, "embedding", None)
         if self.newelle_settings.use_secondary_language_model:
@@ -1609,6 +1683,8 @@ class NewelleController:
             embedding_handler=embedding,
             llm_handler=llm,
             summarization_enabled=self.newelle_settings.context_summarization,
+            embedding_cache=self.message_embedding_cache,
+            model=token_model,
         )
         result = cm.trim(history, prompts_token_count, current_message)
         self.last_trim_result = result
@@ -1629,7 +1705,7 @@ class NewelleController:
         r = []
         if self.newelle_settings.memory_on:
             memory_contexts = self.handlers.memory.get_context(
-                chat[-1]["Message"], self.get_history(chat=chat)
+                chat[-1]["Message"], self.get_history(chat=chat, copy_chat=False)
             ) or []
             r += [
                 format_source_context(context, "Saved memory", source_type="Memory")
@@ -1638,14 +1714,14 @@ class NewelleController:
             ]
         if self.newelle_settings.rag_on:
             r += self.handlers.rag.get_context(
-                chat[-1]["Message"], self.get_history(chat=chat)
+                chat[-1]["Message"], self.get_history(chat=chat, copy_chat=False)
             )
         if (
             self.newelle_settings.rag_on_documents
             and self.handlers.rag is not None
         ):
             documents = extract_supported_files(
-                self.get_history(chat=chat, include_last_message=True),
+                self.get_history(chat=chat, include_last_message=True, copy_chat=False),
                 self.handlers.rag.get_supported_files_reading(),
                 self.handlers.llm.get_supported_files()
             )
@@ -1749,10 +1825,11 @@ class NewelleController:
         prompts += self.get_memory_prompt(chat=chat, chat_id=effective_chat_id)
 
         # Set the history for the model
-        history = self.get_history(chat=chat)
+        history = self.get_history(chat=chat, copy_chat=False)
         current_message = chat[-1]["Message"] if chat else ""
-        # Let extensions preprocess the history
-        old_history = copy.deepcopy(history)
+        # Let extensions preprocess the history. The shared records are never
+        # modified, so they also serve as the snapshot to detect edits.
+        old_history = history
         old_user_prompt = current_message
         processed_chat, prompts = self.integrationsloader.preprocess_history(chat, prompts)
         chat, prompts = self.extensionloader.preprocess_history(processed_chat, prompts)
@@ -1829,14 +1906,14 @@ class NewelleController:
             # Post-generation logic
             last_generation_time = time.time() - t1
             
-            input_tokens = 0
-            for prompt in prompts:
-                input_tokens += count_tokens(prompt)
+            input_texts = list(prompts)
             for message in history:
-                input_tokens += count_tokens(message.get("User", "")) + count_tokens(message.get("Message", ""))
-            input_tokens += count_tokens(chat[-1]["Message"])
+                input_texts += [message.get("User", ""), message.get("Message", "")]
+            input_texts.append(chat[-1]["Message"])
+            token_model = self.get_token_model(model)
+            input_tokens = sum(count_tokens_many(input_texts, token_model))
             
-            output_tokens = count_tokens(message_label)
+            output_tokens = count_tokens(message_label, token_model)
             
             message_label = clean_bot_response(message_label)
 
@@ -1844,8 +1921,9 @@ class NewelleController:
             yield ('error', str(e))
             return
 
-        # Post-processing
-        old_history = copy.deepcopy(chat)
+        # Post-processing. Extensions replace message fields, so shallow
+        # copies of the messages are enough to detect their edits
+        old_history = [dict(message) for message in chat]
         chat, message_label = self.integrationsloader.postprocess_history(chat, message_label)
         chat, message_label = self.extensionloader.postprocess_history(chat, message_label)
         if message_label != raw_message_label:
@@ -1928,6 +2006,8 @@ class NewelleController:
                 original_skill_manager = getattr(skills_integration, "skill_manager", None)
                 skills_integration.set_skill_manager(active_skill_manager)
 
+        # Saves during the run must not unload the messages it appends to
+        self.pin_chat(chat_id)
         msg_uuid = int(uuid_lib.uuid4())
         self.chats[chat_id]["chat"].append({"User": "User", "Message": message, "UUID": msg_uuid})
         if save_chat:
@@ -1976,9 +2056,9 @@ class NewelleController:
         assistant_msg_uuid = None
         response_text = ""
         text_content = ""
+        forward_updates = accepts_stream_updates(on_message_callback)
         try:
             while True:
-                full_response = ""
                 if not cont:
                     break
                 cont = False
@@ -2011,11 +2091,15 @@ class NewelleController:
                         active_tool_registry = self.tools
                     model = self.get_model_for_chat(self.chats[chat_id]["chat"])
 
-                def stream_callback(text: str):
-                    nonlocal full_response
-                    full_response += text
-                    if on_message_callback:
-                        on_message_callback(text)
+                @stream_updates
+                def stream_callback(update: StreamUpdate | str):
+                    if on_message_callback is None:
+                        return
+                    # Extension handlers may still send cumulative strings
+                    if forward_updates or not isinstance(update, StreamUpdate):
+                        on_message_callback(update)
+                    else:
+                        on_message_callback(update.text.strip())
                 
                 # Each handler appends ``prompt`` to the history it receives.
                 # Remove that prompt only from this request-local copy; mutating
@@ -2080,11 +2164,12 @@ class NewelleController:
                     elif chunk.type in ("text", "markdown"):
                         text_content += "\n" + chunk.text
 
-                # Some streaming handlers throttle their callbacks and can
+                # Extension handlers may still throttle their callbacks and
                 # leave the final character or provider chunk unreported.
                 # Flush the complete cumulative response once generation is
-                # done. Consumers already de-duplicate cumulative updates.
-                if model.stream_enabled() and not tool_calls and on_message_callback:
+                # done. Consumers already de-duplicate cumulative updates,
+                # delta consumers got every change through the stream buffer.
+                if model.stream_enabled() and not tool_calls and on_message_callback and not forward_updates:
                     on_message_callback(response)
                 
                 if not tool_calls or final_synthesis_turn:
@@ -2139,17 +2224,67 @@ class NewelleController:
                         "Profile": self.newelle_settings.current_profile,
                     })
 
+                tool_uuids = []
                 for tool_call in tool_calls:
-                    tool_call_count += 1
-                    tool_name = tool_call["name"]
-                    tool_args = tool_call["args"]
-                    tool_result_output = None
                     provider_tool_id = tool_call.get("id")
-                    tool_uuid = (
+                    tool_uuids.append(
                         provider_tool_id.strip()
                         if isinstance(provider_tool_id, str) and provider_tool_id.strip()
                         else str(uuid_lib.uuid4())[:8]
                     )
+
+                def can_run_concurrently(index: int) -> bool:
+                    tool_call = tool_calls[index]
+                    if not isinstance(tool_call["args"], dict):
+                        return False
+                    tool = active_tool_registry.get_tool(tool_call["name"])
+                    if not self.tool_scheduler.can_run_concurrently(tool):
+                        return False
+                    # Lazy tools may be redirected to their schema instead of running.
+                    return not active_tool_registry.is_lazy_tool(
+                        tool_call["name"], self.newelle_settings.tools_settings_dict, self.expanded_tools
+                    )
+
+                def start_call(index: int):
+                    tool = active_tool_registry.get_tool(tool_calls[index]["name"])
+                    tool_kwargs = {
+                        "msg_uuid": msg_uuid,
+                        "tool_uuid": tool_uuids[index],
+                        "chat_id": chat_id,
+                        **tool_calls[index]["args"],
+                    }
+                    if not (force_tools_on_main_thread or tool.run_on_main_thread):
+                        return self.tool_scheduler.submit(tool, **tool_kwargs)
+                    # Only the widget part runs on the main thread, the tool
+                    # produces its output in the background
+                    try:
+                        result = self.execute_tool_on_main_thread(
+                            tool.name, tool_kwargs, tool_registry=active_tool_registry
+                        )
+                    except Exception as e:
+                        return self.tool_scheduler.completed(error=e)
+                    if isinstance(result, ToolResult) and on_tool_result_callback:
+                        # Show the widget now rather than once the previous outputs are in
+                        on_tool_result_callback(tool.name, result)
+                        announced_calls.add(index)
+                    return self.tool_scheduler.completed(result)
+
+                # Consecutive concurrent tool calls are started together; any
+                # other call acts as a barrier so that e.g. a read issued after
+                # a write still observes it. Outputs are collected in order.
+                pending_calls = {}
+                announced_calls = set()
+                for index, tool_call in enumerate(tool_calls):
+                    if index not in pending_calls and can_run_concurrently(index):
+                        run_end = index
+                        while run_end < len(tool_calls) and can_run_concurrently(run_end):
+                            pending_calls[run_end] = start_call(run_end)
+                            run_end += 1
+                    tool_call_count += 1
+                    tool_name = tool_call["name"]
+                    tool_args = tool_call["args"]
+                    tool_result_output = None
+                    tool_uuid = tool_uuids[index]
                     tool_context_messages = []
                     tool_display_text = None
 
@@ -2193,7 +2328,9 @@ class NewelleController:
                                 force_tools_on_main_thread or tool.run_on_main_thread
                             )
 
-                            if should_run_on_main_thread:
+                            if index in pending_calls:
+                                result = pending_calls.pop(index).result()
+                            elif should_run_on_main_thread:
                                 result = self.execute_tool_on_main_thread(
                                     tool_name,
                                     tool_kwargs,
@@ -2202,7 +2339,7 @@ class NewelleController:
                             else:
                                 result = tool.execute(**tool_kwargs)
                             if isinstance(result, ToolResult):
-                                if on_tool_result_callback:
+                                if on_tool_result_callback and index not in announced_calls:
                                     on_tool_result_callback(tool_name, result)
                                 tool_result_output = result.get_output()
                                 tool_context_messages = result.get_context_messages()
@@ -2280,6 +2417,7 @@ class NewelleController:
                 return final_message
             return text_content
         finally:
+            self.unpin_chat(chat_id)
             if skills_integration is not None:
                 skills_integration.set_skill_manager(original_skill_manager)
 
@@ -2623,6 +2761,10 @@ class HandlersManager:
         self.controller = controller
         self.interfaces = {}
         self._duplicated_llm_definitions = []
+        # Shared by every embedding handler, entries are keyed by model id
+        self.embedding_store = EmbeddingStore(os.path.join(controller.cache_dir, "embeddings.db"))
+        # Shared by every TTS handler, entries are keyed by handler, voice and settings
+        self.tts_store = TTSAudioStore(os.path.join(controller.cache_dir, "tts"))
 
     @classmethod
     def _normalize_duplicated_llm_definition(cls, definition: dict) -> dict | None:
@@ -2968,8 +3110,8 @@ class HandlersManager:
         else:  # openwakeword mode
             self.wakeword_handler : STTHandler = self.get_object(AVAILABLE_STT, newelle_settings.wakeword_engine, True)
             self.secondary_stt : STTHandler = None
-        self.tts : TTSHandler = self.get_object(AVAILABLE_TTS, newelle_settings.tts_program)
-        self.embedding : EmbeddingHandler= self.get_object(AVAILABLE_EMBEDDINGS, newelle_settings.embedding_model)
+        self.tts : TTSHandler = CachedTTSHandler(self.get_object(AVAILABLE_TTS, newelle_settings.tts_program), self.tts_store)
+        self.embedding : EmbeddingHandler= CachedEmbeddingHandler(self.get_object(AVAILABLE_EMBEDDINGS, newelle_settings.embedding_model), self.embedding_store)
         self.memory : MemoryHandler = self.get_object(AVAILABLE_MEMORIES, newelle_settings.memory_model)
         self.memory.set_memory_size(newelle_settings.memory)
         self.rag : RAGHandler = self.get_object(AVAILABLE_RAGS, newelle_settings.rag_model)
@@ -2985,6 +3127,7 @@ class HandlersManager:
         self.memory.set_handlers(self.secondary_llm, self.embedding, self.rag)
 
         self.rag.set_handlers(self.llm, self.embedding)
+        self.rag.set_cache_path(os.path.join(self.controller.cache_dir, "rag"))
         #self.image_generator.set_ui_controller(self.controller.ui_controller)
         threading.Thread(target=self.install_missing_handlers).start()
 
@@ -575,7 +575,7 @@ class ExtensionLoader:
             for tool in extension.get_tools():
                 if extension in self.disabled_extensions:
                     continue
-                tool_registry.register_tool(tool)
+                tool_registry.register_tool(tool, owner=extension)
 
     def get_commands(self) -> list:
         """Get all commands from enabled extensions."""
@@ -588,7 +588,7 @@ class ExtensionLoader:
     
     def remove_tools(self, tool_registry, extension: NewelleExtension):
         for tool in extension.get_tools():
-            tool_registry.remove_tool(tool.name)
+            tool_registry.remove_tool(tool.name, owner=extension)
 
     def add_handlers(self, AVAILABLE_LLMS, AVAILABLE_TTS, AVAILABLE_STT, AVAILABLE_MEMORIES, AVAILABLE_EMBEDDINGS, AVAILABLE_RAGS, AVAILABLE_WEBSEARCH, AVAILABLE_AVATARS, AVAILABLE_TRANSLATORS, AVAILABLE_INTERFACES=None, AVAILABLE_IMAGE_GENERATORS=None):
         """Add the handlers of each extension to the available handlers
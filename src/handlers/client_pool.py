@@ -0,0 +1,74 @@
+import threading
+from collections import OrderedDict
+from importlib.util import find_spec
+from typing import Any, Callable
+
+
+class ClientPool:
+    """Process-wide pool of reusable provider API clients.
+
+    SDK clients own an HTTP connection pool, so sharing them between requests
+    lets a tool loop reuse the same keep-alive connection instead of paying a
+    new TCP and TLS handshake every turn. Clients are keyed by everything they
+    were built from (handler key, endpoint, api key, headers...), and the
+    clients of a handler are dropped when its settings change, see SettingsCache.
+    """
+    MAX_CLIENTS = 32
+
+    _clients: "OrderedDict[tuple, Any]" = OrderedDict()
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls, key: tuple, factory: Callable[[], Any]) -> Any:
+        """Return the pooled client for key, building it with factory if missing
+
+        Args:
+            key: values the client depends on, dicts and lists are allowed
+            factory: callable creating a new client
+
+        Returns:
+            The shared client
+        """
+        key = cls._freeze(key)
+        with cls._lock:
+            client = cls._clients.get(key)
+            if client is not None:
+                cls._clients.move_to_end(key)
+                return client
+        # Build outside the lock, creating a client can import heavy SDKs
+        client = factory()
+        with cls._lock:
+            existing = cls._clients.get(key)
+            if existing is not None:
+                return existing
+            cls._clients[key] = client
+            while len(cls._clients) > cls.MAX_CLIENTS:
+                cls._clients.popitem(last=False)
+        return client
+
+    @classmethod
+    def invalidate(cls, handler_key: str | None = None):
+        """Drop the pooled clients of a handler, or every client if handler_key is None.
+
+        Clients are not closed explicitly: a streaming request may still be
+        using one, its connections are released once it is garbage collected.
+        """
+        with cls._lock:
+            if handler_key is None:
+                cls._clients.clear()
+                return
+            for key in [key for key in cls._clients if key[0] == handler_key]:
+                del cls._clients[key]
+
+    @staticmethod
+    def http2_available() -> bool:
+        """Return if httpx can negotiate HTTP/2 (the optional h2 package is installed)"""
+        return find_spec("h2") is not None
+
+    @classmethod
+    def _freeze(cls, value):
+        if isinstance(value, dict):
+            return tuple(sorted((str(k), cls._freeze(v)) for k, v in value.items()))
+        if isinstance(value, (list, tuple)):
+            return tuple(cls._freeze(v) for v in value)
+        return value
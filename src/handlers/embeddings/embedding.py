@@ -1,3 +1,5 @@
+import hashlib
+import json
 from ..handler import Handler
 from abc import abstractmethod
 from numpy import ndarray
@@ -28,6 +30,15 @@ class EmbeddingHandler(Handler):
         """
         pass
 
+    def get_model_id(self) -> str:
+        """Identify the model producing the embeddings, to key cached embeddings
+
+        Returns:
+            str: the handler key followed by a hash of its settings
+        """
+        settings = json.dumps(self.get_all_settings(), sort_keys=True, default=str)
+        return self.key + ":" + hashlib.sha1(settings.encode()).hexdigest()[:16]
+
     def get_embedding_size(self) -> int:
         if self.dim is None:
             self.dim = self.get_embedding(["test"]).shape[1]
@@ -0,0 +1,224 @@
+"""Persistent, content addressed cache for embeddings.
+
+Embedding the same text twice with the same model always gives the same
+vector, but RAG indexing, memory and context trimming keep re-embedding
+the same documents and messages, paying a network round trip or a local
+inference every time. `EmbeddingStore` keeps vectors in a SQLite database
+keyed by a hash of the model id and the text; `CachedEmbeddingHandler`
+wraps any `EmbeddingHandler` and only sends the texts missing from the
+store to the wrapped handler:
+
+    store = EmbeddingStore(os.path.join(cache_dir, "embeddings.db"))
+    embedding = CachedEmbeddingHandler(handler, store)
+    embedding.get_embedding(["a", "b"])  # only cache misses are embedded
+
+The store is bounded in size, the least recently used vectors are evicted
+once it grows past `EmbeddingStore.max_bytes`.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from .embedding import EmbeddingHandler
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    key BLOB PRIMARY KEY,
+    vector BLOB NOT NULL,
+    used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS embeddings_used ON embeddings (used);
+"""
+
+# SQLite limits the number of bound parameters of a statement
+_BATCH_SIZE = 500
+
+
+class EmbeddingStore:
+    """SQLite backed float32 vector store, shared by every embedding handler
+
+    Args:
+        path: database file
+        max_bytes: size of the stored vectors over which old entries are evicted
+    """
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._db = None
+        self._size = None
+
+    @staticmethod
+    def make_key(model_id: str, text: str) -> bytes:
+        """Key of the embedding of text made by model_id"""
+        return hashlib.sha256((model_id + "\0" + text).encode("utf-8", "surrogatepass")).digest()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            db = sqlite3.connect(self.path, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.executescript(_SCHEMA)
+            self._size = db.execute("SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings").fetchone()[0]
+            self._db = db
+        return self._db
+
+    def get_many(self, keys: list[bytes]) -> dict[bytes, np.ndarray]:
+        """Return the stored vectors for the given keys, missing keys are omitted"""
+        found = {}
+        if not keys:
+            return found
+        unique = list(dict.fromkeys(keys))
+        with self._lock:
+            db = self._connect()
+            for start in range(0, len(unique), _BATCH_SIZE):
+                batch = unique[start:start + _BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                rows = db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, vector in rows:
+                    found[key] = np.frombuffer(vector, dtype=np.float32)
+            if found:
+                now = time.time()
+                db.executemany("UPDATE embeddings SET used = ? WHERE key = ?", [(now, key) for key in found])
+                db.commit()
+        return found
+
+    def put_many(self, items: dict[bytes, np.ndarray]):
+        """Store vectors, evicting the least recently used ones if needed"""
+        if not items:
+            return
+        now = time.time()
+        rows = [(key, np.asarray(vector, dtype=np.float32).tobytes(), now) for key, vector in items.items()]
+        with self._lock:
+            db = self._connect()
+            replaced = 0
+            for start in range(0, len(rows), _BATCH_SIZE):
+                batch = [row[0] for row in rows[start:start + _BATCH_SIZE]]
+                placeholders = ",".join("?" * len(batch))
+                replaced += db.execute(
+                    f"SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchone()[0]
+            db.executemany("INSERT OR REPLACE INTO embeddings (key, vector, used) VALUES (?, ?, ?)", rows)
+            self._size += sum(len(row[1]) for row in rows) - replaced
+            if self._size > self.max_bytes:
+                self._evict(db)
+            db.commit()
+
+    def _evict(self, db: sqlite3.Connection):
+        """Drop the oldest entries until the store is back to 90% of max_bytes"""
+        target = self.max_bytes * 0.9
+        cursor = db.execute("SELECT key, LENGTH(vector) FROM embeddings ORDER BY used")
+        evicted = []
+        for key, size in cursor:
+            if self._size <= target:
+                break
+            evicted.append((key,))
+            self._size -= size
+        cursor.close()
+        db.executemany("DELETE FROM embeddings WHERE key = ?", evicted)
+
+    def clear(self):
+        """Remove every stored vector"""
+        with self._lock:
+            db = self._connect()
+            db.execute("DELETE FROM embeddings")
+            db.commit()
+            self._size = 0
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+class CachedEmbeddingHandler(EmbeddingHandler):
+    """Embedding handler that looks embeddings up in an EmbeddingStore first
+
+    Everything but get_embedding is forwarded to the wrapped handler, so it
+    can be used wherever the wrapped handler was.
+
+    Args:
+        handler: the handler computing the embeddings
+        store: where the embeddings are cached
+    """
+
+    def __init__(self, handler: EmbeddingHandler, store: EmbeddingStore):
+        self.handler = handler
+        self.store = store
+        self.key = handler.key
+        self.schema_key = handler.schema_key
+
+    def __getattr__(self, name):
+        # Only called for attributes missing on the wrapper itself
+        if name == "handler":
+            raise AttributeError(name)
+        return getattr(self.handler, name)
+
+    def set_error_func(self, func):
+        self.handler.set_error_func(func)
+
+    def load_model(self):
+        return self.handler.load_model()
+
+    def is_installed(self) -> bool:
+        return self.handler.is_installed()
+
+    def install(self):
+        return self.handler.install()
+
+    def get_setting(self, *args, **kwargs):
+        return self.handler.get_setting(*args, **kwargs)
+
+    def set_setting(self, key, value):
+        return self.handler.set_setting(key, value)
+
+    def get_all_settings(self) -> dict:
+        return self.handler.get_all_settings()
+
+    def get_extra_settings(self) -> list:
+        return self.handler.get_extra_settings()
+
+    def get_model_id(self) -> str:
+        return self.handler.get_model_id()
+
+    def get_embedding_size(self) -> int:
+        return self.handler.get_embedding_size()
+
+    def destroy(self):
+        self.handler.destroy()
+
+    def get_embedding(self, text: list[str]) -> np.ndarray:
+        """Get the embeddings for the given texts, embedding only the ones not in the store"""
+        if not text:
+            return self.handler.get_embedding(text)
+        try:
+            model_id = self.handler.get_model_id()
+            keys = [EmbeddingStore.make_key(model_id, t) for t in text]
+            cached = self.store.get_many(keys)
+        except Exception as e:
+            print(f"Error reading the embedding cache: {e}")
+            return self.handler.get_embedding(text)
+
+        missing = {}
+        for key, t in zip(keys, text):
+            if key not in cached and key not in missing:
+                missing[key] = t
+        if missing:
+            computed = np.asarray(self.handler.get_embedding(list(missing.values())), dtype=np.float32)
+            computed = dict(zip(missing.keys(), computed))
+            try:
+                self.store.put_many(computed)
+            except Exception as e:
+                print(f"Error writing the embedding cache: {e}")
+            cached.update(computed)
+        return np.stack([cached[key] for key in keys])
@@ -1,7 +1,8 @@
 import os
 import json
 from ..utility.pip import find_module, install_module
-from typing import Any
+from .client_pool import ClientPool
+from typing import Any, Callable
 from enum import Enum
 
 
@@ -26,17 +27,45 @@ class SettingsCache:
             return
         if key in self.cache:
             try:
-                self.cache[key] = json.loads(self.settings.get_string(key))
+                value = json.loads(self.settings.get_string(key))
             except Exception as e:
                 print(f"Error reloading settings: {e}")
+                return
+            self._invalidate_clients(self._changed_handlers(self.cache[key], value))
+            self.cache[key] = value
 
     def get_json(self, key):
         if key not in self.cache:
             self.cache[key] = json.loads(self.settings.get_string(key))
         return self.cache[key]
+
+    @staticmethod
+    def _changed_handlers(old, new) -> list[str]:
+        """Keys of the handlers whose settings differ between two values of a setting"""
+        if not isinstance(old, dict) or not isinstance(new, dict):
+            return []
+        return [key for key in old.keys() | new.keys() if old.get(key) != new.get(key)]
+
+    @staticmethod
+    def _invalidate_clients(handler_keys: list[str]):
+        for handler_key in handler_keys:
+            ClientPool.invalidate(handler_key)
     
-    def set_json(self, key, value):
+    def set_json(self, key, value, changed: list[str] | None = None):
+        """Store a setting
+
+        Args:
+            key: settings key
+            value: new value
+            changed: keys of the handlers whose settings changed, computed
+                from the cached value if None. Needed when value is the cached
+                object modified in place
+        """
+        if changed is None:
+            changed = self._changed_handlers(self.cache.get(key), value)
         self.cache[key] = value
+        # on_changed ignores our own writes, drop clients built from old values
+        self._invalidate_clients(changed)
         self._updating = True
         try:
             self.settings.set_string(key, json.dumps(value))
@@ -193,8 +222,21 @@ class Handler():
         j = cache.get_json(self.schema_key)
         if self.key not in j:
             j[self.key] = {}
+        changed = key not in j[self.key] or j[self.key][key] != value
         j[self.key][key] = value
-        cache.set_json(self.schema_key, j)
+        cache.set_json(self.schema_key, j, changed=[self.key] if changed else [])
+
+    def get_pooled_client(self, factory: Callable[[], Any], *key) -> Any:
+        """Get a shared API client for this handler, see ClientPool
+
+        Args:
+            factory (Callable): creates the client if none is pooled yet
+            *key: every value the client is built from (endpoint, api key, headers...)
+
+        Returns:
+            object: the pooled client
+        """
+        return ClientPool.get((self.key, *key), factory)
 
     def get_default_setting(self, key) -> object:
         """Get the default setting from a certain key
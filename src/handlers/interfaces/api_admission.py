@@ -0,0 +1,180 @@
+"""Admission control for the OpenAI compatible API server.
+
+Every endpoint group (chat completions, embeddings, audio) gets an
+`AdmissionQueue`: at most ``max_concurrent`` requests run at the same time,
+the others wait in a bounded priority queue (FIFO among equal priorities).
+A request that finds the queue full is rejected right away, one whose
+deadline passes while waiting is dropped, so clients get back-pressure
+instead of piling up behind a busy handler:
+
+    slot = await queue.acquire(priority, deadline)
+    try:
+        ...
+    finally:
+        slot.release()
+
+Queues live on the server event loop. Slots can be released from any
+thread, so a slot can be handed to the worker running the request.
+"""
+
+import asyncio
+import heapq
+import itertools
+import threading
+
+
+class AdmissionError(Exception):
+    """Request refused by admission control
+
+    Attributes:
+        status_code: HTTP status to answer with
+        error_type: OpenAI error type
+        retry_after: seconds the client should wait before retrying
+    """
+    status_code = 503
+    error_type = "server_error"
+
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class QueueFullError(AdmissionError):
+    """Every slot is busy and the waiting queue is full"""
+    status_code = 429
+    error_type = "rate_limit_error"
+
+
+class DeadlineExceededError(AdmissionError):
+    """The deadline of the request passed while it was waiting"""
+    status_code = 503
+    error_type = "server_error"
+
+
+class RequestTimeoutError(AdmissionError):
+    """The deadline of the request passed while it was running"""
+    status_code = 504
+    error_type = "timeout_error"
+
+
+class AdmissionSlot:
+    """A granted execution slot, released exactly once"""
+
+    def __init__(self, queue: "AdmissionQueue"):
+        self._queue = queue
+        self._released = False
+        self._lock = threading.Lock()
+
+    def release(self):
+        """Give the slot back, from any thread. Later calls do nothing"""
+        with self._lock:
+            if self._released:
+                return
+            self._released = True
+        self._queue._release_threadsafe()
+
+
+class AdmissionQueue:
+    """Concurrency limit with a bounded priority queue
+
+    Args:
+        name: name of the endpoint group, used in errors
+        max_concurrent: requests running at the same time
+        max_queued: requests waiting for a slot, more are rejected
+    """
+
+    def __init__(self, name: str, max_concurrent: int, max_queued: int):
+        self.name = name
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.max_queued = max(0, int(max_queued))
+        self.active = 0
+        self.rejected = 0
+        self.expired = 0
+        # Heap of [-priority, sequence, future], higher priorities first
+        self._waiters: list = []
+        self._sequence = itertools.count()
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def _retry_after(self) -> int:
+        # Rough estimate: one "round" of the running requests per queued batch
+        return max(1, (self.queued + 1) // self.max_concurrent)
+
+    async def acquire(self, priority: int = 0, deadline: float | None = None) -> AdmissionSlot:
+        """Wait for a slot
+
+        Args:
+            priority: requests with a higher priority are admitted first
+            deadline: loop time after which the request stops waiting
+
+        Raises:
+            QueueFullError: the queue is full
+            DeadlineExceededError: the deadline passed before a slot was free
+        """
+        loop = asyncio.get_running_loop()
+        self._loop = loop
+        if self.active < self.max_concurrent and not self._waiters:
+            self.active += 1
+            return AdmissionSlot(self)
+        if len(self._waiters) >= self.max_queued:
+            self.rejected += 1
+            raise QueueFullError(
+                f"Too many {self.name} requests: {self.active} running, {self.queued} queued",
+                self._retry_after(),
+            )
+
+        future = loop.create_future()
+        entry = [-priority, next(self._sequence), future]
+        heapq.heappush(self._waiters, entry)
+        timeout = None if deadline is None else max(0.0, deadline - loop.time())
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as we gave up
+                self._release()
+            else:
+                future.cancel()
+                self._remove_waiter(entry)
+            if isinstance(e, asyncio.TimeoutError):
+                self.expired += 1
+                raise DeadlineExceededError(
+                    f"The {self.name} request waited too long for a free slot",
+                    self._retry_after(),
+                ) from None
+            raise
+        return AdmissionSlot(self)
+
+    def _remove_waiter(self, entry):
+        try:
+            self._waiters.remove(entry)
+        except ValueError:
+            return
+        heapq.heapify(self._waiters)
+
+    def _release(self):
+        """Hand the slot to the next waiter, or free it"""
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                # The slot moves to the waiter, active stays the same
+                future.set_result(None)
+                return
+        self.active -= 1
+
+    def _release_threadsafe(self):
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            self.active = max(0, self.active - 1)
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._release()
+        else:
+            loop.call_soon_threadsafe(self._release)
@@ -1,4 +1,6 @@
+import asyncio
 import base64
+import concurrent.futures
 import io
 import json
 import os
@@ -15,7 +17,9 @@ from gi.repository import GLib
 
 from ...utility import convert_messages_openai_to_newelle, parse_tool_calls_from_assistant_content
 from ...utility.system import is_flatpak
+from ...utility.streaming import StreamUpdate, stream_updates
 from ..extra_settings import ExtraSettings
+from .api_admission import AdmissionError, AdmissionQueue, AdmissionSlot, RequestTimeoutError
 from .chat_interface import ChatInterface
 
 
@@ -43,6 +47,11 @@ class APIInterface(ChatInterface):
         # Cap the number of "log file write failed" warnings so a bad path
         # doesn't flood stdout with repeated errors.
         self._log_file_error_count = 0
+        # Endpoint group ("chat", "embeddings", "audio") -> AdmissionQueue,
+        # created with the app so they pick up the current limits
+        self._admission: dict[str, AdmissionQueue] = {}
+        # Blocking handler calls run here instead of on the event loop
+        self._executor: concurrent.futures.ThreadPoolExecutor | None = None
 
     @staticmethod
     def get_extra_requirements() -> list:
@@ -106,6 +115,13 @@ class APIInterface(ChatInterface):
                 description=_("Path for the .jsonl log. ~ expands to home; the folder is created on demand."),
                 default=self._default_log_file_path(),
             ),
+            ExtraSettings.NestedSetting("admission", _("Request Limits"), _("Limit how many requests run at the same time and how many can wait"), [
+                ExtraSettings.SpinSetting("max_concurrent_chat", _("Concurrent Chat Requests"), _("Chat completions generated at the same time"), 4, 1, 64),
+                ExtraSettings.SpinSetting("max_concurrent_embeddings", _("Concurrent Embedding Requests"), _("Embedding requests computed at the same time"), 2, 1, 64),
+                ExtraSettings.SpinSetting("max_concurrent_audio", _("Concurrent Audio Requests"), _("Speech and transcription requests processed at the same time"), 1, 1, 64),
+                ExtraSettings.SpinSetting("max_queued_requests", _("Queued Requests"), _("Requests waiting for a free slot, further requests are rejected with 429"), 32, 0, 1024),
+                ExtraSettings.SpinSetting("request_timeout", _("Request Timeout"), _("Seconds a request can wait and run before it fails, clients can lower it with the X-Request-Timeout header"), 300, 5, 3600),
+            ]),
         ]
 
 
@@ -257,6 +273,77 @@ class APIInterface(ChatInterface):
         """Structured logging for the embeddings endpoint."""
         self._structured_log_print("embeddings", label, obj, max_chars)
 
+    # ------------------------------------------------------------------ #
+    #            Admission control and off-loop handler calls             #
+    # ------------------------------------------------------------------ #
+
+    def _get_int_setting(self, key: str, default: int) -> int:
+        try:
+            return int(self.get_setting(key, search_default=True, return_value=default))
+        except (TypeError, ValueError):
+            return default
+
+    def _create_admission_queues(self) -> dict[str, AdmissionQueue]:
+        max_queued = self._get_int_setting("max_queued_requests", 32)
+        return {
+            group: AdmissionQueue(group, self._get_int_setting(f"max_concurrent_{group}", default), max_queued)
+            for group, default in (("chat", 4), ("embeddings", 2), ("audio", 1))
+        }
+
+    async def _admit(self, group: str, raw_request) -> tuple[AdmissionSlot, float]:
+        """Wait for a slot of the endpoint group; return (slot, deadline).
+
+        The deadline (event loop time) comes from the request_timeout setting,
+        clients can shorten it with X-Request-Timeout (seconds). X-Priority
+        (integer, default 0) moves a request ahead of lower priority ones in
+        the queue. Raises AdmissionError when the request is refused.
+        """
+        timeout = float(self._get_int_setting("request_timeout", 300))
+        try:
+            requested = float(raw_request.headers.get("x-request-timeout", 0))
+            if requested > 0:
+                timeout = min(timeout, requested)
+        except ValueError:
+            pass
+        try:
+            priority = max(-100, min(100, int(raw_request.headers.get("x-priority", 0))))
+        except ValueError:
+            priority = 0
+        deadline = asyncio.get_running_loop().time() + timeout
+        slot = await self._admission[group].acquire(priority, deadline)
+        return slot, deadline
+
+    def _admission_error_response(self, endpoint: str, error: AdmissionError):
+        from fastapi.responses import JSONResponse
+
+        self._log(f"[API {endpoint}] response: {error.status_code} {error}")
+        return JSONResponse(
+            status_code=error.status_code,
+            content={"error": {"message": str(error), "type": error.error_type}},
+            headers={"Retry-After": str(error.retry_after)},
+        )
+
+    async def _run_in_worker(self, slot: AdmissionSlot, deadline: float, func, *args):
+        """Run a blocking call in the worker pool, releasing *slot* when it ends.
+
+        Raises RequestTimeoutError if *deadline* passes first. The call keeps
+        its slot until it actually returns, since a handler cannot be
+        interrupted, so the limits reflect the real load.
+        """
+        try:
+            if self._executor is None:
+                raise RuntimeError("no worker pool")
+            future = self._executor.submit(func, *args)
+        except RuntimeError:
+            # The server is stopping and the pool was shut down
+            slot.release()
+            raise AdmissionError("The API server is shutting down")
+        future.add_done_callback(lambda _: slot.release())
+        timeout = max(0.0, deadline - asyncio.get_running_loop().time())
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            raise RequestTimeoutError("The request did not complete before its deadline") from None
 
     def _create_app(self):
         from fastapi import FastAPI, UploadFile, File, Request, HTTPException
@@ -268,6 +355,7 @@ class APIInterface(ChatInterface):
 
         controller = self.controller
         api_key = self.get_setting("api_key", search_default=True, return_value="")
+        self._admission = self._create_admission_queues()
 
         class APIKeyMiddleware(BaseHTTPMiddleware):
             async def dispatch(self, request: Request, call_next):
@@ -373,7 +461,7 @@ class APIInterface(ChatInterface):
 
         @app.post("/v1/chat/completions")
         @app.post("/chats/completions")
-        async def chat_completions(request: ChatCompletionRequest):
+        async def chat_completions(request: ChatCompletionRequest, raw_request: Request):
             req_dump = request.model_dump() if hasattr(request, "model_dump") else request.dict()
             self._chat_completion_log_print("request (raw body)", req_dump)
 
@@ -410,10 +498,15 @@ class APIInterface(ChatInterface):
                 f"stream={request.stream} messages={len(request.messages)}"
             )
             history = history[:-1]
-            if request.stream:
-                return self._stream_response(llm, completion_id, created, model_name, last_user_message, history, system_prompt)
-            else:
-                return self._non_stream_response(llm, completion_id, created, model_name, last_user_message, history, system_prompt)
+            try:
+                slot, deadline = await self._admit("chat", raw_request)
+                if request.stream:
+                    return self._stream_response(llm, completion_id, created, model_name, last_user_message, history, system_prompt,
+                                                 on_done=slot.release, deadline=deadline)
+                return await self._run_in_worker(slot, deadline, self._non_stream_response,
+                                                 llm, completion_id, created, model_name, last_user_message, history, system_prompt)
+            except AdmissionError as e:
+                return self._admission_error_response("chat/completions", e)
 
         # ------------------------------------------------------------------ #
         # /v2/chat/completions — agent endpoint with tool support, commands,
@@ -421,7 +514,7 @@ class APIInterface(ChatInterface):
         # ------------------------------------------------------------------ #
 
         @app.post("/v2/chat/completions")
-        async def chat_completions_v2(request: ChatCompletionRequest):
+        async def chat_completions_v2(request: ChatCompletionRequest, raw_request: Request):
             req_dump = request.model_dump() if hasattr(request, "model_dump") else request.dict()
             self._chat_completion_log_print("v2 request (raw body)", req_dump)
 
@@ -450,6 +543,11 @@ class APIInterface(ChatInterface):
             # Resolve the interaction first so the LLM thread unblocks, then
             # stream/collect the continuation from the saved event queue.
             if stripped.startswith("/option") and user_key in self._pending_streams:
+                try:
+                    slot, deadline = await self._admit("chat", raw_request)
+                except AdmissionError as e:
+                    # The run stays paused, the client can send /option again
+                    return self._admission_error_response("v2/chat/completions", e)
                 pending_q = self._pending_streams.pop(user_key)
                 # Resolve the interaction (fires callback → unblocks LLM thread).
                 # The returned "✅ …" string is intentionally discarded here;
@@ -461,12 +559,15 @@ class APIInterface(ChatInterface):
                 )
                 if request.stream:
                     return self._v2_resume_stream(
-                        user_key, completion_id, created, model_name, pending_q
+                        user_key, completion_id, created, model_name, pending_q, on_done=slot.release
                     )
-                else:
-                    return self._v2_resume_non_stream(
+                try:
+                    return await self._run_in_worker(
+                        slot, deadline, self._v2_resume_non_stream,
                         user_key, completion_id, created, model_name, pending_q
                     )
+                except AdmissionError as e:
+                    return self._admission_error_response("v2/chat/completions", e)
 
             # ── Slash commands ───────────────────────────────────────────────
             cmd_response = self.try_handle_command(user_key, last_user_message)
@@ -508,57 +609,70 @@ class APIInterface(ChatInterface):
                 f"stream={request.stream} model={model_name!r}"
             )
 
-            if request.stream:
-                return self._v2_stream_response(
-                    user_key, completion_id, created, model_name, last_user_message
-                )
-            else:
-                return self._v2_non_stream_response(
+            try:
+                slot, deadline = await self._admit("chat", raw_request)
+                if request.stream:
+                    return self._v2_stream_response(
+                        user_key, completion_id, created, model_name, last_user_message, on_done=slot.release
+                    )
+                return await self._run_in_worker(
+                    slot, deadline, self._v2_non_stream_response,
                     user_key, completion_id, created, model_name, last_user_message
                 )
+            except AdmissionError as e:
+                return self._admission_error_response("v2/chat/completions", e)
 
         @app.post("/v1/audio/speech")
-        async def create_speech(request: SpeechRequest):
-            from fastapi.responses import Response
-
+        async def create_speech(request: SpeechRequest, raw_request: Request):
             tts = controller.handlers.tts
             voice = request.voice
 
-            if request.stream:
-                return self._stream_tts(tts, voice, request.input, request.response_format)
-            else:
-                return self._non_stream_tts(tts, voice, request.input, request.response_format)
+            stream = request.stream and tts.streaming_enabled()
+            try:
+                slot, deadline = await self._admit("audio", raw_request)
+            except AdmissionError as e:
+                return self._admission_error_response("audio/speech", e)
+            try:
+                if stream:
+                    return self._stream_tts(tts, voice, request.input, request.response_format, on_done=slot.release)
+                return await self._run_in_worker(slot, deadline, self._non_stream_tts,
+                                                 tts, voice, request.input, request.response_format)
+            except AdmissionError as e:
+                return self._admission_error_response("audio/speech", e)
+            except Exception as e:
+                # Failed before the stream took over the slot, e.g. on an unknown voice
+                slot.release()
+                return JSONResponse(
+                    status_code=500,
+                    content={"error": {"message": f"TTS failed: {str(e)}", "type": "server_error"}},
+                )
 
         @app.post("/v1/audio/transcriptions")
-        async def create_transcription(file: UploadFile = File(...), model: Optional[str] = None, language: Optional[str] = None, prompt: Optional[str] = None, temperature: Optional[float] = None):
+        async def create_transcription(raw_request: Request, file: UploadFile = File(...), model: Optional[str] = None, language: Optional[str] = None, prompt: Optional[str] = None, temperature: Optional[float] = None):
             stt = controller.handlers.stt
 
-            temp_file = tempfile.NamedTemporaryFile(suffix=".wav", delete=False)
+            try:
+                slot, deadline = await self._admit("audio", raw_request)
+            except AdmissionError as e:
+                return self._admission_error_response("audio/transcriptions", e)
             try:
                 content = await file.read()
-                temp_file.write(content)
-                temp_file.flush()
-                temp_file.close()
-
-                text = stt.recognize_file(temp_file.name)
-                if text is None:
-                    text = ""
-
+            except Exception:
+                slot.release()
+                raise
+            try:
+                text = await self._run_in_worker(slot, deadline, self._transcribe, stt, content)
                 return {"text": text}
+            except AdmissionError as e:
+                return self._admission_error_response("audio/transcriptions", e)
             except Exception as e:
                 return JSONResponse(
                     status_code=500,
                     content={"error": {"message": f"Transcription failed: {str(e)}", "type": "server_error"}},
                 )
-            finally:
-                try:
-                    temp_file.close()
-                    os.unlink(temp_file.name)
-                except Exception:
-                    pass
 
         @app.post("/v1/embeddings")
-        async def create_embeddings(request: EmbeddingRequest):
+        async def create_embeddings(request: EmbeddingRequest, raw_request: Request):
             req_dump = request.model_dump() if hasattr(request, "model_dump") else request.dict()
             self._embedding_log_print("request (raw body)", req_dump)
 
@@ -595,7 +709,10 @@ class APIInterface(ChatInterface):
             self._embedding_log_print("request (texts to embed)", {"texts": texts})
 
             try:
-                embeddings = embedding_handler.get_embedding(texts)
+                slot, deadline = await self._admit("embeddings", raw_request)
+                embeddings = await self._run_in_worker(slot, deadline, embedding_handler.get_embedding, texts)
+            except AdmissionError as e:
+                return self._admission_error_response("embeddings", e)
             except Exception as e:
                 return JSONResponse(
                     status_code=500,
@@ -678,7 +795,14 @@ class APIInterface(ChatInterface):
 
         return JSONResponse(content=payload)
 
-    def _stream_response(self, llm, completion_id, created, model_name, prompt, history, system_prompt):
+    def _stream_response(self, llm, completion_id, created, model_name, prompt, history, system_prompt,
+                         on_done=None, deadline=None):
+        """Stream a completion generated in the worker pool.
+
+        *on_done* is called once the LLM call returned, whether or not the
+        client is still reading. Once *deadline* (event loop time) passes,
+        the stream ends with a timeout error, as in _run_in_worker.
+        """
         from fastapi.responses import StreamingResponse
 
         q = queue.Queue()
@@ -686,11 +810,12 @@ class APIInterface(ChatInterface):
         error_container = [None]
         # Capture the return value of generate_text_stream, which includes tool-call
         # JSON blocks appended AFTER streaming ends — on_update only fires during
-        # content chunks so final_full_message from the queue would miss them.
+        # content chunks so the streamed updates would miss them.
         final_result_container = [None]
 
-        def on_update(full_message: str):
-            q.put(("chunk", full_message))
+        @stream_updates
+        def on_update(update: StreamUpdate):
+            q.put(("chunk", update))
 
         def run_llm():
             try:
@@ -699,14 +824,26 @@ class APIInterface(ChatInterface):
                 error_container[0] = str(e)
             finally:
                 q.put(done_sentinel)
+                if on_done is not None:
+                    on_done()
 
-        thread = threading.Thread(target=run_llm, daemon=True)
-        thread.start()
-
-        prev_len = 0
+        try:
+            if self._executor is None:
+                raise RuntimeError("no worker pool")
+            self._executor.submit(run_llm)
+        except RuntimeError:
+            if on_done is not None:
+                on_done()
+            raise AdmissionError("The API server is shutting down")
+
+        # The generator runs in a thread, outside the event loop
+        expires = None
+        if deadline is not None:
+            expires = time.monotonic() + deadline - asyncio.get_running_loop().time()
+        sent_len = 0
 
         def event_generator():
-            nonlocal prev_len
+            nonlocal sent_len
 
             self._log(
                 f"[API chat/completions] stream start id={completion_id} model={model_name!r} "
@@ -715,24 +852,36 @@ class APIInterface(ChatInterface):
 
             yield f"data: {json.dumps({'id': completion_id, 'object': 'chat.completion.chunk', 'created': created, 'model': model_name, 'choices': [{'index': 0, 'delta': {'role': 'assistant', 'content': ''}, 'finish_reason': None}]})}\n\n"
 
-            final_full_message = ""
+            last_update = None
 
             while True:
-                item = q.get()
+                try:
+                    item = q.get(timeout=None if expires is None else max(0.0, expires - time.monotonic()))
+                except queue.Empty:
+                    error = RequestTimeoutError("The request did not complete before its deadline")
+                    self._log(f"[API chat/completions] stream timeout id={completion_id}")
+                    yield f"data: {json.dumps({'error': {'message': str(error), 'type': error.error_type}})}\n\n"
+                    yield "data: [DONE]\n\n"
+                    return
                 if item is done_sentinel:
                     break
 
-                _, full_message = item
-                final_full_message = full_message
-                delta = full_message[prev_len:]
-                prev_len = len(full_message)
+                _, update = item
+                last_update = update
+                # Text already sent can't be taken back: on rewrites only
+                # send what goes past it
+                delta = update.delta[max(sent_len - update.offset, 0):]
+                sent_len = max(sent_len, update.end)
 
                 if delta:
                     yield f"data: {json.dumps({'id': completion_id, 'object': 'chat.completion.chunk', 'created': created, 'model': model_name, 'choices': [{'index': 0, 'delta': {'content': delta}, 'finish_reason': None}]})}\n\n"
 
             # Prefer the return value (has tool calls appended post-stream) over
-            # final_full_message which only accumulates on_update content chunks.
-            message_for_parsing = final_result_container[0] if final_result_container[0] is not None else final_full_message
+            # the streamed text, which only has the content chunks.
+            if final_result_container[0] is not None:
+                message_for_parsing = final_result_container[0]
+            else:
+                message_for_parsing = last_update.text.strip() if last_update is not None else ""
 
             if error_container[0] is not None:
                 err_text = f"\n[Error: {error_container[0]}]"
@@ -811,7 +960,12 @@ class APIInterface(ChatInterface):
         return None
 
     def _start_process_message_thread(self, user_key, message) -> queue.Queue:
-        """Spin up process_message in a thread; return the event queue."""
+        """Spin up process_message in a thread; return the event queue.
+
+        Runs get their own thread rather than a worker of the pool: a run
+        paused at a tool interaction waits for the next /option request and
+        would hold the worker indefinitely.
+        """
         event_q: queue.Queue = queue.Queue()
 
         def on_chunk(delta: str):
@@ -915,31 +1069,40 @@ class APIInterface(ChatInterface):
                     yield "data: [DONE]\n\n"
                     return  # close this stream; LLM thread stays alive in background
 
-    def _v2_stream_response(self, user_key, completion_id, created, model_name, message):
+    def _v2_stream_response(self, user_key, completion_id, created, model_name, message, on_done=None):
+        """Stream an agent run; *on_done* is called when the stream ends."""
         from fastapi.responses import StreamingResponse
 
         event_q = self._start_process_message_thread(user_key, message)
 
         def event_generator():
-            yield self._sse_chunk(completion_id, created, model_name,
-                                  role="assistant", delta_content="")
-            yield from self._drain_queue_to_stream(
-                user_key, completion_id, created, model_name, event_q
-            )
+            try:
+                yield self._sse_chunk(completion_id, created, model_name,
+                                      role="assistant", delta_content="")
+                yield from self._drain_queue_to_stream(
+                    user_key, completion_id, created, model_name, event_q
+                )
+            finally:
+                if on_done is not None:
+                    on_done()
 
         return StreamingResponse(event_generator(), media_type="text/event-stream")
 
     def _v2_resume_stream(self, user_key, completion_id, created, model_name,
-                          event_q: queue.Queue):
+                          event_q: queue.Queue, on_done=None):
         """Stream the continuation of a run that was paused at a tool interaction."""
         from fastapi.responses import StreamingResponse
 
         def event_generator():
-            yield self._sse_chunk(completion_id, created, model_name,
-                                  role="assistant", delta_content="")
-            yield from self._drain_queue_to_stream(
-                user_key, completion_id, created, model_name, event_q
-            )
+            try:
+                yield self._sse_chunk(completion_id, created, model_name,
+                                      role="assistant", delta_content="")
+                yield from self._drain_queue_to_stream(
+                    user_key, completion_id, created, model_name, event_q
+                )
+            finally:
+                if on_done is not None:
+                    on_done()
 
         return StreamingResponse(event_generator(), media_type="text/event-stream")
 
@@ -1021,6 +1184,23 @@ class APIInterface(ChatInterface):
 
         return content, finish_reason
 
+    @staticmethod
+    def _transcribe(stt, content: bytes) -> str:
+        """Recognize uploaded audio through a temporary file (blocking)."""
+        temp_file = tempfile.NamedTemporaryFile(suffix=".wav", delete=False)
+        try:
+            temp_file.write(content)
+            temp_file.flush()
+            temp_file.close()
+            text = stt.recognize_file(temp_file.name)
+            return text if text is not None else ""
+        finally:
+            try:
+                temp_file.close()
+                os.unlink(temp_file.name)
+            except Exception:
+                pass
+
     def _non_stream_tts(self, tts, voice, text, response_format):
         from fastapi.responses import Response
 
@@ -1057,14 +1237,18 @@ class APIInterface(ChatInterface):
                 content={"error": {"message": f"TTS failed: {str(e)}", "type": "server_error"}},
             )
 
-    def _stream_tts(self, tts, voice, text, response_format):
+    def _stream_tts(self, tts, voice, text, response_format, on_done=None):
+        """Stream speech converted by ffmpeg; *on_done* is called when the stream ends."""
         from fastapi.responses import StreamingResponse, JSONResponse
         from subprocess import Popen
         import subprocess
-        import asyncio
 
         if not tts.streaming_enabled():
-            return self._non_stream_tts(tts, voice, text, response_format)
+            try:
+                return self._non_stream_tts(tts, voice, text, response_format)
+            finally:
+                if on_done is not None:
+                    on_done()
 
         content_type = "audio/mpeg" if response_format == "mp3" else "audio/wav"
 
@@ -1084,6 +1268,10 @@ class APIInterface(ChatInterface):
                 stderr=subprocess.DEVNULL,
             )
         except FileNotFoundError:
+            if voice:
+                tts.set_voice(original_voice)
+            if on_done is not None:
+                on_done()
             return JSONResponse(
                 status_code=500,
                 content={"error": {"message": "ffmpeg not found", "type": "server_error"}},
@@ -1129,17 +1317,21 @@ class APIInterface(ChatInterface):
         loop = asyncio.get_event_loop()
 
         async def audio_generator():
-            while True:
-                item = await loop.run_in_executor(None, q.get)
-                if item is done_sentinel or item is error_sentinel:
-                    break
-                yield item
             try:
-                ffmpeg_process.terminate()
-            except Exception:
-                pass
-            if voice:
-                tts.set_voice(original_voice)
+                while True:
+                    item = await loop.run_in_executor(None, q.get)
+                    if item is done_sentinel or item is error_sentinel:
+                        break
+                    yield item
+            finally:
+                try:
+                    ffmpeg_process.terminate()
+                except Exception:
+                    pass
+                if voice:
+                    tts.set_voice(original_voice)
+                if on_done is not None:
+                    on_done()
 
         return StreamingResponse(audio_generator(), media_type=content_type)
 
@@ -1153,6 +1345,8 @@ class APIInterface(ChatInterface):
 
         try:
             app = self._create_app()
+            workers = sum(admission.max_concurrent for admission in self._admission.values())
+            self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api-worker")
             host = self._get_host()
             port = self._get_port()
             config = uvicorn.Config(app, host=host, port=port, log_level="warning")
@@ -1170,6 +1364,10 @@ class APIInterface(ChatInterface):
             self._server.should_exit = True
             self._server = None
             print("API server stopped")
+        if self._executor is not None:
+            # Running handler calls finish in the background
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
 
     def _is_locally_running(self):
         return self._server is not None and not self._server.should_exit
@@ -13,6 +13,7 @@ import os
 import threading
 import uuid
 
+from ...utility.streaming import StreamView, stream_updates
 from ...utility.strings import remove_thinking_blocks
 from .interface import Interface
 
@@ -127,28 +128,43 @@ class ChatInterface(Interface):
         user_id = str(user_id)
         chat_id = self.get_or_create_chat(user_id)
 
-        accumulated = ""
-        last_cumulative = ""
+        accumulated = []
+        view = StreamView()
+        # Only the tail of the stream is scanned for think tags, keep enough
+        # of it to catch a tag split between two updates
+        tail = ""
+        still_thinking = False
         is_thinking = False
         state_lock = threading.Lock()
 
-        def _on_message(cumulative_text: str):
-            nonlocal accumulated, last_cumulative, is_thinking
+        @stream_updates
+        def _on_message(update):
+            nonlocal tail, still_thinking, is_thinking
             with state_lock:
-                cleaned = remove_thinking_blocks(cumulative_text)
-                still_thinking = "<think>" in cleaned
-                if still_thinking:
-                    cleaned = ""
-
-                if cumulative_text.startswith(last_cumulative):
-                    raw_delta = cumulative_text[len(last_cumulative):]
+                previous_length = len(view)
+                offset, raw_delta, new_stream = view.apply(update)
+                if new_stream:
+                    tail = ""
+                    still_thinking = False
+                if not new_stream and offset < previous_length:
+                    # Rewritten text can't be taken back, only send what is new
+                    text = view.text
+                    still_thinking = "<think>" in remove_thinking_blocks(text)
+                    tail = text[-len("</think>"):]
+                    raw_delta = text[previous_length:]
                 else:
-                    raw_delta = cumulative_text
-                last_cumulative = cumulative_text
+                    window = tail + raw_delta
+                    opened = window.rfind("<think>")
+                    closed = window.rfind("</think>")
+                    if opened > closed:
+                        still_thinking = True
+                    elif closed > opened:
+                        still_thinking = False
+                    tail = window[-len("</think>"):]
 
                 if not still_thinking and is_thinking:
                     is_thinking = False
-                    delta = cleaned
+                    delta = remove_thinking_blocks(view.text)
                 elif still_thinking:
                     is_thinking = True
                     delta = ""
@@ -156,7 +172,7 @@ class ChatInterface(Interface):
                     delta = raw_delta
 
                 if not still_thinking:
-                    accumulated += delta
+                    accumulated.append(delta)
                     if on_chunk and delta:
                         on_chunk(delta)
 
@@ -198,7 +214,7 @@ class ChatInterface(Interface):
             save_chat=True,
             force_tools_on_main_thread=True,
         )
-        return accumulated
+        return "".join(accumulated)
 
     # ------------------------------------------------------------------ #
     #                     Interaction resolution                           #
@@ -544,7 +560,7 @@ class ChatInterface(Interface):
                 continue
             marker = "▶" if cid == current_chat_id else " "
             name = chat.get("name", f"Chat {cid}")
-            msg_count = len(chat.get("chat", []))
+            msg_count = self.controller.get_chat_message_count(cid)
             lines.append(f"{marker} {cid}. {name} ({msg_count} messages)"[:80])
         if not lines:
             return "📭 No chats available."
@@ -302,7 +302,7 @@ class GUIAPIInterface(Interface):
                 entry = {
                     "id": cid,
                     "name": chat_data.get("name", ""),
-                    "message_count": len(chat_data.get("chat", [])),
+                    "message_count": controller.get_chat_message_count(cid),
                     "folder_id": controller.get_folder_for_chat(cid),
                     "profile": chat_data.get("profile"),
                     "call": chat_data.get("call", False),
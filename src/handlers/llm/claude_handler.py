@@ -17,6 +17,7 @@ from ...utility import (
     parse_tool_console_message,
 )
 from ...utility.media import extract_file, extract_image, get_image_base64
+from ...utility.streaming import StreamBuffer
 from .llm import LLMHandler
 
 _ = gettext.gettext
@@ -678,12 +679,6 @@ class ClaudeHandler(LLMHandler):
         formatted = self._format_content(self._value(response, "content", []) or [])
         return _ResponseText(formatted, self._response_metadata(response, formatted))
 
-    def _stream_update(self, text: str, previous: str, on_update: Callable, extra_args: list) -> str:
-        if len(text) - len(previous) > 1:
-            on_update(*(text.strip(), *extra_args))
-            return text
-        return previous
-
     def generate_text(
         self,
         prompt: str,
@@ -713,8 +708,7 @@ class ClaudeHandler(LLMHandler):
         kwargs = self._request_kwargs(prompt, history, system_prompt)
 
         with client.messages.stream(**kwargs) as stream:
-            visible = ""
-            previous = ""
+            visible = StreamBuffer(on_update, extra_args)
             thinking_open = False
             final_response = None
             streamed_content = []
@@ -739,7 +733,7 @@ class ClaudeHandler(LLMHandler):
                     block = self._plain(self._value(event, "content_block", {}))
                     block_type = self._value(block, "type", "")
                     if block_type in {"text", "tool_use"} and thinking_open:
-                        visible += "</think>\n"
+                        visible.append("</think>\n")
                         thinking_open = False
                     if block_type == "text":
                         block = {"type": "text", "text": self._value(block, "text", "") or ""}
@@ -778,18 +772,18 @@ class ClaudeHandler(LLMHandler):
                             self._value(delta, "thinking", "") or ""
                         )
                         if not thinking_open:
-                            visible += "<think>"
+                            visible.append("<think>")
                             thinking_open = True
-                        visible += str(self._value(delta, "thinking", "") or "")
+                        visible.append(str(self._value(delta, "thinking", "") or ""))
                     elif delta_type == "text_delta":
                         block = ensure_stream_block("text")
                         block["text"] = str(block.get("text", "") or "") + str(
                             self._value(delta, "text", "") or ""
                         )
                         if thinking_open:
-                            visible += "</think>\n"
+                            visible.append("</think>\n")
                             thinking_open = False
-                        visible += str(self._value(delta, "text", "") or "")
+                        visible.append(str(self._value(delta, "text", "") or ""))
                     elif delta_type == "input_json_delta":
                         if current_input_json is None:
                             current_input_json = ""
@@ -813,9 +807,6 @@ class ClaudeHandler(LLMHandler):
                     current_content_index = None
                     current_input_json = None
 
-                if event_type == "content_block_delta":
-                    previous = self._stream_update(visible, previous, on_update, extra_args)
-
             if final_response is None and self.running:
                 try:
                     final_response = stream.get_final_message()
@@ -826,26 +817,27 @@ class ClaudeHandler(LLMHandler):
 
         if final_response is not None:
             result = self._response_text(final_response)
-            final_text = str(result)
-            if final_text != visible.strip():
-                on_update(*(final_text, *extra_args))
+            visible.finish(str(result))
             return result
 
         if thinking_open:
-            visible += "</think>"
-        return visible.strip()
+            visible.append("</think>")
+        return visible.finish().strip()
 
     @staticmethod
     def get_extra_requirements() -> list:
         return ["anthropic"]
 
     def _get_client(self):
-        import anthropic
+        api = self.get_setting("api")
+        endpoint = self.get_setting("endpoint")
+
+        def create():
+            import anthropic
+
+            return anthropic.Client(api_key=api, base_url=endpoint)
 
-        return anthropic.Client(
-            api_key=self.get_setting("api"),
-            base_url=self.get_setting("endpoint"),
-        )
+        return self.get_pooled_client(create, "anthropic", endpoint, api)
 
     def get_models(self):
         if not self.is_installed() or self.get_setting("api", False) == "":
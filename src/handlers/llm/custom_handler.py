@@ -5,6 +5,7 @@ from typing import Any, Callable
 from .llm import LLMHandler
 from ...utility.strings import quote_string
 from ...utility.system import get_spawn_command
+from ...utility.streaming import StreamBuffer
 from ...handlers import ExtraSettings
 
 class CustomLLMHandler(LLMHandler):
@@ -47,20 +48,15 @@ class CustomLLMHandler(LLMHandler):
         command = command.replace("{0}", quote_string(json.dumps(history)))
         command = command.replace("{1}", quote_string(json.dumps(system_prompt)))
         process = Popen(get_spawn_command() + ["bash", "-c", command], stdout=PIPE)        
-        full_message = ""
-        prev_message = ""
+        stream = StreamBuffer(on_update, extra_args)
         while True:
             if process.stdout is None:
                 break
             chunk = process.stdout.readline()
             if not chunk:
                 break
-            full_message += chunk.decode("utf-8")
-            args = (full_message.strip(), ) + tuple(extra_args)
-            if len(full_message) - len(prev_message) > 1:
-                on_update(*args)
-                prev_message = full_message
+            stream.append(chunk.decode("utf-8"))
 
         process.wait()
-        return full_message.strip()
+        return stream.finish().strip()
 
@@ -7,6 +7,7 @@ from ...utility import convert_history_openai
 from ...utility.pip import find_module, install_module
 from ...utility.media import extract_image, get_image_path
 from ...utility.util import get_streaming_extra_setting
+from ...utility.streaming import StreamBuffer
 from ...handlers import ErrorSeverity, ExtraSettings
 
 class G4FHandler(LLMHandler):
@@ -106,16 +107,11 @@ class G4FHandler(LLMHandler):
                 stream=True,
                 image= open(img, "rb") if img is not None else None
             )
-            full_message = ""
-            prev_message = ""
+            stream = StreamBuffer(on_update, extra_args)
             for chunk in response:
                 if chunk.choices[0].delta.content:
-                    full_message += chunk.choices[0].delta.content
-                    args = (full_message.strip(), ) + tuple(extra_args)
-                    if len(full_message) - len(prev_message) > 1:
-                        on_update(*args)
-                        prev_message = full_message
-            return full_message.strip()
+                    stream.append(chunk.choices[0].delta.content)
+            return stream.finish().strip()
         except Exception as e:
             raise e
 
@@ -12,6 +12,7 @@ from ...utility.media import extract_image, extract_video, extract_file
 from ...utility.pip import find_module
 from ...utility.system import open_website
 from ...utility import extract_tools_from_prompts, VOID_TOOL_RESULT_PLACEHOLDER
+from ...utility.streaming import StreamBuffer
 from ...handlers import ExtraSettings, ErrorSeverity
 
 
@@ -346,9 +347,18 @@ class GeminiHandler(LLMHandler):
         })
         return history
     
+    def get_client(self):
+        """Get the pooled Gemini client for the current API key"""
+        api = self.get_setting("apikey")
+
+        def create():
+            from google import genai
+            return genai.Client(api_key=api)
+
+        return self.get_pooled_client(create, "gemini", api)
+
     def get_gemini_image(self, message: str) -> tuple[object, str]:
-        from google.genai import Client 
-        client = Client(api_key=self.get_setting("apikey"))
+        client = self.get_client()
         img = None
         image, text = extract_image(message)
         if image is None:
@@ -401,7 +411,6 @@ class GeminiHandler(LLMHandler):
         return self.generate_text_stream(prompt, history, system_prompt) 
     
     def generate_text_stream(self, prompt: str, history: list[dict[str, str]] = [], system_prompt: list[str] = [], on_update: Callable[[str], Any] = lambda _: None , extra_args: list = []) -> str:
-        from google import genai
         from google.genai.types import HarmCategory, HarmBlockThreshold, GenerateContentConfig, Part 
         from google.genai import types
 
@@ -423,7 +432,7 @@ class GeminiHandler(LLMHandler):
                 types.SafetySetting(category=types.HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT, threshold=HarmBlockThreshold.BLOCK_NONE),
                 types.SafetySetting(category=types.HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT, threshold=HarmBlockThreshold.BLOCK_NONE),
             ] 
-        client = genai.Client(api_key=self.get_setting("apikey"))
+        client = self.get_client()
         instructions = "\n".join(system_prompt)
         append_instructions = None
         if not self.get_setting("system_prompt"): 
@@ -466,8 +475,7 @@ class GeminiHandler(LLMHandler):
                 config=generate_content_config,
                 model=self.get_setting("model"),
             )
-            full_message = ""
-            thoughts = ""
+            stream = StreamBuffer(on_update, extra_args, min_delta=1)
             thinking = False
             # Collect function calls from all chunks
             pending_function_calls = []
@@ -477,35 +485,29 @@ class GeminiHandler(LLMHandler):
                     continue
                 for part in chunk.candidates[0].content.parts:
                     if part.inline_data:
-                        args = (full_message.strip(), ) + tuple(extra_args)
-                        on_update(*args)
-                        file_name = self.generate_file_name(".png") 
+                        file_name = self.generate_file_name(".png")
                         self.save_binary_file(
                             file_name, part.inline_data.data
                         )
-                        full_message += "\n```image\n" + file_name + "\n```\n"
+                        stream.append("\n```image\n" + file_name + "\n```\n")
                     elif native_tool_calling and part.function_call is not None:
                         # Collect function call parts; they will be appended after streaming
                         pending_function_calls.append(part.function_call)
                     elif not part.text:
                         continue
                     elif part.thought:
-                        thoughts += part.text
                         if not thinking:
-                            full_message += "<think> " + thoughts
+                            stream.append("<think> ")
                         thinking = True
-                        full_message += part.text
-                        args = (full_message.strip(), ) + tuple(extra_args)
-                        on_update(*args)
+                        stream.append(part.text)
                     else:
                         if thinking:
                             thinking = False 
-                            full_message += "</think>\n"
-                        full_message += part.text
-                        args = (full_message.strip(), ) + tuple(extra_args)
-                        on_update(*args)
+                            stream.append("</think>\n")
+                        stream.append(part.text)
 
             # After streaming, serialize any function calls as JSON code blocks
+            full_message = stream.finish()
             if pending_function_calls:
                 if thinking:
                     full_message += "</think>\n"
@@ -1,6 +1,7 @@
 from typing import Callable, Any
 
 from .g4f_handler import G4FHandler
+from ...utility.streaming import StreamBuffer
 
 class GPT3AnyHandler(G4FHandler):
     """
@@ -50,16 +51,11 @@ class GPT3AnyHandler(G4FHandler):
             messages=history,
             stream=True,
         )
-        full_message = ""
-        prev_message = ""
+        stream = StreamBuffer(on_update, extra_args)
         for chunk in response:
             if chunk.choices[0].delta.content:
-                full_message += chunk.choices[0].delta.content
-                args = (full_message.strip(), ) + tuple(extra_args)
-                if len(full_message) - len(prev_message) > 1:
-                    on_update(*args)
-                    prev_message = full_message
-        return full_message.strip()
+                stream.append(chunk.choices[0].delta.content)
+        return stream.finish().strip()
 
     def generate_chat_name(self, request_prompt: str = "") -> str:
         history = ""
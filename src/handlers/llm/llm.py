@@ -127,6 +127,7 @@ class LLMHandler(Handler):
             history (dict[str, str], optional): history of the chat. Defaults to {}.
             system_prompt (list[str], optional): content of the system prompt. Defaults to [].
             on_update (Callable[[str], Any], optional): Function to call when text is generated. The partial message is the first agrument Defaults to ().
+                Stream it through utility.streaming.StreamBuffer: callbacks marked with stream_updates get a StreamUpdate with only the new text instead.
             extra_args (list, optional): extra arguments to pass to the on_update function. Defaults to [].
         
         Returns:
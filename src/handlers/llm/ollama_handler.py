@@ -15,6 +15,7 @@ from .llm import LLMHandler
 from ...utility import get_streaming_extra_setting, extract_tools_from_prompts, convert_history_openai, balance_native_tool_call_responses, parse_assistant_native_tool_calls, parse_tool_console_message
 from ...utility.system import can_escape_sandbox, get_spawn_command
 from ...utility.media import extract_image
+from ...utility.streaming import StreamBuffer
 from ...handlers import ExtraSettings
 
 class OllamaHandler(LLMHandler):
@@ -263,11 +264,16 @@ class OllamaHandler(LLMHandler):
         return {"Authorization": "Bearer " + api_key.strip()}
 
     def create_client(self):
-        from ollama import Client
         headers = self.get_client_headers()
-        if len(headers) > 0:
-            return Client(host=self.get_setting("endpoint"), headers=headers)
-        return Client(host=self.get_setting("endpoint"))
+        endpoint = self.get_setting("endpoint")
+
+        def create():
+            from ollama import Client
+            if len(headers) > 0:
+                return Client(host=endpoint, headers=headers)
+            return Client(host=endpoint)
+
+        return self.get_pooled_client(create, "ollama", endpoint, headers)
 
     def supports_vision(self) -> bool:
         return True
@@ -558,36 +564,31 @@ class OllamaHandler(LLMHandler):
             if tools_list:
                 kwargs["tools"] = tools_list
             response = client.chat(**kwargs)
-            full_message = ""
-            prev_message = ""
+            stream = StreamBuffer(on_update, extra_args)
             thinking = False
+            # Tool calls are not streamed, they are added to the returned message
+            tool_calls = ""
             for chunk in response:
                 if "thinking" in chunk["message"] and chunk["message"]["thinking"] is not None:
                     if not thinking:
-                        full_message += "<think>"
+                        stream.append("<think>")
                         thinking = True
-                    full_message += chunk["message"]["thinking"]
-                    args = (full_message.strip(), ) + tuple(extra_args)
-                    if len(full_message) - len(prev_message) > 1:
-                        on_update(*args)
-                        prev_message = full_message
+                    stream.append(chunk["message"]["thinking"])
                 if len(chunk["message"]["content"]):
                     if thinking is True:
                         thinking = False
-                        full_message += "</think>"
-                    full_message += chunk["message"]["content"]
-                    args = (full_message.strip(), ) + tuple(extra_args)
-                    on_update(*args)
-                    prev_message = full_message
+                        stream.append("</think>")
+                    stream.append(chunk["message"]["content"])
+                    stream.flush()
                 if "tool_calls" in chunk["message"] and chunk["message"]["tool_calls"] is not None:
                     if thinking:
                         thinking = False
-                        full_message += "</think>"
+                        stream.append("</think>")
                     for tool in chunk["message"]["tool_calls"]:
                         tool_name = tool.function.name 
                         arguments = tool.function.arguments
                         call = "```json\n" + json.dumps({"tool": tool_name, "arguments": arguments}) + "\n```\n"
-                        full_message += call
-            return full_message.strip()
+                        tool_calls += call
+            return (stream.finish() + tool_calls).strip()
         except Exception as e:
             raise e
@@ -11,6 +11,8 @@ from .llm import LLMHandler
 from ...utility.system import open_website
 from ...utility import _ResponseText, convert_history_openai, get_streaming_extra_setting, extract_tools_from_prompts, balance_native_tool_call_responses, parse_assistant_native_tool_calls, parse_tool_console_message
 from ...handlers import ExtraSettings, ErrorSeverity
+from ...utility.streaming import StreamBuffer
+from ..client_pool import ClientPool
 
 
 class OpenAIHandler(LLMHandler):
@@ -695,12 +697,14 @@ class OpenAIHandler(LLMHandler):
         refusal = ""
         reasoning_summary = ""
         reasoning_text = ""
-        previous_preview = ""
+        stream = StreamBuffer(on_update, extra_args)
         completed_response = None
         completed_items = {}
         cancelled = False
 
-        def preview() -> str:
+        def layout() -> str:
+            # Streamed text: preview() with the whitespace at the end, so
+            # deltas appended after a rewrite line up
             parts = []
             reasoning = "\n\n".join(
                 part for part in (reasoning_summary, reasoning_text) if part
@@ -711,7 +715,62 @@ class OpenAIHandler(LLMHandler):
                 parts.append(text)
             if refusal:
                 parts.append("### Refusal\n\n" + refusal)
-            return "\n\n".join(parts).strip()
+            return "\n\n".join(parts).lstrip()
+
+        def preview() -> str:
+            return layout().rstrip()
+
+        # Section at the end of the streamed text, as laid out by layout(),
+        # and if the think block was closed by a rewrite
+        shown = None
+        think_closed = False
+
+        def add(kind: str, delta: str):
+            nonlocal text, refusal, reasoning_summary, reasoning_text, shown, think_closed
+            if not delta:
+                return
+            section = "reasoning" if kind.startswith("reasoning") else kind
+            # Text before the end changes: a section followed by another one
+            # grows, or a summary comes after the reasoning text
+            followed = {"reasoning": text or refusal, "text": refusal, "refusal": ""}[section]
+            rewrite = bool(followed) or (kind == "reasoning_summary" and reasoning_text) or \
+                (section == "reasoning" and think_closed)
+            if section == "reasoning":
+                prefix = "<think>" if shown is None else ""
+                if kind == "reasoning_text" and reasoning_summary and not reasoning_text:
+                    prefix += "\n\n"
+            elif section == shown:
+                prefix = ""
+            else:
+                prefix = "</think>" if shown == "reasoning" and not think_closed else ""
+                if shown is not None:
+                    prefix += "\n\n"
+                if section == "refusal":
+                    prefix += "### Refusal\n\n"
+            if kind == "text":
+                text += delta
+                if shown is None:
+                    # layout() strips the start of the message
+                    delta = delta.lstrip()
+            elif kind == "refusal":
+                refusal += delta
+            elif kind == "reasoning_summary":
+                reasoning_summary += delta
+            else:
+                reasoning_text += delta
+            if rewrite:
+                stream.replace(layout())
+                if refusal:
+                    shown = "refusal"
+                elif text.strip() or (text and (reasoning_summary or reasoning_text)):
+                    shown = "text"
+                else:
+                    shown = "reasoning" if reasoning_summary or reasoning_text else None
+                think_closed = shown == "reasoning"
+            elif delta:
+                stream.append(prefix + delta)
+                shown = section
+                think_closed = False
 
         for event in response:
             if not self.running:
@@ -723,13 +782,13 @@ class OpenAIHandler(LLMHandler):
 
             event_type = self._value(event, "type", "")
             if event_type == "response.output_text.delta":
-                text += str(self._value(event, "delta", "") or "")
+                add("text", str(self._value(event, "delta", "") or ""))
             elif event_type == "response.refusal.delta":
-                refusal += str(self._value(event, "delta", "") or "")
+                add("refusal", str(self._value(event, "delta", "") or ""))
             elif event_type == "response.reasoning_summary_text.delta":
-                reasoning_summary += str(self._value(event, "delta", "") or "")
+                add("reasoning_summary", str(self._value(event, "delta", "") or ""))
             elif event_type == "response.reasoning_text.delta":
-                reasoning_text += str(self._value(event, "delta", "") or "")
+                add("reasoning_text", str(self._value(event, "delta", "") or ""))
             elif event_type == "response.output_item.done":
                 index = self._value(event, "output_index", len(completed_items))
                 completed_items[index] = self._plain(self._value(event, "item", {}))
@@ -744,16 +803,6 @@ class OpenAIHandler(LLMHandler):
                 error = self._value(event, "error", event)
                 message = self._value(error, "message", str(error))
                 raise RuntimeError(str(message))
-            else:
-                continue
-
-            current_preview = preview()
-            if current_preview and (
-                len(current_preview) - len(previous_preview) > 1
-                or not current_preview.startswith(previous_preview)
-            ):
-                on_update(current_preview, *tuple(extra_args))
-                previous_preview = current_preview
 
         if completed_response is not None:
             output = self._plain(self._value(completed_response, "output", []) or [])
@@ -763,8 +812,8 @@ class OpenAIHandler(LLMHandler):
             fallback = preview()
 
         content = self.format_responses_output(output, fallback)
-        if content and content != previous_preview:
-            on_update(content, *tuple(extra_args))
+        if content:
+            stream.finish(content)
         if cancelled or completed_response is None:
             return content
         metadata = self._response_metadata(
@@ -865,9 +914,26 @@ class OpenAIHandler(LLMHandler):
             self.set_setting("thinking", True)
             self.set_setting("thinking_effort", value)
 
-    def generate_text(self, prompt: str, history: list[dict[str, str]] = [], system_prompt: list[str] = []) -> str:
-        from openai import OpenAI
+    def get_client(self):
+        """Get the pooled OpenAI client for the current endpoint and key.
+
+        Extra headers are sent per request, so they are not part of the key.
+        """
+        api = self.get_setting("api")
+        if api == "":
+            api = "nokey"
+        endpoint = self.get_setting("endpoint")
+
+        def create_client():
+            import openai
+            kwargs = {}
+            if ClientPool.http2_available() and hasattr(openai, "DefaultHttpxClient"):
+                kwargs["http_client"] = openai.DefaultHttpxClient(http2=True)
+            return openai.OpenAI(api_key=api, base_url=endpoint, **kwargs)
+
+        return self.get_pooled_client(create_client, "openai", endpoint, api)
 
+    def generate_text(self, prompt: str, history: list[dict[str, str]] = [], system_prompt: list[str] = []) -> str:
         responses_api = self.uses_responses_api()
         native_tool_calling = self.get_setting("native_tool_calling", False, True)
         if native_tool_calling:
@@ -886,14 +952,7 @@ class OpenAIHandler(LLMHandler):
             messages = self.convert_history(history, system_prompt)
             if native_tool_calling:
                 messages = balance_native_tool_call_responses(messages)
-        api = self.get_setting("api")
-        if api == "":
-            api = "nokey"
-        
-        client = OpenAI(
-            api_key=api,
-            base_url=self.get_setting("endpoint")
-        )
+        client = self.get_client()
         top_p, temperature, presence_penalty, frequency_penalty = self.get_advanced_params()
         thinking_params = self.get_thinking_params()
         extra_body = self.get_extra_body()
@@ -961,7 +1020,6 @@ class OpenAIHandler(LLMHandler):
     
     def generate_text_stream(self, prompt: str, history: list[dict[str, str]] = [], system_prompt: list[str] = [], on_update: Callable[[str], Any] = lambda _: None, extra_args: list = []) -> str:
         self.running = True
-        from openai import OpenAI
 
         responses_api = self.uses_responses_api()
         native_tool_calling = self.get_setting("native_tool_calling", False, True)
@@ -981,13 +1039,7 @@ class OpenAIHandler(LLMHandler):
             messages = self.convert_history(history, system_prompt)
             if native_tool_calling:
                 messages = balance_native_tool_call_responses(messages)
-        api = self.get_setting("api")
-        if api == "":
-            api = "nokey"
-        client = OpenAI(
-            api_key=api,
-            base_url=self.get_setting("endpoint")
-        )
+        client = self.get_client()
         top_p, temperature, presence_penalty, frequency_penalty = self.get_advanced_params()
         thinking_params = self.get_thinking_params()
         extra_body = self.get_extra_body()
@@ -1031,8 +1083,7 @@ class OpenAIHandler(LLMHandler):
                 if tools_list:
                     kwargs["tools"] = tools_list
                 response = client.chat.completions.create(**kwargs)
-            full_message = ""
-            prev_message = ""
+            stream = StreamBuffer(on_update, extra_args)
             is_reasoning = False
             # Track ongoing tool calls
             tool_calls = {}
@@ -1047,34 +1098,22 @@ class OpenAIHandler(LLMHandler):
                 delta = chunk.choices[0].delta
                 if delta.content:
                     if is_reasoning:
-                        full_message += "</think>\n"
+                        stream.append("</think>\n")
                         is_reasoning = False
-                    full_message += delta.content
-                    args = (full_message.strip(), ) + tuple(extra_args)
-                    if len(full_message) - len(prev_message) > 1:
-                        on_update(*args)
-                        prev_message = full_message
+                    stream.append(delta.content)
                 elif hasattr(delta, "reasoning") and delta.reasoning is not None:
                     if not is_reasoning:
-                        full_message += "<think>"
+                        stream.append("<think>")
                     is_reasoning = True
-                    full_message += delta.reasoning
-                    if len(full_message) - len(prev_message) > 1:
-                        args = (full_message.strip(), ) + tuple(extra_args)
-                        on_update(*args)
-                        prev_message = full_message
+                    stream.append(delta.reasoning)
                 elif hasattr(delta, "reasoning_content") and delta.reasoning_content is not None:
                     if not is_reasoning:
-                        full_message += "<think>"
+                        stream.append("<think>")
                     is_reasoning = True
-                    full_message += delta.reasoning_content
-                    if len(full_message) - len(prev_message) > 1:
-                        args = (full_message.strip(), ) + tuple(extra_args)
-                        on_update(*args)
-                        prev_message = full_message
+                    stream.append(delta.reasoning_content)
                 elif hasattr(delta, "tool_calls") and delta.tool_calls is not None:
                     if is_reasoning:
-                        full_message += "</think>"
+                        stream.append("</think>")
                         is_reasoning = False
                     
                     for tc_delta in delta.tool_calls:
@@ -1088,6 +1127,8 @@ class OpenAIHandler(LLMHandler):
                         if tc_delta.function.arguments:
                             tool_calls[tc_delta.index]["arguments"] += tc_delta.function.arguments
             
+            stream.flush()
+            full_message = stream.text
             # After stream finishes, append any tool calls to full_message
             if tool_calls:
                 if is_reasoning:
@@ -1,10 +1,10 @@
 import os
 from datetime import datetime
 from typing import List, Optional
-import json
 import threading
 
 from .memory_handler import MemoryHandler
+from .memory_vectors import MemoryChunk, MemoryVectorIndex
 from ...handlers.embeddings.embedding import EmbeddingHandler
 from ...handlers.llm.llm import LLMHandler
 from ...handlers.rag.rag_handler import RAGHandler
@@ -14,16 +14,6 @@ from ...utility.pip import find_module, install_module
 from ...utility.strings import clean_prompt, remove_thinking_blocks
 
 
-class MemoryChunk:
-    """Represents a chunk of memory with metadata"""
-    def __init__(self, content: str, file_path: str, line_start: int, line_end: int, embedding=None):
-        self.content = content
-        self.file_path = file_path
-        self.line_start = line_start
-        self.line_end = line_end
-        self.embedding = embedding
-
-
 class AgenticMemoryHandler(MemoryHandler):
     key = "agentic_memory_handler"
 
@@ -36,6 +26,7 @@ class AgenticMemoryHandler(MemoryHandler):
         self.memory_file = os.path.join(self.memory_dir, "MEMORY.md")
         self.daily_notes_dir = os.path.join(self.memory_dir, "memory")
         self.index_dir = os.path.join(self.memory_dir, "llamaindex_index")
+        self.vector_index = MemoryVectorIndex(os.path.join(self.memory_dir, "vector_index"))
 
         self.embedding: Optional[EmbeddingHandler] = None
         self.llm: Optional[LLMHandler] = None
@@ -144,12 +135,14 @@ Recent conversations:
     def reset_memory(self):
         """Reset all memory files and index"""
         import shutil
-        if os.path.exists(self.memory_dir):
-            shutil.rmtree(self.memory_dir)
-        self._ensure_directories()
-        self.chunks = []
-        self.memory_index = None
-        self._index_loaded = False
+        with self._lock:
+            if os.path.exists(self.memory_dir):
+                shutil.rmtree(self.memory_dir)
+            self._ensure_directories()
+            self.chunks = []
+            self.vector_index = MemoryVectorIndex(os.path.join(self.memory_dir, "vector_index"))
+            self.memory_index = None
+            self._index_loaded = False
 
     def _get_daily_note_path(self) -> str:
         """Get the path for today's daily note"""
@@ -171,9 +164,9 @@ Recent conversations:
 
             # Split on headers
             if line.startswith('#'):
-                # Save previous chunk if it exists
-                if current_chunk_lines:
-                    chunk_content = '\n'.join(current_chunk_lines)
+                # Save previous chunk if it exists, the header starts the next one
+                if len(current_chunk_lines) > 1:
+                    chunk_content = '\n'.join(current_chunk_lines[:-1])
                     chunks.append(MemoryChunk(
                         content=chunk_content,
                         file_path=file_path,
@@ -209,22 +202,25 @@ Recent conversations:
 
         return chunks
 
-    def _get_memory_documents(self) -> list[str]:
-        """Get list of memory files as documents for RAG indexing"""
-        documents = []
+    def _get_memory_files(self) -> list[str]:
+        """Get the paths of MEMORY.md and the daily notes"""
+        files = []
 
         # Process MEMORY.md
         if os.path.exists(self.memory_file):
-            documents.append(f"file:{self.memory_file}")
+            files.append(self.memory_file)
 
         # Process daily notes
         if os.path.exists(self.daily_notes_dir):
             for filename in os.listdir(self.daily_notes_dir):
                 if filename.endswith('.md'):
-                    file_path = os.path.join(self.daily_notes_dir, filename)
-                    documents.append(f"file:{file_path}")
+                    files.append(os.path.join(self.daily_notes_dir, filename))
 
-        return documents
+        return files
+
+    def _get_memory_documents(self) -> list[str]:
+        """Get list of memory files as documents for RAG indexing"""
+        return [f"file:{file_path}" for file_path in self._get_memory_files()]
 
     def _load_index(self):
         """Load the memory index using RAG handler"""
@@ -256,67 +252,71 @@ Recent conversations:
             if self._index_loaded:
                 return
 
-            self.chunks = []
+            files = self._get_memory_files()
             chunk_size = int(self.get_setting("chunk_size", return_value=500))
+            if not self.embedding:
+                self.chunks = [chunk for chunks in self._chunk_files(files, chunk_size).values() for chunk in chunks]
+                self._index_loaded = True
+                return
 
-            # Process MEMORY.md
-            if os.path.exists(self.memory_file):
-                with open(self.memory_file, 'r') as f:
-                    content = f.read()
-                if content.strip():
-                    self.chunks.extend(self._split_markdown_into_chunks(content, self.memory_file, chunk_size))
-
-            # Process daily notes
-            if os.path.exists(self.daily_notes_dir):
-                for filename in os.listdir(self.daily_notes_dir):
-                    if filename.endswith('.md'):
-                        file_path = os.path.join(self.daily_notes_dir, filename)
-                        with open(file_path, 'r') as f:
-                            content = f.read()
-                        if content.strip():
-                            self.chunks.extend(self._split_markdown_into_chunks(content, file_path, chunk_size))
-
-            # Generate embeddings if embedding handler is available
-            if self.embedding and self.chunks:
-                self._generate_embeddings()
-                self._save_index_simple()
+            try:
+                model_id = self.embedding.get_model_id()
+                if not self.vector_index.load() or not self.vector_index.matches(model_id, chunk_size):
+                    self.vector_index.reset(model_id, chunk_size)
+                # Only the files changed since the last run are split and embedded again
+                changed = self.vector_index.changed_files(files)
+                if changed:
+                    self.vector_index.update(self._chunk_files(changed, chunk_size), self.embedding.get_embedding)
+                self.chunks = self.vector_index.chunks
+                # Replaced by the vector index, embeddings were stored as JSON lists
+                legacy_index = os.path.join(self.memory_dir, "index.json")
+                if os.path.exists(legacy_index):
+                    os.remove(legacy_index)
+            except Exception as e:
+                print(f"Error loading simple index: {e}")
 
             self._index_loaded = True
 
-    def _save_index_simple(self):
-        """Save the memory index to disk (fallback for simple implementation)"""
-        try:
-            index_file = os.path.join(self.memory_dir, "index.json")
-            index_data = {
-                'chunks': [],
-                'version': 1
-            }
-
-            for chunk in self.chunks:
-                index_data['chunks'].append({
-                    'content': chunk.content,
-                    'file_path': chunk.file_path,
-                    'line_start': chunk.line_start,
-                    'line_end': chunk.line_end,
-                    'embedding': chunk.embedding
-                })
-
-            os.makedirs(self.memory_dir, exist_ok=True)
-            with open(index_file, 'w') as f:
-                json.dump(index_data, f)
-        except Exception as e:
-            print(f"Error saving simple index: {e}")
+    def _chunk_files(self, file_paths: list[str], chunk_size: int) -> dict[str, List[MemoryChunk]]:
+        """Split memory files into chunks, deleted files have no chunks"""
+        chunks = {}
+        for file_path in file_paths:
+            chunks[file_path] = []
+            if not os.path.exists(file_path):
+                continue
+            with open(file_path, 'r') as f:
+                content = f.read()
+            if content.strip():
+                chunks[file_path] = [chunk for chunk in self._split_markdown_into_chunks(content, file_path, chunk_size)
+                                     if chunk.content.strip()]
+        return chunks
 
-    def _generate_embeddings(self):
-        """Generate embeddings for all chunks"""
-        if not self.embedding:
-            return
+    def _update_index(self, file_paths: list[str]):
+        """Update the memory index after the given files were written
 
-        texts = [chunk.content for chunk in self.chunks]
-        embeddings = self.embedding.get_embedding(texts)
+        Args:
+            file_paths: written files, the ones that are not indexed are ignored
+        """
+        indexed = {os.path.normpath(path) for path in self._get_memory_files()}
+        file_paths = [os.path.normpath(path) for path in file_paths]
+        file_paths = [path for path in file_paths if path in indexed]
+        if not file_paths:
+            return
+        if self.memory_index is not None and self.rag:
+            # Attached documents are cached by content, only the written files are embedded again
+            self._rebuild_index()
+        elif self._index_loaded and self.embedding:
+            self._update_index_simple(file_paths)
 
-        for i, chunk in enumerate(self.chunks):
-            chunk.embedding = embeddings[i].tolist() if hasattr(embeddings[i], 'tolist') else list(embeddings[i])
+    def _update_index_simple(self, file_paths: list[str]):
+        """Re-index the chunks of the given files in the vector index"""
+        chunk_size = int(self.get_setting("chunk_size", return_value=500))
+        try:
+            with self._lock:
+                self.vector_index.update(self._chunk_files(file_paths, chunk_size), self.embedding.get_embedding)
+                self.chunks = self.vector_index.chunks
+        except Exception as e:
+            print(f"Error updating memory index: {e}")
 
     def _save_index(self):
         """Save the memory index to disk"""
@@ -328,8 +328,7 @@ Recent conversations:
             except Exception as e:
                 print(f"Error saving memory index, falling back to simple: {e}")
 
-        # Fallback to simple implementation
-        self._save_index_simple()
+        # The simple index is written to disk as it changes
 
     def get_context(self, prompt: str, history: list[dict[str, str]]) -> list[str]:
         """Get relevant context from memory for the given prompt"""
@@ -401,8 +400,7 @@ Recent conversations:
                 f.write(entry)
 
             # Update memory index if available
-            if self.memory_index is not None and self.rag:
-                self._update_llamaindex(daily_note_path)
+            self._update_index([daily_note_path])
         except Exception as e:
             print(f"Error writing to daily note: {e}")
 
@@ -425,22 +423,10 @@ Recent conversations:
                 f.write(entry)
 
             # Update memory index if available
-            if self.memory_index is not None and self.rag:
-                self._update_llamaindex(interactions_file)
+            self._update_index([interactions_file])
         except Exception as e:
             print(f"Error writing to interactions file: {e}")
 
-    def _update_llamaindex(self, file_path: str):
-        """Update memory index with a new or modified file"""
-        try:
-            if not os.path.exists(file_path):
-                return
-
-            # Rebuild index with updated files
-            self._rebuild_index()
-        except Exception as e:
-            print(f"Error updating memory index: {e}")
-
     def _rebuild_index(self):
         """Rebuild the memory index from all memory files"""
         try:
@@ -529,8 +515,8 @@ Recent conversations:
             with open(self.memory_file, 'a') as f:
                 f.write(entry)
 
-            # Rebuild index
-            self._rebuild_index()
+            # Update index
+            self._update_index([self.memory_file])
         except Exception as e:
             print(f"Error in LLM memory consolidation: {e}")
 
@@ -582,8 +568,8 @@ Recent conversations:
             with open(self.memory_file, 'a') as f:
                 f.write(entry)
 
-            # Rebuild index
-            self._rebuild_index()
+            # Update index
+            self._update_index([self.memory_file])
         except Exception as e:
             print(f"Error in RAG memory consolidation: {e}")
 
@@ -623,33 +609,13 @@ Recent conversations:
 
         # Generate query embedding
         query_embedding = self.embedding.get_embedding([query])[0]
-        if hasattr(query_embedding, 'tolist'):
-            query_embedding = query_embedding.tolist()
-
-        # Calculate cosine similarity
-        import numpy as np
-        similarities = []
 
-        for chunk in self.chunks:
-            if chunk.embedding is None:
-                continue
-            chunk_emb = np.array(chunk.embedding)
-            query_emb = np.array(query_embedding)
-
-            # Cosine similarity
-            dot_product = np.dot(chunk_emb, query_emb)
-            norm_chunk = np.linalg.norm(chunk_emb)
-            norm_query = np.linalg.norm(query_emb)
-
-            if norm_chunk > 0 and norm_query > 0:
-                similarity = dot_product / (norm_chunk * norm_query)
-                similarities.append((chunk, similarity))
-
-        # Sort by similarity
-        similarities.sort(key=lambda x: x[1], reverse=True)
+        # Updates swap the vectors and rows of the index
+        with self._lock:
+            matches = self.vector_index.search(query_embedding, max_results)
 
         results = []
-        for chunk, similarity in similarities[:max_results]:
+        for chunk, similarity in matches:
             if similarity >= threshold:
                 # Format result with file info
                 rel_path = os.path.relpath(chunk.file_path, self.memory_dir)
@@ -733,8 +699,8 @@ Recent conversations:
             with open(file_path, 'w') as f:
                 f.write(content)
 
-            # Rebuild index to include new content
-            self._rebuild_index()
+            # Update index to include new content
+            self._update_index([file_path])
 
             return f"Successfully wrote to {path_display}"
         except Exception as e:
@@ -765,8 +731,8 @@ Recent conversations:
                 if not content.endswith('\n'):
                     f.write('\n')
 
-            # Rebuild index to include new content
-            self._rebuild_index()
+            # Update index to include new content
+            self._update_index([file_path])
 
             return f"Successfully appended to {path_display}"
         except Exception as e:
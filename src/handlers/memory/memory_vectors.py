@@ -0,0 +1,306 @@
+"""Vector store for the memory notes of AgenticMemoryHandler.
+
+Embeddings live in one contiguous float32 matrix, memory mapped from
+``vectors.f32``, with their norms precomputed, so a search is a single
+matrix-vector product followed by an argpartition top-k. Chunk metadata is
+kept apart from the vectors, one JSON line per chunk in ``chunks.jsonl``.
+Adding chunks appends their lines, writes a new vectors file with the new
+rows and swaps it in, so a mapped file is never truncated under a reader,
+and then bumps the count in ``index.json``, which is what readers trust.
+
+Rows are tracked per source file by line range and content hash. When a
+file changes, `MemoryVectorIndex.update` keeps the rows of the chunks that
+did not change, reuses the vectors of chunks that only moved, and embeds
+the rest; rows of chunks that are gone are marked dead and dropped by a
+compaction once they are a sizeable part of the index.
+"""
+
+import hashlib
+import json
+import os
+from typing import Callable, List, Optional
+
+import numpy as np
+
+
+class MemoryChunk:
+    """Represents a chunk of memory with metadata"""
+    def __init__(self, content: str, file_path: str, line_start: int, line_end: int, embedding=None):
+        self.content = content
+        self.file_path = file_path
+        self.line_start = line_start
+        self.line_end = line_end
+        self.embedding = embedding
+
+    def to_dict(self) -> dict:
+        return {
+            "content": self.content,
+            "file_path": self.file_path,
+            "line_start": self.line_start,
+            "line_end": self.line_end,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "MemoryChunk":
+        return cls(data["content"], data["file_path"], data["line_start"], data["line_end"])
+
+    @property
+    def content_hash(self) -> str:
+        """Hash of the content, ignoring surrounding blank lines"""
+        return hashlib.sha256(self.content.strip().encode("utf-8", "surrogatepass")).hexdigest()
+
+
+class MemoryVectorIndex:
+    """Chunks and their embeddings, persisted in a directory
+
+    Args:
+        path: directory of the index
+    """
+    VERSION = 2
+    # Dead rows are dropped once they are more than a quarter of the index
+    COMPACT_MIN_ROWS = 64
+
+    def __init__(self, path: str):
+        self.path = path
+        self.chunks: List[MemoryChunk] = []
+        self.model_id = ""
+        self.chunk_size = 0
+        self.sources: dict[str, list[int]] = {}
+        self._rows: List[Optional[MemoryChunk]] = []
+        self._vectors: Optional[np.ndarray] = None
+        self._norms: Optional[np.ndarray] = None
+        self._dead: Optional[np.ndarray] = None
+
+    @property
+    def _meta_path(self) -> str:
+        return os.path.join(self.path, "index.json")
+
+    @property
+    def _chunks_path(self) -> str:
+        return os.path.join(self.path, "chunks.jsonl")
+
+    @property
+    def _vectors_path(self) -> str:
+        return os.path.join(self.path, "vectors.f32")
+
+    @property
+    def _dim(self) -> int:
+        return self._vectors.shape[1] if self._vectors is not None else 0
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    @staticmethod
+    def source_stat(path: str) -> list[int] | None:
+        """Return [size, mtime in ns] of a source file, None if missing"""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return [st.st_size, st.st_mtime_ns]
+
+    def matches(self, model_id: str, chunk_size: int) -> bool:
+        """Return if the index was built with this embedding model and chunk size"""
+        return model_id == self.model_id and chunk_size == self.chunk_size
+
+    def changed_files(self, files: list[str]) -> list[str]:
+        """Return the files that changed since they were indexed, deleted ones included"""
+        changed = [path for path in files if self.sources.get(path) != self.source_stat(path)]
+        current = set(files)
+        return changed + [path for path in self.sources if path not in current]
+
+    def load(self) -> bool:
+        """Load the index from disk, return False if there is none"""
+        try:
+            with open(self._meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("version") != self.VERSION:
+                return False
+            count, dim = meta["count"], meta["dim"]
+            rows = []
+            with open(self._chunks_path, "r+b") as f:
+                while len(rows) < count:
+                    line = f.readline()
+                    if not line:
+                        return False
+                    rows.append(MemoryChunk.from_dict(json.loads(line.decode("utf-8"))))
+                # Drop lines of an interrupted append
+                f.truncate(f.tell())
+            for row in meta.get("dead", []):
+                rows[row] = None
+        except (OSError, ValueError, KeyError, IndexError):
+            return False
+        self._rows = rows
+        self.model_id = meta["model_id"]
+        self.chunk_size = meta.get("chunk_size", 0)
+        self.sources = meta.get("sources", {})
+        self._open_vectors(count, dim)
+        return True
+
+    def reset(self, model_id: str, chunk_size: int):
+        """Empty the index, for chunks embedded by model_id with chunk_size"""
+        os.makedirs(self.path, exist_ok=True)
+        self._vectors = None
+        self._norms = None
+        self._write_vectors()
+        open(self._chunks_path, "wb").close()
+        self._rows = []
+        self.model_id = model_id
+        self.chunk_size = chunk_size
+        self.sources = {}
+        self._write_meta()
+        self._open_vectors(0, 0)
+
+    def _open_vectors(self, count: int, dim: int, norms: Optional[np.ndarray] = None):
+        self._dead = np.array([row for row, chunk in enumerate(self._rows) if chunk is None], dtype=np.int64)
+        self.chunks = [chunk for chunk in self._rows if chunk is not None]
+        if count == 0 or dim == 0:
+            self._vectors = None
+            self._norms = None
+            return
+        # Rows past count may be left over from an interrupted append
+        self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(count, dim))
+        self._norms = norms if norms is not None else np.linalg.norm(self._vectors, axis=1)
+
+    def _write_vectors(self, *blocks: np.ndarray):
+        """Write the vectors file anew and swap it in, mapped copies stay valid"""
+        tmp_path = self._vectors_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            for block in blocks:
+                np.ascontiguousarray(block, dtype=np.float32).tofile(f)
+        os.replace(tmp_path, self._vectors_path)
+
+    def _write_meta(self, dim: Optional[int] = None):
+        tmp_path = self._meta_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": self.VERSION,
+                "model_id": self.model_id,
+                "chunk_size": self.chunk_size,
+                "count": len(self._rows),
+                "dim": self._dim if dim is None else dim,
+                "sources": self.sources,
+                "dead": [row for row, chunk in enumerate(self._rows) if chunk is None],
+            }, f)
+        os.replace(tmp_path, self._meta_path)
+
+    def update(self, chunks_by_file: dict[str, List[MemoryChunk]], embed: Callable[[list[str]], np.ndarray]) -> int:
+        """Replace the chunks of some files
+
+        Chunks with the same lines and content as an indexed one keep their
+        row, chunks whose content is indexed at other lines reuse its vector,
+        only the others are embedded, in one call.
+
+        Args:
+            chunks_by_file: the new chunks of every changed file, an empty
+                list for deleted files
+            embed: returns the embeddings of a list of texts
+
+        Returns:
+            int: number of chunks embedded
+        """
+        indexed, by_hash = {}, {}
+        for row, chunk in enumerate(self._rows):
+            if chunk is not None and chunk.file_path in chunks_by_file:
+                content_hash = chunk.content_hash
+                indexed[(chunk.file_path, content_hash, chunk.line_start, chunk.line_end)] = row
+                by_hash.setdefault(content_hash, row)
+
+        kept = set()
+        new_chunks, reused = [], []
+        for path, chunks in chunks_by_file.items():
+            for chunk in chunks:
+                if not chunk.content.strip():
+                    continue
+                content_hash = chunk.content_hash
+                row = indexed.get((path, content_hash, chunk.line_start, chunk.line_end))
+                if row is not None and row not in kept:
+                    kept.add(row)
+                    continue
+                new_chunks.append(chunk)
+                reused.append(by_hash.get(content_hash))
+
+        missing = [i for i, row in enumerate(reused) if row is None]
+        vectors = None
+        if missing:
+            embeddings = np.asarray(embed([new_chunks[i].content for i in missing]), dtype=np.float32)
+            embeddings = embeddings.reshape(len(missing), -1)
+            if self._vectors is not None and embeddings.shape[1] != self._dim:
+                raise ValueError("Embedding size does not match the index")
+            vectors = np.empty((len(new_chunks), embeddings.shape[1]), dtype=np.float32)
+            vectors[missing] = embeddings
+        elif new_chunks:
+            vectors = np.empty((len(new_chunks), self._dim), dtype=np.float32)
+        for i, row in enumerate(reused):
+            if row is not None:
+                vectors[i] = self._vectors[row]
+
+        for row in indexed.values():
+            if row not in kept:
+                self._rows[row] = None
+        for path in chunks_by_file:
+            stat = self.source_stat(path)
+            if stat is None:
+                self.sources.pop(path, None)
+            else:
+                self.sources[path] = stat
+        if new_chunks:
+            self._append_rows(new_chunks, vectors)
+        else:
+            self._write_meta()
+            self._open_vectors(len(self._rows), self._dim, self._norms)
+
+        dead = len(self._rows) - len(self.chunks)
+        if dead > max(self.COMPACT_MIN_ROWS, len(self._rows) // 4):
+            self._compact()
+        return len(missing)
+
+    def _append_rows(self, chunks: List[MemoryChunk], vectors: np.ndarray):
+        os.makedirs(self.path, exist_ok=True)
+        dim = vectors.shape[1]
+        # Rows of an interrupted append past the mapped ones are dropped
+        self._write_vectors(*(block for block in (self._vectors, vectors) if block is not None))
+        with open(self._chunks_path, "a", encoding="utf-8") as f:
+            for chunk in chunks:
+                f.write(json.dumps(chunk.to_dict()) + "\n")
+        self._rows.extend(chunks)
+        self._write_meta(dim)
+        norms = np.linalg.norm(vectors, axis=1)
+        if self._norms is not None:
+            norms = np.concatenate([self._norms, norms])
+        self._open_vectors(len(self._rows), dim, norms)
+
+    def _compact(self):
+        """Rewrite the index without its dead rows"""
+        live = np.array([row for row, chunk in enumerate(self._rows) if chunk is not None], dtype=np.int64)
+        dim = self._dim
+        vectors = np.ascontiguousarray(self._vectors[live]) if len(live) else np.zeros((0, dim), dtype=np.float32)
+        norms = self._norms[live] if len(live) else None
+        chunks = [self._rows[row] for row in live]
+        # Without the metadata a crash halfway leaves no index, rebuilt on the next load
+        os.remove(self._meta_path)
+        self._vectors = None
+        self._write_vectors(vectors)
+        with open(self._chunks_path, "w", encoding="utf-8") as f:
+            for chunk in chunks:
+                f.write(json.dumps(chunk.to_dict()) + "\n")
+        self._rows = chunks
+        self._write_meta(dim)
+        self._open_vectors(len(chunks), dim, norms)
+
+    def search(self, query_embedding, k: int) -> list[tuple[MemoryChunk, float]]:
+        """Return the k chunks most similar to the query, by cosine similarity"""
+        if self._vectors is None or k <= 0 or not self.chunks:
+            return []
+        query = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+        query_norm = np.linalg.norm(query)
+        if query_norm == 0:
+            return []
+        with np.errstate(divide="ignore", invalid="ignore"):
+            similarities = (self._vectors @ query) / (self._norms * query_norm)
+        similarities = np.nan_to_num(similarities, nan=-1.0, posinf=-1.0, neginf=-1.0)
+        similarities[self._dead] = -np.inf
+        k = min(k, len(self.chunks))
+        top = np.argpartition(-similarities, k - 1)[:k]
+        top = top[np.argsort(-similarities[top])]
+        return [(self._rows[i], float(similarities[i])) for i in top]
@@ -0,0 +1,146 @@
+"""On-disk cache of parsed and embedded attached documents.
+
+Files attached to chats are indexed on the fly by `build_index`, which used
+to parse and embed them again after every restart or chat switch. Entries
+here hold the parsed documents, their nodes, the node embeddings and the
+token count of a file. They are keyed by the file content hash, the
+embedding model and the chunk size, so every chat attaching the same file
+shares one entry, and a file that changed gets a new one. The least
+recently used entries are removed once the cache grows past its size cap.
+
+Entries are compressed npz files: the vectors, and the documents and nodes
+as UTF-8 JSON. The text of a node that is a slice of its document is not
+stored again, only its position in the document.
+"""
+
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+
+
+class DocumentCache:
+    """Attached documents cache stored in a directory, one file per entry
+
+    Args:
+        path: cache directory
+        max_bytes: size of the cache over which old entries are removed
+    """
+    VERSION = 2
+
+    def __init__(self, path: str, max_bytes: int = 512 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._sizes = None
+
+    @classmethod
+    def file_key(cls, path: str, model_id: str, chunk_size: int) -> str | None:
+        """Key of the entry of a file, None if the file can't be read"""
+        digest = hashlib.sha256(f"{cls.VERSION}\0{model_id}\0{chunk_size}\0".encode())
+        try:
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(block)
+        except OSError:
+            return None
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.path, key + ".npz")
+
+    def _load_sizes(self) -> dict[str, int]:
+        if self._sizes is None:
+            os.makedirs(self.path, exist_ok=True)
+            self._sizes = {}
+            for entry in os.scandir(self.path):
+                if entry.name.endswith(".npz"):
+                    self._sizes[entry.name[:-4]] = entry.stat().st_size
+        return self._sizes
+
+    def get(self, key: str) -> tuple[list, list, int] | None:
+        """Return (documents, nodes, token count) of an entry, None if missing
+
+        Nodes come back with their embedding set.
+        """
+        from llama_index.core.storage.docstore.utils import json_to_doc
+
+        path = self._entry_path(key)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                vectors = data["vectors"]
+                meta = json.loads(data["meta"].tobytes().decode("utf-8"))
+            # The mtime orders entries for eviction
+            os.utime(path)
+        except (OSError, ValueError, KeyError):
+            return None
+        documents = [json_to_doc(doc) for doc in meta["documents"]]
+        nodes = []
+        for node_json in meta["nodes"]:
+            span = node_json.pop("text_span", None)
+            if span is not None:
+                doc_index, start, end = span
+                node_json["__data__"]["text"] = documents[doc_index].text[start:end]
+            nodes.append(json_to_doc(node_json))
+        for node, vector in zip(nodes, vectors):
+            node.embedding = vector.tolist()
+        return documents, nodes, meta["tokens"]
+
+    def put(self, key: str, documents: list, nodes: list, tokens: int):
+        """Store the documents and the embedded nodes of a file"""
+        from llama_index.core.storage.docstore.utils import doc_to_json
+
+        vectors = np.array([node.embedding for node in nodes], dtype=np.float32)
+        document_indexes = {document.id_: i for i, document in enumerate(documents)}
+        serialized_nodes = []
+        for node in nodes:
+            data = doc_to_json(node)
+            fields = data["__data__"]
+            # Stored once, in vectors
+            fields["embedding"] = None
+            # Stored once, in the document the node was split from
+            doc_index = document_indexes.get(node.ref_doc_id)
+            start, end = node.start_char_idx, node.end_char_idx
+            if (doc_index is not None and start is not None and end is not None
+                    and isinstance(fields.get("text"), str)
+                    and documents[doc_index].text[start:end] == fields["text"]):
+                fields["text"] = ""
+                data["text_span"] = [doc_index, start, end]
+            serialized_nodes.append(data)
+        meta = {
+            "documents": [doc_to_json(document) for document in documents],
+            "nodes": serialized_nodes,
+            "tokens": tokens,
+        }
+        with self._lock:
+            sizes = self._load_sizes()
+            path = self._entry_path(key)
+            tmp_path = path + ".tmp"
+            meta_bytes = np.frombuffer(json.dumps(meta).encode("utf-8"), dtype=np.uint8)
+            with open(tmp_path, "wb") as f:
+                np.savez_compressed(f, vectors=vectors, meta=meta_bytes)
+            os.replace(tmp_path, path)
+            sizes[key] = os.path.getsize(path)
+            if sum(sizes.values()) > self.max_bytes:
+                self._evict(sizes, keep=key)
+
+    def _evict(self, sizes: dict[str, int], keep: str):
+        """Remove the least recently used entries down to 90% of max_bytes"""
+        def last_used(key):
+            try:
+                return os.path.getmtime(self._entry_path(key))
+            except OSError:
+                return 0
+        total = sum(sizes.values())
+        for key in sorted(sizes, key=last_used):
+            if total <= self.max_bytes * 0.9:
+                break
+            if key == keep:
+                continue
+            try:
+                os.remove(self._entry_path(key))
+            except OSError:
+                pass
+            total -= sizes.pop(key)
@@ -0,0 +1,185 @@
+"""Bookkeeping for incremental updates of the document index.
+
+`DocumentManifest` remembers, for every indexed file, its size, mtime and
+content hash along with the ids of the documents and nodes it produced, so
+that an update only re-embeds the files that were added or changed and only
+drops the nodes of changed or deleted files. `FolderWatcher` polls the
+indexed folders, less and less often while nothing changes, and calls back,
+debounced, once files stopped changing.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Callable
+
+
+class DocumentManifest:
+    """Indexed files of an index, stored next to it
+
+    Args:
+        data_path: directory where the index is persisted
+    """
+    FILENAME = "manifest.json"
+    VERSION = 1
+
+    def __init__(self, data_path: str):
+        self.path = os.path.join(data_path, self.FILENAME)
+        self.files: dict[str, dict] = {}
+
+    @classmethod
+    def load(cls, data_path: str) -> "DocumentManifest | None":
+        """Load the manifest of an index, None if it has none or it is unreadable"""
+        manifest = cls(data_path)
+        try:
+            with open(manifest.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != cls.VERSION:
+            return None
+        manifest.files = data.get("files", {})
+        return manifest
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": self.VERSION, "files": self.files}, f)
+        os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def stat(path: str) -> tuple[int, int] | None:
+        """Return (size, mtime in ns) of a file, None if it can't be read"""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_size, st.st_mtime_ns
+
+    @staticmethod
+    def file_hash(path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def set_file(self, path: str, doc_ids: list[str], node_ids: list[str], file_hash: str | None = None):
+        """Record an indexed file with the ids of what it produced"""
+        size, mtime = self.stat(path) or (0, 0)
+        self.files[path] = {
+            "size": size,
+            "mtime": mtime,
+            "hash": file_hash if file_hash is not None else self.file_hash(path),
+            "doc_ids": list(doc_ids),
+            "node_ids": list(node_ids),
+        }
+
+    def remove_file(self, path: str) -> dict | None:
+        return self.files.pop(path, None)
+
+    def diff(self, files: list[str]) -> tuple[list[str], list[str], list[str]]:
+        """Compare the manifest with the files currently in the indexed folders
+
+        Files whose size and mtime did not change are not read. Files that
+        were touched without changing their content only get their stat
+        updated in the manifest.
+
+        Returns:
+            tuple: (added, changed, deleted) paths
+        """
+        added, changed = [], []
+        for path in files:
+            entry = self.files.get(path)
+            if entry is None:
+                added.append(path)
+                continue
+            stat = self.stat(path)
+            if stat is None or stat == (entry["size"], entry["mtime"]):
+                continue
+            try:
+                file_hash = self.file_hash(path)
+            except OSError:
+                continue
+            if file_hash == entry["hash"]:
+                entry["size"], entry["mtime"] = stat
+            else:
+                changed.append(path)
+        current = set(files)
+        deleted = [path for path in self.files if path not in current]
+        return added, changed, deleted
+
+
+class FolderWatcher:
+    """Poll a set of files and report changes once they settle
+
+    Every poll lists and stats the whole tree, so the delay between polls
+    doubles while nothing changes, up to max_interval, and drops back to
+    interval as soon as a change is seen.
+
+    Args:
+        list_files: returns the files to watch, called at every poll
+        on_change: called from the watcher thread after files changed and
+            stayed unchanged for one more poll. If it returns False the change
+            is reported again at the next poll.
+        is_enabled: polls are skipped while it returns False
+        interval: seconds between polls while files are changing
+        max_interval: seconds between polls once files are idle
+    """
+
+    def __init__(self, list_files: Callable[[], list[str]], on_change: Callable[[], bool],
+                 is_enabled: Callable[[], bool] = lambda: True, interval: float = 5.0,
+                 max_interval: float = 120.0):
+        self.list_files = list_files
+        self.on_change = on_change
+        self.is_enabled = is_enabled
+        self.interval = interval
+        self.max_interval = max(interval, max_interval)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        # A fresh event, a thread stopped just before keeps seeing its own set
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(self._stop,), daemon=True, name="newelle-rag-watcher")
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread = None
+
+    def _snapshot(self) -> dict[str, tuple[int, int] | None]:
+        return {path: DocumentManifest.stat(path) for path in self.list_files()}
+
+    def _run(self, stop: threading.Event):
+        # Starting from an empty baseline reports once at startup, picking up
+        # files changed while the watcher was not running
+        baseline = {}
+        previous = None
+        interval = self.interval
+        while not stop.wait(interval):
+            if not self.is_enabled():
+                continue
+            try:
+                snapshot = self._snapshot()
+            except Exception as e:
+                print(f"Error watching documents: {e}")
+                continue
+            if snapshot != previous:
+                # Still changing, wait for the next poll
+                previous = snapshot
+                interval = self.interval
+                continue
+            if snapshot != baseline:
+                try:
+                    handled = self.on_change() is not False
+                except Exception as e:
+                    print(f"Error updating the index: {e}")
+                    handled = True
+                if handled:
+                    baseline = snapshot
+                continue
+            interval = min(interval * 2, self.max_interval)
@@ -13,20 +13,41 @@ from ...handlers.llm import LLMHandler
 from ...handlers.embeddings.embedding import EmbeddingHandler 
 from ...handlers import ExtraSettings 
 from .rag_handler import RAGHandler, RAGIndex 
+from .document_manifest import DocumentManifest, FolderWatcher
+from .document_cache import DocumentCache
+from . import vector_index
 from ...utility.pip import find_module, install_module
 from ...tools import Tool, create_io_tool
 import os
 
 class LlamaIndexHanlder(RAGHandler):
     key = "llamaindex"
+    # Share of indexing_status taken by each stage of create_index
+    INDEXING_STAGES = {
+        "loading": (0.0, 0.3),
+        "splitting": (0.3, 0.4),
+        "embedding": (0.4, 0.95),
+        "storing": (0.95, 1.0),
+    }
+    LOADER_WORKERS = min(8, os.cpu_count() or 1)
+
     def __init__(self, settings, path):
         super().__init__(settings, path)
         self.data_path = os.path.join(os.path.dirname(self.path), "rag_cache")
         self.indexing_status = 0
+        self.indexing_stage = ""
         self.indexing = False
         self.loading_thread = None
         self.index = None
         self.loaded_index = ""
+        self.retriever = None
+        self.bm25_retriever = None
+        self.vector_config = dict(vector_index.LEGACY_CONFIG)
+        self.similarity_top_k = 0
+        self.document_cache = None
+        # Reentrant, update_index rebuilds through create_index while holding it
+        self.index_lock = threading.RLock()
+        self.watcher = FolderWatcher(self._list_watched_files, self._on_documents_changed, self._watcher_enabled)
    
     def get_subdirectories(self):
         r = []
@@ -38,6 +59,11 @@ class LlamaIndexHanlder(RAGHandler):
     def get_extra_settings(self) -> list:
         r = [
             ExtraSettings.ScaleSetting("chunk_size", "Chunk Size", "Split text in chunks of the given size (in tokens). Requires a reindex", 512, 64, 2048, 0), 
+            ExtraSettings.ScaleSetting("embedding_batch_size", "Embedding Batch Size", "Number of chunks sent to the embedding model at once while indexing", 64, 1, 512, 0),
+            ExtraSettings.ComboSetting("index_type", "Index Type", "Vector index used to search the documents. Automatic picks an exact index for small collections and an approximate one for large ones. Requires a reindex",
+                [("Automatic", "auto"), ("Flat (exact)", "flat"), ("HNSW", "hnsw"), ("IVF", "ivf")], "auto"),
+            ExtraSettings.ComboSetting("quantization", "Vector Compression", "Store compressed vectors to use less memory, at the cost of some accuracy. Requires a reindex",
+                [("None", "none"), ("8-bit scalar", "sq8"), ("Product quantization", "pq")], "none"),
             ExtraSettings.ButtonSetting("update_index", "Update Index", "Update the index with new/modified files instead of reindexing everything", self.update_index_button_pressed, label="Update"),
             ExtraSettings.ScaleSetting("return_documents", "Documents to return", "Maximum number of documents to return", 3,1,20, 0), 
             ExtraSettings.ScaleSetting("similarity_threshold", "Similarity of the document to be returned", "Set the percentage similarity of a document to get returned", 0.1,0,1, 2), 
@@ -46,6 +72,7 @@ class LlamaIndexHanlder(RAGHandler):
             ExtraSettings.ToggleSetting("use_llm", "Secondary LLM", "Use the secondary LLM to improve retrivial", False),
             ExtraSettings.ToggleSetting("subdirectory_on", "Index Only a subdirectory", "Choose only a subdirectory to index. If you already have indexed it, you don't need to re-index", False, update_settings=True),
             ExtraSettings.ToggleSetting("use_bm25", "Use BM25", "Enable hybrid search with BM25", True),
+            ExtraSettings.ToggleSetting("auto_update", "Automatic Update", "Watch the indexed folders and update the index when files are added, edited or deleted", True),
         ]
         if self.get_setting("subdirectory_on", False, False):
             r += [
@@ -74,7 +101,7 @@ class LlamaIndexHanlder(RAGHandler):
         """
         return ExtraSettings.DownloadSetting("index", 
                                              _("Index your documents"), 
-                                             _("Index all the documents in your document folder. You have to run this operation every time you change document analyzer or change embedding model. If you add/delete/edit documents, run the refresh."), 
+                                             _("Index all the documents in your document folders. Rebuild the index after changing the document analyzer or the embedding model. Added, edited and deleted documents are picked up automatically when Automatic Update is enabled, otherwise use the refresh button."), 
                                              self.index_exists(), 
                                              self.index_button_pressed, lambda _: self.indexing_status, download_icon="text-x-generic",
                                              refresh=self.update_index_button_pressed)
@@ -101,32 +128,78 @@ class LlamaIndexHanlder(RAGHandler):
     def get_supported_files_reading(self) -> list:
         return self.get_supported_files() + ["plaintext"]
 
-    def _load_documents_from_folder(self, folder: str, exclude_hidden: bool) -> list:
+    def _list_folder_files(self, folder: str, exclude_hidden: bool) -> list[str]:
         from llama_index.core import SimpleDirectoryReader
 
         if not os.path.isdir(folder):
             return []
 
         try:
-            return SimpleDirectoryReader(
+            return [str(path) for path in SimpleDirectoryReader(
                 folder,
                 recursive=True,
                 required_exts=self.get_supported_formats(),
                 exclude_hidden=exclude_hidden,
-                filename_as_id=True,
-            ).load_data()
+            ).input_files]
         except Exception as e:
             print(f"Skipping folder {folder}: {e}")
             return []
 
-    def _collect_documents(self, documents_path: str) -> list:
-        documents = self._load_documents_from_folder(documents_path, exclude_hidden=False)
-        custom_folders = self.get_custom_folders()
-        for folder in custom_folders:
-            documents.extend(self._load_documents_from_folder(folder, exclude_hidden=True))
+    def _list_document_files(self, documents_path: str) -> list[str]:
+        files = self._list_folder_files(documents_path, exclude_hidden=False)
+        for folder in self.get_custom_folders():
+            files.extend(self._list_folder_files(folder, exclude_hidden=True))
+        return list(dict.fromkeys(files))
+
+    @staticmethod
+    def _load_file(path: str) -> list:
+        from llama_index.core import SimpleDirectoryReader
+
+        try:
+            return SimpleDirectoryReader(input_files=[path], filename_as_id=True).load_data()
+        except Exception as e:
+            print(f"Skipping file {path}: {e}")
+            return []
+
+    def _load_documents(self, files: list[str], on_progress=None, by_file: dict | None = None) -> list:
+        """Load and parse files on a thread pool, keeping the order of files
+
+        Args:
+            files: paths of the files to load
+            on_progress: called with the fraction of loaded files
+            by_file: if given, filled with the documents loaded from each file
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        documents = []
+        if not files:
+            return documents
+        workers = min(self.LOADER_WORKERS, len(files))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="newelle-rag-load") as executor:
+            for i, loaded in enumerate(executor.map(self._load_file, files)):
+                documents.extend(loaded)
+                if by_file is not None:
+                    by_file[files[i]] = loaded
+                if on_progress is not None:
+                    on_progress((i + 1) / len(files))
         return documents
-    
+
+    def _collect_documents(self, documents_path: str) -> list:
+        return self._load_documents(self._list_document_files(documents_path))
+
+    def _set_indexing_stage(self, stage: str, progress: float):
+        """Report the progress of an indexing stage through indexing_status
+
+        Args:
+            stage: one of INDEXING_STAGES
+            progress: progress of the stage, between 0 and 1
+        """
+        start, end = self.INDEXING_STAGES[stage]
+        self.indexing_stage = stage
+        self.indexing_status = start + (end - start) * min(max(progress, 0), 1)
+
     def load(self):
+        self.watcher.start()
         if self.index_exists() and ((self.index is None and self.loading_thread is None) or self.loaded_index != self.get_paths()[1]):
             self.loading_thread = threading.Thread(target=self.load_index)
             self.loading_thread.start()
@@ -147,11 +220,12 @@ class LlamaIndexHanlder(RAGHandler):
     def delete_index(self):
         import shutil
         _, data_path = self.get_paths()
-        if os.path.exists(data_path):
-            shutil.rmtree(data_path)
-        self.index = None
-        self.retriever = None
-        self.loaded_index = ""
+        with self.index_lock:
+            if os.path.exists(data_path):
+                shutil.rmtree(data_path)
+            self.index = None
+            self.retriever = None
+            self.loaded_index = ""
 
 
     def load_index(self):
@@ -162,9 +236,11 @@ class LlamaIndexHanlder(RAGHandler):
         from llama_index.core.retrievers import BaseRetriever
 
         documents_path, data_path = self.get_paths()
-        Settings.embed_model = self.get_embedding_adapter(self.embedding)
+        config = vector_index.load_config(data_path)
+        Settings.embed_model = self.get_embedding_adapter(self.embedding, normalize=config["metric"] == "ip")
         Settings.llm = self.get_llm_adapter()
         vector_store = FaissVectorStore.from_persist_dir(data_path)
+        vector_index.set_search_params(vector_store.client, config)
         storage_context = StorageContext.from_defaults(persist_dir=data_path, vector_store=vector_store)
         index = load_index_from_storage(storage_context) 
         oversample = float(self.get_setting("oversample_factor", 2.0))
@@ -174,12 +250,12 @@ class LlamaIndexHanlder(RAGHandler):
             index=index,
             similarity_top_k=similarity_top_k,
         )
+        bm25_retriever = None
         
         if self.get_setting("use_bm25"):
             try:
                 from llama_index.retrievers.bm25 import BM25Retriever
                 bm25_path = os.path.join(data_path, "bm25_retriever")
-                bm25_retriever = None
                 if os.path.exists(bm25_path):
                      bm25_retriever = BM25Retriever.from_persist_dir(bm25_path)
                 else:
@@ -202,9 +278,13 @@ class LlamaIndexHanlder(RAGHandler):
                     retriever = HybridRetriever(retriever, bm25_retriever, similarity_top_k)
             except Exception as e:
                 print(f"Failed to load BM25 retriever: {e}")
+                bm25_retriever = None
 
         self.index = index
         self.retriever = retriever
+        self.bm25_retriever = bm25_retriever
+        self.vector_config = config
+        self.similarity_top_k = similarity_top_k
         self.embedding.load_model()
         retriever.retrieve("test")
         self.loading_thread = None
@@ -318,46 +398,93 @@ class LlamaIndexHanlder(RAGHandler):
 
     def retrieve_with_history(self, prompt: str, history: list[dict[str, str]]) -> list:
         from llama_index.core.schema import NodeWithScore
-        import copy
         
         message_context = int(self.get_setting("message_context", 5))
         queries = [prompt]
         
-        # Get previous messages in reverse order (newest first)
+        # Get previous messages in reverse order (newest first), chat history
+        # entries keep the text in "Message", console and tool output is skipped
         if message_context > 1 and history:
-            prev_messages = history[-(message_context-1):]
-            queries.extend([msg.get("content", "") for msg in reversed(prev_messages)])
+            prev_messages = [
+                msg for msg in history
+                if msg.get("User") in ("User", "Assistant") and not msg.get("ToolContext")
+            ][-(message_context-1):]
+            queries.extend([msg.get("Message") or "" for msg in reversed(prev_messages)])
+        
+        # Keep the position of each query, it sets its weight
+        positions = [i for i, query in enumerate(queries) if query.strip()]
+        results = self._retrieve_many([queries[i] for i in positions])
             
         all_nodes = {} # node_id -> NodeWithScore
         
         # Decay factor for weights
         decay = 0.8
         
-        for i, query in enumerate(queries):
-            if not query.strip():
-                continue
-                
+        for i, nodes in zip(positions, results):
             weight = decay ** i
-            nodes = self.retriever.retrieve(query)
-            
             for node in nodes:
-                # We need to clone the node because we are modifying the score
-                # and the same node instance might be returned by the retriever (cached)
-                # actually retriever returns new NodeWithScore objects but they point to same TextNode
-                
                 # If we already found this node, add to score
                 if node.node.node_id in all_nodes:
                     all_nodes[node.node.node_id].score += node.score * weight
                 else:
-                    # Create a copy to avoid side effects if we modify it
-                    new_node = copy.deepcopy(node)
-                    new_node.score = node.score * weight
-                    all_nodes[node.node.node_id] = new_node
+                    # A new wrapper, the TextNode itself is shared and never modified
+                    all_nodes[node.node.node_id] = NodeWithScore(node=node.node, score=node.score * weight)
         
         # Convert back to list
         combined_nodes = list(all_nodes.values())
         return combined_nodes
 
+    def _retrieve_many(self, queries: list[str]) -> list[list]:
+        """Retrieve the nodes of several queries
+
+        The queries are embedded in one call and searched in one FAISS
+        search, BM25 results are then fused per query like the hybrid
+        retriever does.
+
+        Returns:
+            list: NodeWithScore lists, in the order of queries
+        """
+        if not queries:
+            return []
+        try:
+            vector_results = self._vector_search_many(queries)
+        except Exception as e:
+            print(f"Batched retrieval failed, retrieving queries one by one: {e}")
+            return [self.retriever.retrieve(query) for query in queries]
+        if self.bm25_retriever is None:
+            return vector_results
+        return [
+            self.reciprocal_rank_fusion(query, vec_nodes, self.bm25_retriever.retrieve(query), self.similarity_top_k)
+            for query, vec_nodes in zip(queries, vector_results)
+        ]
+
+    def _vector_search_many(self, queries: list[str]) -> list[list]:
+        """Search the FAISS index with all the queries at once"""
+        from llama_index.core.schema import NodeWithScore
+
+        faiss_index = self.index.vector_store.client
+        k = min(self.similarity_top_k, faiss_index.ntotal)
+        if k <= 0:
+            return [[] for _ in queries]
+        embeddings = np.asarray(self.embedding.get_embedding(queries), dtype=np.float32)
+        if self.vector_config["metric"] == "ip":
+            embeddings = vector_index.normalize(embeddings)
+        scores, ids = faiss_index.search(np.ascontiguousarray(embeddings), k)
+
+        nodes_dict = self.index.index_struct.nodes_dict
+        node_ids = {nodes_dict[str(i)] for i in ids.flat if str(i) in nodes_dict}
+        docstore = self.index.docstore
+        nodes = {node_id: docstore.get_document(node_id, raise_error=False) for node_id in node_ids}
+        results = []
+        for row_scores, row_ids in zip(scores, ids):
+            row = []
+            for score, vector_id in zip(row_scores, row_ids):
+                node = nodes.get(nodes_dict.get(str(vector_id)))
+                if node is not None:
+                    row.append(NodeWithScore(node=node, score=float(score)))
+            results.append(row)
+        return results
+
     def get_context(self, prompt: str, history: list[dict[str, str]]) -> list[str]:
         self.wait_for_loading()
         if self.index is None:
@@ -403,41 +530,59 @@ class LlamaIndexHanlder(RAGHandler):
             data_path = self.data_path
         return documents_path, data_path
     
-    def create_index(self, button=None):  
+    def create_index(self, button=None):
+        """Build the index of every document from scratch"""
+        with self.index_lock:
+            self._create_index(button)
+
+    def _create_index(self, button=None):
         if not self.is_installed():
             return
         from llama_index.core.settings import Settings
         from llama_index.core import VectorStoreIndex, StorageContext
         from llama_index.vector_stores.faiss import FaissVectorStore
-        import faiss
         
         documents_path, data_path = self.get_paths()
+        # Also keeps the folder watcher from starting an update meanwhile
+        self.indexing = True
         try:
             self.llm.load_model(None)
             self.embedding.load_model()
             print("Creating index")
-            Settings.embed_model = self.get_embedding_adapter(self.embedding)
+            Settings.embed_model = self.get_embedding_adapter(self.embedding, normalize=True)
             chunk_size = int(self.get_setting("chunk_size"))
             Settings.chunk_size = chunk_size 
-            documents = self._collect_documents(documents_path)
+            self._set_indexing_stage("loading", 0)
+            files = self._list_document_files(documents_path)
+            print(f"Loading {len(files)} files")
+            by_file = {}
+            documents = self._load_documents(files, lambda p: self._set_indexing_stage("loading", p), by_file)
             if not documents:
                 print("No files found in indexed folders.")
                 self.indexing = False
                 self.indexing_status = 1
                 return
-            self.indexing_status = 0
-            faiss_index = faiss.IndexFlatL2(self.embedding.get_embedding_size())
+            nodes = self._split_documents(documents)
+            self._embed_nodes(nodes, int(self.get_setting("embedding_batch_size")), normalize=True)
+
+            self._set_indexing_stage("storing", 0)
+            config = vector_index.make_config(self.embedding.get_embedding_size(), len(nodes),
+                                              self.get_setting("index_type"), self.get_setting("quantization"))
+            print(f"Storing {len(nodes)} chunks in a {config['type']} index")
+            faiss_index = vector_index.create_index(config)
+            vector_index.train_index(faiss_index, np.array([node.embedding for node in nodes], dtype=np.float32))
             vector_store = FaissVectorStore(faiss_index=faiss_index)
             storage_context = StorageContext.from_defaults(vector_store=vector_store)
-            index = VectorStoreIndex.from_documents(documents[:1], storage_context=storage_context)
-            i = 1
-            for document in documents[1:]:
-                print("Indexing document " + str(i) + " of " + str(len(documents)) + ": " + document.metadata.get("file_path", document.metadata.get("file_name", "Unknown")))
-                index.insert(document)
-                i += 1
-                self.indexing_status = (i / len(documents))
-
+            # Hashes let update_index tell unchanged documents apart, from_documents stores them too
+            for document in documents:
+                storage_context.docstore.set_document_hash(document.id_, document.hash)
+            # Nodes already carry their embedding, the index only adds them to the stores
+            index = VectorStoreIndex(nodes, storage_context=storage_context)
             index.storage_context.persist(data_path)
+            vector_index.save_config(data_path, config)
+            manifest = DocumentManifest(data_path)
+            self._add_to_manifest(manifest, by_file, nodes)
+            manifest.save()
             
             # Persist BM25 Index
             try:
@@ -454,6 +599,7 @@ class LlamaIndexHanlder(RAGHandler):
             except Exception as e:
                 print(f"Failed to create BM25 index: {e}")
 
+            self._set_indexing_stage("storing", 1)
             self.indexing = False
         except Exception as e:
             print(e)
@@ -461,6 +607,45 @@ class LlamaIndexHanlder(RAGHandler):
             self.indexing_status = 1
         self.set_setting("last_index_created", time())
 
+    def _split_documents(self, documents: list) -> list:
+        """Split documents in nodes with the node parser configured in Settings"""
+        from llama_index.core.settings import Settings
+
+        self._set_indexing_stage("splitting", 0)
+        parser = Settings.node_parser
+        nodes = []
+        step = max(len(documents) // 20, 1)
+        for start in range(0, len(documents), step):
+            nodes.extend(parser.get_nodes_from_documents(documents[start:start + step]))
+            self._set_indexing_stage("splitting", (start + step) / len(documents))
+        return nodes
+
+    def _embed_nodes(self, nodes: list, batch_size: int, normalize: bool = False, report_progress: bool = True):
+        """Embed nodes in batches, storing the vector in node.embedding
+
+        Args:
+            nodes: nodes to embed
+            batch_size: nodes per get_embedding call
+            normalize: store unit length vectors
+            report_progress: report through indexing_status, for the document index
+        """
+        from llama_index.core.schema import MetadataMode
+
+        if report_progress:
+            self._set_indexing_stage("embedding", 0)
+        batch_size = max(batch_size, 1)
+        for start in range(0, len(nodes), batch_size):
+            batch = nodes[start:start + batch_size]
+            if report_progress:
+                print(f"Embedding chunks {start + 1}-{start + len(batch)} of {len(nodes)}")
+            embeddings = np.asarray(self.embedding.get_embedding([node.get_content(metadata_mode=MetadataMode.EMBED) for node in batch]), dtype=np.float32)
+            if normalize:
+                embeddings = vector_index.normalize(embeddings)
+            for node, embedding in zip(batch, embeddings):
+                node.embedding = embedding.tolist()
+            if report_progress:
+                self._set_indexing_stage("embedding", (start + len(batch)) / len(nodes))
+
     def update_index_button_pressed(self, button=None):
         if self.indexing:
             return
@@ -468,74 +653,167 @@ class LlamaIndexHanlder(RAGHandler):
         t.start()
 
     def update_index(self, button=None):
+        """Update the index with the files added, changed or deleted since it was built
+
+        Only the files that differ from the index manifest are loaded and
+        embedded, and only the nodes of changed or deleted files are removed.
+        Indexes built before manifests existed are rebuilt once, by an
+        explicit update only: the folder watcher leaves them alone.
+        """
         if not self.is_installed():
             return
-        if not self.index_exists():
-            self.create_index(button)
-            return
-
+        documents_path, data_path = self.get_paths()
         from llama_index.core.settings import Settings
         
-        documents_path, data_path = self.get_paths()
-        try:
-            self.llm.load_model(None)
-            self.embedding.load_model()
-            print("Updating index")
-            
-            # Ensure index is loaded
-            if self.index is None:
-                self.load_index()
-                self.wait_for_loading()
-            
-            if self.index is None:
-                print("Failed to load index for update")
-                return
-
-            self.indexing = True
-            self.indexing_status = 0
-            
-            Settings.embed_model = self.get_embedding_adapter(self.embedding)
-            chunk_size = int(self.get_setting("chunk_size"))
-            Settings.chunk_size = chunk_size 
-            documents = self._collect_documents(documents_path)
-            if not documents:
-                print("No files found in indexed folders.")
-                self.indexing = False
-                self.indexing_status = 1
-                return
-            
-            print(f"Refreshing {len(documents)} documents...")
-            self.index.refresh_ref_docs(documents)
-            
-            self.index.storage_context.persist(data_path)
-            
-            # Update BM25 Index if needed
-            if self.get_setting("use_bm25"):
-                try:
-                    from llama_index.retrievers.bm25 import BM25Retriever
-                    nodes = list(self.index.docstore.docs.values())
-                    print("Updating BM25 Index...")
-                    # Ensure similarity_top_k doesn't exceed the number of nodes to avoid warnings
-                    similarity_top_k = min(int(self.get_setting("return_documents")), len(nodes)) if nodes else 1
-                    bm25_retriever = BM25Retriever.from_defaults(nodes=nodes, similarity_top_k=similarity_top_k)
-                    bm25_path = os.path.join(data_path, "bm25_retriever")
-                    bm25_retriever.persist(bm25_path)
-                    
-                    # Refresh the current retriever
+        with self.index_lock:
+            try:
+                manifest = DocumentManifest.load(data_path)
+                if not self.index_exists() or manifest is None:
+                    self.create_index(button)
+                    if self.index_exists():
+                        self.load_index()
+                    return
+                config = vector_index.load_config(data_path)
+                added, changed, deleted = manifest.diff(self._list_document_files(documents_path))
+                if not (added or changed or deleted):
+                    # Touched but unchanged files may have had their stat updated
+                    manifest.save()
+                    return
+                if (changed or deleted) and not vector_index.supports_removal(config):
+                    # Approximate indexes can't drop vectors, embeddings are
+                    # cached so rebuilding only embeds the new text
+                    self.create_index(button)
+                    self.load_index()
+                    return
+                self.llm.load_model(None)
+                self.embedding.load_model()
+                print(f"Updating index: {len(added)} added, {len(changed)} changed, {len(deleted)} deleted")
+                
+                # Ensure index is loaded
+                if self.index is None:
                     self.load_index()
                     self.wait_for_loading()
-                except Exception as e:
-                    print(f"Failed to update BM25 index: {e}")
+                
+                if self.index is None:
+                    print("Failed to load index for update")
+                    return
 
-            self.indexing = False
-            self.indexing_status = 1
-        except Exception as e:
-            print(f"Error updating index: {e}")
-            self.indexing = False
-            self.indexing_status = 1
+                self.indexing = True
+                self._set_indexing_stage("loading", 0)
+                
+                normalize = config["metric"] == "ip"
+                Settings.embed_model = self.get_embedding_adapter(self.embedding, normalize=normalize)
+                chunk_size = int(self.get_setting("chunk_size"))
+                Settings.chunk_size = chunk_size 
+
+                removed_docs, removed_nodes = [], []
+                for path in changed + deleted:
+                    entry = manifest.remove_file(path)
+                    removed_docs += entry["doc_ids"]
+                    removed_nodes += entry["node_ids"]
+                self._remove_nodes(self.index, removed_docs, removed_nodes)
+
+                by_file = {}
+                documents = self._load_documents(added + changed, lambda p: self._set_indexing_stage("loading", p), by_file)
+                nodes = self._split_documents(documents)
+                self._embed_nodes(nodes, int(self.get_setting("embedding_batch_size")), normalize=normalize)
+                self._set_indexing_stage("storing", 0)
+                for document in documents:
+                    self.index.docstore.set_document_hash(document.id_, document.hash)
+                self.index.insert_nodes(nodes)
+                self.index.storage_context.persist(data_path)
+                self._add_to_manifest(manifest, by_file, nodes)
+                manifest.save()
+                
+                # Update BM25 Index if needed
+                if self.get_setting("use_bm25"):
+                    try:
+                        from llama_index.retrievers.bm25 import BM25Retriever
+                        nodes = list(self.index.docstore.docs.values())
+                        print("Updating BM25 Index...")
+                        # Ensure similarity_top_k doesn't exceed the number of nodes to avoid warnings
+                        similarity_top_k = min(int(self.get_setting("return_documents")), len(nodes)) if nodes else 1
+                        bm25_retriever = BM25Retriever.from_defaults(nodes=nodes, similarity_top_k=similarity_top_k)
+                        bm25_path = os.path.join(data_path, "bm25_retriever")
+                        bm25_retriever.persist(bm25_path)
+                        
+                        # Refresh the current retriever
+                        self.load_index()
+                        self.wait_for_loading()
+                    except Exception as e:
+                        print(f"Failed to update BM25 index: {e}")
+
+                self.indexing = False
+                self.indexing_status = 1
+            except Exception as e:
+                print(f"Error updating index: {e}")
+                self.indexing = False
+                self.indexing_status = 1
         self.set_setting("last_index_created", time())
         self.settings_update()
 
+    def _remove_nodes(self, index, doc_ids: list[str], node_ids: list[str]):
+        """Remove documents and their nodes from the docstore and the FAISS index
+
+        FaissVectorStore can't delete, but a flat FAISS index compacts on
+        remove_ids, so the removed vectors are dropped and the vector ids of
+        the following nodes are shifted to match.
+        """
+        if not doc_ids and not node_ids:
+            return
+        docstore = index.docstore
+        node_ids = set(node_ids)
+        for doc_id in doc_ids:
+            ref_doc = docstore.get_ref_doc_info(doc_id)
+            if ref_doc is not None:
+                node_ids.update(ref_doc.node_ids)
+        struct = index.index_struct
+        removed = sorted(int(vector_id) for vector_id, node_id in struct.nodes_dict.items() if node_id in node_ids)
+        if removed:
+            index.vector_store.client.remove_ids(np.array(removed, dtype=np.int64))
+            kept = sorted(int(vector_id) for vector_id, node_id in struct.nodes_dict.items() if node_id not in node_ids)
+            struct.nodes_dict = {str(i): struct.nodes_dict[str(old)] for i, old in enumerate(kept)}
+            index.storage_context.index_store.add_index_struct(struct)
+        for node_id in node_ids:
+            docstore.delete_document(node_id, raise_error=False)
+        for doc_id in doc_ids:
+            docstore.delete_ref_doc(doc_id, raise_error=False)
+
+    @staticmethod
+    def _add_to_manifest(manifest: DocumentManifest, by_file: dict, nodes: list):
+        """Record the loaded files with the ids of their documents and nodes"""
+        nodes_by_doc = {}
+        for node in nodes:
+            nodes_by_doc.setdefault(node.ref_doc_id, []).append(node.node_id)
+        for path, documents in by_file.items():
+            doc_ids = [document.id_ for document in documents]
+            node_ids = [node_id for doc_id in doc_ids for node_id in nodes_by_doc.get(doc_id, [])]
+            try:
+                manifest.set_file(path, doc_ids, node_ids)
+            except OSError as e:
+                print(f"Could not add {path} to the index manifest: {e}")
+
+    def _list_watched_files(self) -> list[str]:
+        documents_path, _ = self.get_paths()
+        return self._list_document_files(documents_path)
+
+    def _watcher_enabled(self) -> bool:
+        return self.settings.get_boolean("rag-on") and bool(self.get_setting("auto_update")) and self.is_installed() and self.index_exists()
+
+    def _on_documents_changed(self) -> bool:
+        if self.indexing:
+            return False
+        _, data_path = self.get_paths()
+        if DocumentManifest.load(data_path) is None:
+            # Built before manifests existed, only an explicit update rebuilds it
+            print("The document index has no manifest, press Update Index to enable automatic updates")
+            return True
+        self.update_index()
+        return True
+
+    def destroy(self):
+        self.watcher.stop()
+
     @staticmethod 
     def parse_document_list(documents: list[str]):
         from llama_index.core import SimpleDirectoryReader, Document
@@ -582,20 +860,22 @@ class LlamaIndexHanlder(RAGHandler):
         from llama_index.core.callbacks import TokenCountingHandler, CallbackManager
         from llama_index.vector_stores.faiss import FaissVectorStore
         import tiktoken 
-        import faiss
         counter = TokenCountingHandler(
             tokenizer=tiktoken.encoding_for_model("gpt-4o").encode
         )
         self.llm.load_model(None)
         self.embedding.load_model()
-        Settings.embed_model = self.get_embedding_adapter(self.embedding)
+        Settings.embed_model = self.get_embedding_adapter(self.embedding, normalize=True)
         Settings.callback_manager = CallbackManager([counter]) 
         chunk_size = int(self.get_setting("chunk_size")) if chunk_size is None else chunk_size
-        document_list = self.parse_document_list(documents)
-        faiss_index = faiss.IndexFlatL2(self.embedding.get_embedding_size())
+        document_list, nodes, token_count = self.load_attached_documents(documents, chunk_size)
+        # Indexes of a few documents are searched exhaustively
+        config = vector_index.make_config(self.embedding.get_embedding_size(), 0, "flat")
+        faiss_index = vector_index.create_index(config)
         vector_store = FaissVectorStore(faiss_index=faiss_index)
         storage_context = StorageContext.from_defaults(vector_store=vector_store)
-        index = VectorStoreIndex.from_documents(document_list, storage_context=storage_context)
+        # Nodes are already embedded
+        index = VectorStoreIndex(nodes, storage_context=storage_context)
         
         bm25_retriever = None
         use_bm25 = self.get_setting("use_bm25")
@@ -608,15 +888,96 @@ class LlamaIndexHanlder(RAGHandler):
              except Exception as e:
                  print(f"Failed to create BM25 retriever: {e}")
 
-        return LlamaIndexIndex(index, int(self.get_setting("return_documents")), float(self.get_setting("similarity_threshold")), counter, document_list, float(self.get_setting("oversample_factor", 2.0)), bm25_retriever, use_bm25) 
+        rag_index = LlamaIndexIndex(index, int(self.get_setting("return_documents")), float(self.get_setting("similarity_threshold")), counter, document_list, float(self.get_setting("oversample_factor", 2.0)), bm25_retriever, use_bm25, config,
+                                    token_count, lambda documents: self.load_attached_documents(documents, chunk_size)) 
+        # Lets update_index tell which documents are already indexed
+        rag_index.documents = list(documents)
+        return rag_index
+
+    def get_document_cache(self) -> DocumentCache | None:
+        """Cache of attached documents, None if no cache directory was set"""
+        if self.document_cache is None and self.cache_path is not None:
+            self.document_cache = DocumentCache(os.path.join(self.cache_path, "attached_documents"))
+        return self.document_cache
+
+    def load_attached_documents(self, documents: list[str], chunk_size: int) -> tuple[list, list, int]:
+        """Parse, split and embed documents, reusing the cached files
+
+        Args:
+            documents: documents in the format accepted by query_document
+            chunk_size: chunk size of the nodes
+
+        Returns:
+            tuple: (documents, embedded nodes, token count of the nodes)
+        """
+        from llama_index.core.node_parser import SentenceSplitter
+        from llama_index.core.schema import MetadataMode
+        import tiktoken
+
+        encoding = tiktoken.encoding_for_model("gpt-4o")
+        splitter = SentenceSplitter(chunk_size=chunk_size)
+        cache = self.get_document_cache()
+        model_id = self.embedding.get_model_id()
 
-    def get_embedding_adapter(self, embedding: EmbeddingHandler):
+        document_list, nodes, token_count = [], [], 0
+        parsed, uncached = [], []
+        for document in documents:
+            key = None
+            if cache is not None and (document.startswith("file:") or os.path.exists(document)):
+                path = os.path.abspath(os.path.expanduser(document.removeprefix("file:")))
+                key = DocumentCache.file_key(path, model_id, chunk_size)
+            entry = cache.get(key) if key is not None else None
+            if entry is not None:
+                document_list += entry[0]
+                nodes += entry[1]
+                token_count += entry[2]
+            elif key is not None:
+                parsed.append((key, self.parse_document_list([document])))
+            else:
+                uncached.append(document)
+        if uncached:
+            # Text and urls are parsed together, urls are fetched in parallel
+            parsed.append((None, self.parse_document_list(uncached)))
+
+        new_nodes, new_entries = [], []
+        for key, docs in parsed:
+            doc_nodes = splitter.get_nodes_from_documents(docs)
+            tokens = sum(len(encoding.encode(node.get_content(metadata_mode=MetadataMode.EMBED))) for node in doc_nodes)
+            document_list += docs
+            nodes += doc_nodes
+            new_nodes += doc_nodes
+            token_count += tokens
+            if key is not None:
+                new_entries.append((key, docs, doc_nodes, tokens))
+
+        self._embed_nodes(new_nodes, int(self.get_setting("embedding_batch_size")), normalize=True, report_progress=False)
+        for key, docs, doc_nodes, tokens in new_entries:
+            try:
+                cache.put(key, docs, doc_nodes, tokens)
+            except Exception as e:
+                print(f"Could not cache document: {e}")
+        return document_list, nodes, token_count
+
+    def get_embedding_adapter(self, embedding: EmbeddingHandler, normalize: bool = False):
+        """Wrap an embedding handler for llama_index
+
+        Args:
+            embedding: the embedding handler
+            normalize: return unit length vectors, for inner product indexes
+        """
         from llama_index.core.embeddings import BaseEmbedding
         class CustomEmbedding(BaseEmbedding):
-            def __init__(self, embedding_model: EmbeddingHandler, **kwargs: Any):
+            def __init__(self, embedding_model: EmbeddingHandler, normalize: bool, **kwargs: Any):
                 super().__init__(**kwargs)
                 self._embedding_model = embedding_model
                 self._embedding_size = embedding_model.get_embedding_size()
+                self._normalize = normalize
+
+            def _embed(self, texts: List[str]):
+                embeddings = self._embedding_model.get_embedding(texts)
+                if self._normalize:
+                    embeddings = vector_index.normalize(embeddings)
+                return embeddings
                  
             async def _aget_query_embedding(self, query: str) -> List[float]:
                 return self._get_query_embedding(query)
@@ -625,17 +986,17 @@ class LlamaIndexHanlder(RAGHandler):
                 return self._get_text_embedding(text)
 
             def _get_query_embedding(self, query: str) -> List[float]:
-                embeddings = self._embedding_model.get_embedding([query])
+                embeddings = self._embed([query])
                 return embeddings[0]
 
             def _get_text_embedding(self, text: str) -> List[float]:
-                embeddings = self._embedding_model.get_embedding([text])
+                embeddings = self._embed([text])
                 return embeddings[0]
 
             def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
-                embeddings = self._embedding_model.get_embedding(texts)
+                embeddings = self._embed(texts)
                 return embeddings
-        return CustomEmbedding(embedding)
+        return CustomEmbedding(embedding, normalize)
     
     def get_tools(self) -> list:
         """Get tools provided by the RAG handler
@@ -744,9 +1105,17 @@ class LlamaIndexHanlder(RAGHandler):
 
 
 class LlamaIndexIndex(RAGIndex):
-    def __init__(self, index, return_documents, similarity_threshold, counter, docs, oversample_factor=2.0, bm25_retriever=None, use_bm25=False):
+    def __init__(self, index, return_documents, similarity_threshold, counter, docs, oversample_factor=2.0, bm25_retriever=None, use_bm25=False, vector_config=None,
+                 token_count=0, document_loader=None):
+        """
+        Args:
+            token_count: tokens of the indexed nodes
+            document_loader: returns (documents, embedded nodes, token count)
+                for documents to insert, see LlamaIndexHanlder.load_attached_documents
+        """
         super().__init__()
         self.index = index
+        self.vector_config = vector_config if vector_config is not None else dict(vector_index.LEGACY_CONFIG)
         self.retriever = None
         self.bm25_retriever = bm25_retriever
         self.use_bm25 = use_bm25
@@ -755,9 +1124,14 @@ class LlamaIndexIndex(RAGIndex):
         self.counter = counter
         self.docs = docs
         self.oversample_factor = oversample_factor
+        self.token_count = token_count
+        self.document_loader = document_loader
        
     def get_index_size(self):
-        return self.counter.total_embedding_token_count
+        if self.document_loader is None:
+            return self.counter.total_embedding_token_count
+        # Cached nodes are not embedded again, the counter would miss them
+        return self.token_count
 
     def query(self, query: str) -> list[str]:
         from llama_index.core.retrievers import VectorIndexRetriever
@@ -800,6 +1174,12 @@ class LlamaIndexIndex(RAGIndex):
 
     def insert(self, documents: list[str]):
         self.documents += documents
+        if self.document_loader is not None:
+            documents_list, nodes, token_count = self.document_loader(documents)
+            self.docs += documents_list
+            self.token_count += token_count
+            self.index.insert_nodes(nodes)
+            return
         documents_list = LlamaIndexHanlder.parse_document_list(documents)
         self.docs += documents_list
         for document in documents_list:
@@ -827,6 +1207,7 @@ class LlamaIndexIndex(RAGIndex):
 
         # Persist the vector store index
         self.index.storage_context.persist(persist_dir=path)
+        vector_index.save_config(path, self.vector_config)
 
         # Persist BM25 retriever if used
         if self.use_bm25 and self.bm25_retriever:
@@ -852,7 +1233,9 @@ class LlamaIndexIndex(RAGIndex):
             raise FileNotFoundError(f"Index path does not exist: {path}")
 
         # Load the vector store index
+        self.vector_config = vector_index.load_config(path)
         vector_store = FaissVectorStore.from_persist_dir(path)
+        vector_index.set_search_params(vector_store.client, self.vector_config)
         storage_context = StorageContext.from_defaults(persist_dir=path, vector_store=vector_store)
         self.index = load_index_from_storage(storage_context)
 
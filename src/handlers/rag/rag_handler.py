@@ -73,12 +73,14 @@ class RAGIndex:
         Args:
             documents: List of documents to add
         """
-        for document in self.documents:
-            if document not in documents:
-                self.remove([document])
-        for document in documents:
-            if document not in self.documents:
-                self.insert([document])
+        wanted = set(documents)
+        indexed = set(self.documents)
+        removed = [document for document in self.documents if document not in wanted]
+        added = [document for document in dict.fromkeys(documents) if document not in indexed]
+        if removed:
+            self.remove(removed)
+        if added:
+            self.insert(added)
 
     @abstractmethod
     def persist(self, path: str):
@@ -105,6 +107,7 @@ class RAGHandler(Handler):
 
     def __init__(self, settings, path):
         super().__init__(settings, path)
+        self.cache_path = None
         self.documents_path = os.path.join(self.path, "documents")
         if not os.path.exists(self.documents_path):
             os.mkdir(self.documents_path)
@@ -132,6 +135,10 @@ class RAGHandler(Handler):
         self.llm = llm
         self.embedding = embeddings
 
+    def set_cache_path(self, path: str):
+        """Set the directory where the handler can cache data, like the indexes of attached documents"""
+        self.cache_path = path
+
     def get_index_row(self):
         """Get the exta settings corresponding to the index row to be get in Settings
 
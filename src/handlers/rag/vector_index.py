@@ -0,0 +1,136 @@
+"""FAISS index selection for the document index.
+
+Vectors are normalized and compared by inner product, so scores are cosine
+similarities like everywhere else in Newelle. The index structure depends
+on the corpus size, unless the user picks one:
+
+    flat  exhaustive scan, exact, for small corpora
+    hnsw  graph index, fast and accurate, more memory per vector
+    ivf   inverted lists over trained centroids, for very large corpora
+
+Vectors can also be stored quantized (8 bit scalar or product
+quantization). The configuration is persisted next to the index, indexes
+built before it existed are read as flat L2 indexes.
+"""
+
+import json
+import math
+import os
+
+import numpy as np
+
+CONFIG_FILENAME = "vector_index.json"
+
+# Corpus sizes, in chunks, where the automatic choice switches index type
+HNSW_MIN_VECTORS = 20_000
+IVF_MIN_VECTORS = 500_000
+
+HNSW_NEIGHBORS = 32
+HNSW_EF_SEARCH = 64
+# Product quantization needs 256 centroids per sub quantizer to train
+PQ_MIN_VECTORS = 256 * 39
+
+LEGACY_CONFIG = {"type": "flat", "metric": "l2", "quantization": "none"}
+
+
+def choose_index_type(vectors: int, requested: str = "auto") -> str:
+    """Return the index type to use for a corpus of the given size"""
+    if requested in ("flat", "hnsw", "ivf"):
+        return requested
+    if vectors >= IVF_MIN_VECTORS:
+        return "ivf"
+    if vectors >= HNSW_MIN_VECTORS:
+        return "hnsw"
+    return "flat"
+
+
+def _pq_segments(dim: int) -> int:
+    for segments in (64, 48, 32, 24, 16, 12, 8, 4, 2):
+        if dim % segments == 0 and dim // segments >= 2:
+            return segments
+    return 1
+
+
+def _ivf_lists(vectors: int) -> int:
+    # Around 4 * sqrt(n) lists, with enough vectors to train each centroid
+    return max(1, min(int(4 * math.sqrt(vectors)), vectors // 39))
+
+
+def make_config(dim: int, vectors: int, index_type: str = "auto", quantization: str = "none") -> dict:
+    """Build the configuration of a new index
+
+    Args:
+        dim: embedding size
+        vectors: number of vectors the index is built with
+        index_type: auto, flat, hnsw or ivf
+        quantization: none, sq8 or pq
+    """
+    index_type = choose_index_type(vectors, index_type)
+    if quantization == "pq" and vectors < PQ_MIN_VECTORS:
+        quantization = "sq8"
+    if quantization not in ("sq8", "pq"):
+        quantization = "none"
+    config = {"type": index_type, "metric": "ip", "quantization": quantization, "dim": dim}
+    if index_type == "ivf":
+        config["lists"] = _ivf_lists(vectors)
+    return config
+
+
+def create_index(config: dict):
+    """Create an empty, untrained FAISS index from a configuration"""
+    import faiss
+
+    dim = config["dim"]
+    storage = {"none": "Flat", "sq8": "SQ8", "pq": f"PQ{_pq_segments(dim)}"}[config["quantization"]]
+    if config["type"] == "hnsw":
+        description = f"HNSW{HNSW_NEIGHBORS}" + ("" if storage == "Flat" else "_" + storage)
+    elif config["type"] == "ivf":
+        description = f"IVF{config['lists']},{storage}"
+    else:
+        description = storage
+    metric = faiss.METRIC_L2 if config["metric"] == "l2" else faiss.METRIC_INNER_PRODUCT
+    index = faiss.index_factory(dim, description, metric)
+    set_search_params(index, config)
+    return index
+
+
+def train_index(index, vectors: np.ndarray):
+    """Train the index on the vectors it is going to hold, if it needs it"""
+    if not index.is_trained and len(vectors):
+        index.train(np.ascontiguousarray(vectors, dtype=np.float32))
+
+
+def set_search_params(index, config: dict):
+    """Set the query time accuracy/speed trade-off of an index"""
+    import faiss
+
+    if config["type"] == "ivf":
+        ivf = faiss.extract_index_ivf(index)
+        ivf.nprobe = min(ivf.nlist, max(8, ivf.nlist // 32))
+    elif config["type"] == "hnsw":
+        index.hnsw.efSearch = HNSW_EF_SEARCH
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """Scale vectors to unit length, so inner product is cosine similarity"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def supports_removal(config: dict) -> bool:
+    """Return if vectors can be removed from the index keeping ids contiguous"""
+    return config["type"] == "flat"
+
+
+def save_config(data_path: str, config: dict):
+    with open(os.path.join(data_path, CONFIG_FILENAME), "w", encoding="utf-8") as f:
+        json.dump(config, f)
+
+
+def load_config(data_path: str) -> dict:
+    try:
+        with open(os.path.join(data_path, CONFIG_FILENAME), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return dict(LEGACY_CONFIG)
@@ -1,4 +1,4 @@
-from .stt import STTHandler
+from .stt import STTHandler, pcm_to_wav
 
 class OpenAISRHandler(STTHandler):
     key = "openai_sr"
@@ -37,6 +37,13 @@ class OpenAISRHandler(STTHandler):
         ]
 
     def recognize_file(self, path) -> str | None:
+        with open(path, "rb") as audio_file:
+            return self._transcribe(path, audio_file.read())
+
+    def recognize_pcm(self, pcm: bytes, sample_rate: int, channels: int = 1, sample_width: int = 2) -> str | None:
+        return self._transcribe("audio.wav", pcm_to_wav(pcm, sample_rate, channels, sample_width))
+
+    def _transcribe(self, filename: str, audio: bytes) -> str | None:
         import openai
         key = self.get_setting("api")
         model = self.get_setting("model")
@@ -44,10 +51,9 @@ class OpenAISRHandler(STTHandler):
         if language == "":
             language = openai.NOT_GIVEN
         client = openai.Client(api_key=key, base_url=self.get_setting("endpoint"))
-        with open(path, "rb") as audio_file:
-           transcription = client.audio.transcriptions.create(
-                file=(path, audio_file.read()),
-                model=model,
-                language=language
-            )
+        transcription = client.audio.transcriptions.create(
+            file=(filename, audio),
+            model=model,
+            language=language
+        )
         return transcription.text
@@ -111,9 +111,24 @@ class OpenWakeWordHandler(STTHandler):
             return None
         
         try:
-            model = self._get_model()
             audio_data, rate = self._read_audio_file(path)
-            
+        except Exception as e:
+            print(f"OpenWakeWord error: {e}")
+            return ""
+        return self._detect(audio_data)
+
+    def recognize_pcm(self, pcm: bytes, sample_rate: int, channels: int = 1, sample_width: int = 2) -> str | None:
+        if sample_width != 2:
+            return super().recognize_pcm(pcm, sample_rate, channels, sample_width)
+        audio_array = np.frombuffer(pcm, dtype=np.int16)
+        if channels == 2:
+            audio_array = audio_array.reshape(-1, 2).mean(axis=1).astype(np.int16)
+        return self._detect(audio_array)
+
+    def _detect(self, audio_data) -> str:
+        """Return the wakewords detected in 16 bit samples"""
+        try:
+            model = self._get_model()
             predictions_list = model.predict_clip(audio_data, padding=1)
             
             max_scores = {}
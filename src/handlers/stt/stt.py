@@ -1,4 +1,8 @@
 from abc import abstractmethod
+import io
+import os
+import tempfile
+import wave
 from ...utility.pip import find_module
 from ..handler import Handler
 
@@ -33,4 +37,38 @@ class STTHandler(Handler):
         """Recognize a given audio file"""
         pass
 
+    def recognize_pcm(self, pcm: bytes, sample_rate: int, channels: int = 1, sample_width: int = 2) -> str | None:
+        """Recognize raw PCM audio, like the one captured from the microphone
+
+        Handlers that can take audio from memory override this, by default
+        the audio is written to a temporary WAV file for recognize_file.
+
+        Args:
+            pcm: little endian signed samples, interleaved if there are more channels
+            sample_rate: samples per second
+            channels: number of channels
+            sample_width: bytes per sample
+        """
+        fd, path = tempfile.mkstemp(prefix="newelle_stt_", suffix=".wav")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(pcm_to_wav(pcm, sample_rate, channels, sample_width))
+            return self.recognize_file(path)
+        finally:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def pcm_to_wav(pcm: bytes, sample_rate: int, channels: int = 1, sample_width: int = 2) -> bytes:
+    """Wrap raw PCM audio in a WAV container, in memory"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wf:
+        wf.setnchannels(channels)
+        wf.setsampwidth(sample_width)
+        wf.setframerate(sample_rate)
+        wf.writeframes(pcm)
+    return buffer.getvalue()
+
 
@@ -4,6 +4,8 @@ from .stt import STTHandler
 
 class VoskHandler(STTHandler): 
     key = "vosk"
+    _model = None
+    _model_path = None
 
     @staticmethod
     def get_extra_requirements() -> list:
@@ -23,12 +25,29 @@ class VoskHandler(STTHandler):
 
     def recognize_file(self, path):
         import speech_recognition as sr
-        from vosk import Model
         r = sr.Recognizer()
         with sr.AudioFile(path) as source:
             audio = r.record(source)
+        return self._recognize(r, audio)
+
+    def recognize_pcm(self, pcm: bytes, sample_rate: int, channels: int = 1, sample_width: int = 2) -> str | None:
+        if channels != 1:
+            return super().recognize_pcm(pcm, sample_rate, channels, sample_width)
+        import speech_recognition as sr
+        return self._recognize(sr.Recognizer(), sr.AudioData(pcm, sample_rate, sample_width))
+
+    def _get_model(self):
+        """Load the model once, until its path changes"""
+        from vosk import Model
         path = self.get_setting("path")
-        r.vosk_model = Model(path)
+        if self._model is None or self._model_path != path:
+            self._model = Model(path)
+            self._model_path = path
+        return self._model
+
+    def _recognize(self, r, audio) -> str | None:
+        import speech_recognition as sr
+        r.vosk_model = self._get_model()
         try:
             res = json.loads(r.recognize_vosk(audio))["text"]
         except sr.UnknownValueError:
@@ -37,4 +56,3 @@ class VoskHandler(STTHandler):
             print(e)
             return None
         return res
-
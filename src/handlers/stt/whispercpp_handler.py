@@ -2,7 +2,7 @@ import gettext
 from ...utility.strings import quote_string
 from ...utility.system import get_spawn_command, can_escape_sandbox, is_flatpak
 from ...utility.background_process import BackgroundProcess
-from .stt import STTHandler
+from .stt import STTHandler, pcm_to_wav
 from ...handlers import ErrorSeverity, ExtraSettings
 from ...ui.model_library import ModelLibraryWindow, LibraryModel
 import os
@@ -314,8 +314,27 @@ class WhisperCPPHandler(STTHandler):
             print("Using CLI mode")
             return self._recognize_with_cli(path)
 
+    def recognize_pcm(self, pcm: bytes, sample_rate: int, channels: int = 1, sample_width: int = 2):
+        self._start_process()
+
+        if self._use_server and self._server.is_running:
+            # Uploaded straight from memory
+            return self._recognize_with_server_data("audio.wav", pcm_to_wav(pcm, sample_rate, channels, sample_width))
+        # whisper-cli only reads files
+        return super().recognize_pcm(pcm, sample_rate, channels, sample_width)
+
     def _recognize_with_server(self, path):
         """Recognize using the whisper-server HTTP API"""
+        try:
+            with open(path, 'rb') as f:
+                audio_data = f.read()
+        except OSError as e:
+            self.throw("Error recognizing file with server: " + str(e), ErrorSeverity.ERROR)
+            return ""
+        return self._recognize_with_server_data(os.path.basename(path), audio_data)
+
+    def _recognize_with_server_data(self, filename, audio_data):
+        """Send WAV data to the whisper-server HTTP API"""
         import urllib.request
         import urllib.error
         import json
@@ -323,11 +342,6 @@ class WhisperCPPHandler(STTHandler):
         try:
             boundary = '----WebKitFormBoundary7MA4YWxkTrZu0gW'
 
-            with open(path, 'rb') as f:
-                audio_data = f.read()
-
-            filename = os.path.basename(path)
-
             body = []
             body.append(f'--{boundary}'.encode())
             body.append(f'Content-Disposition: form-data; name="file"; filename="{filename}"'.encode())
@@ -0,0 +1,381 @@
+"""Persistent, content addressed cache for synthesized speech.
+
+Replaying a message, a call greeting or a line the avatar repeats used to
+synthesize the same audio again, which takes seconds with local voices
+like Kokoro or Piper. `TTSAudioStore` keeps the encoded audio in files
+named by a hash of the handler, voice, settings and text;
+`CachedTTSHandler` wraps any `TTSHandler` and only asks the wrapped handler
+for audio missing from the store:
+
+    store = TTSAudioStore(os.path.join(cache_dir, "tts"))
+    tts = CachedTTSHandler(handler, store)
+    tts.play("Hello")  # synthesized once, then played from the cache
+
+Audio saved to a file and streamed audio are separate entries, as streams
+are often raw samples (see `TTSHandler.get_stream_format_args`). The store
+is bounded in size, the least recently used files are evicted once it
+grows past `TTSAudioStore.max_bytes`.
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+
+from .tts import TTSHandler
+
+_SUFFIX = ".audio"
+_CHUNK_SIZE = 64 * 1024
+
+
+class _PendingAudio:
+    """Audio being written to the store, visible once committed"""
+
+    def __init__(self, store: "TTSAudioStore", key: str):
+        self.store = store
+        self.key = key
+        self.path = os.path.join(store.directory, f".{key}.{os.urandom(4).hex()}.part")
+        self.file = open(self.path, "wb")
+
+    def write(self, data: bytes):
+        self.file.write(data)
+
+    def commit(self):
+        self.file.close()
+        if os.path.getsize(self.path) == 0:
+            self.discard()
+            return
+        self.store._add(self.key, self.path)
+
+    def discard(self):
+        self.file.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+class TTSAudioStore:
+    """Directory of synthesized audio files, shared by every TTS handler
+
+    Args:
+        directory: where the audio files are kept
+        max_bytes: size of the stored audio over which old files are evicted
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 512 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # key -> [size, last use], loaded from the directory on first use
+        self._index: dict[str, list] | None = None
+        self._size = 0
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        """Key of the audio made from the given parts (handler, voice, text...)"""
+        data = "\0".join(str(part) for part in parts)
+        return hashlib.sha256(data.encode("utf-8", "surrogatepass")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + _SUFFIX)
+
+    def _load(self) -> dict[str, list]:
+        if self._index is None:
+            os.makedirs(self.directory, exist_ok=True)
+            index = {}
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(".part"):
+                    # Left by an interrupted write
+                    try:
+                        os.remove(entry.path)
+                    except OSError:
+                        pass
+                elif entry.name.endswith(_SUFFIX):
+                    stat = entry.stat()
+                    index[entry.name[:-len(_SUFFIX)]] = [stat.st_size, stat.st_mtime]
+            self._index = index
+            self._size = sum(size for size, _ in index.values())
+        return self._index
+
+    def get(self, key: str) -> str | None:
+        """Return the path of the stored audio, None if missing"""
+        with self._lock:
+            index = self._load()
+            entry = index.get(key)
+            if entry is None:
+                return None
+            path = self._path(key)
+            now = time.time()
+            try:
+                # The modification time keeps the last use across restarts
+                os.utime(path, (now, now))
+            except OSError:
+                self._size -= entry[0]
+                del index[key]
+                return None
+            entry[1] = now
+            return path
+
+    def put_file(self, key: str, source: str):
+        """Store a copy of an audio file"""
+        with self._lock:
+            self._load()
+        pending = _PendingAudio(self, key)
+        try:
+            with open(source, "rb") as f:
+                shutil.copyfileobj(f, pending.file, _CHUNK_SIZE)
+        except Exception:
+            pending.discard()
+            raise
+        pending.commit()
+
+    def open_writer(self, key: str) -> _PendingAudio:
+        """Return a writer storing audio under key once committed"""
+        with self._lock:
+            self._load()
+        return _PendingAudio(self, key)
+
+    def _add(self, key: str, part_path: str):
+        size = os.path.getsize(part_path)
+        with self._lock:
+            index = self._load()
+            os.replace(part_path, self._path(key))
+            old = index.get(key)
+            if old is not None:
+                self._size -= old[0]
+            index[key] = [size, time.time()]
+            self._size += size
+            if self._size > self.max_bytes:
+                self._evict(index)
+
+    def _evict(self, index: dict[str, list]):
+        """Drop the oldest files until the store is back to 90% of max_bytes"""
+        target = self.max_bytes * 0.9
+        for key, (size, _) in sorted(index.items(), key=lambda item: item[1][1]):
+            if self._size <= target:
+                break
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            del index[key]
+            self._size -= size
+
+    def clear(self):
+        """Remove every stored file"""
+        with self._lock:
+            index = self._load()
+            for key in list(index):
+                try:
+                    os.remove(self._path(key))
+                except OSError:
+                    pass
+            index.clear()
+            self._size = 0
+
+
+class CachedTTSHandler(TTSHandler):
+    """TTS handler that looks the audio up in a TTSAudioStore first
+
+    Playback runs in the wrapper, on audio from the store, everything else
+    is forwarded to the wrapped handler, so it can be used wherever the
+    wrapped handler was.
+
+    Args:
+        handler: the handler synthesizing the audio
+        store: where the audio is cached
+    """
+
+    def __init__(self, handler: TTSHandler, store: TTSAudioStore):
+        self.handler = handler
+        self.store = store
+        self.key = handler.key
+        self.schema_key = handler.schema_key
+        self.settings = handler.settings
+        self.path = handler.path
+        self.on_start = lambda: None
+        self.on_stop = lambda: None
+        self.play_process = None
+
+    def __getattr__(self, name):
+        # Only called for attributes missing on the wrapper itself
+        if name == "handler":
+            raise AttributeError(name)
+        return getattr(self.handler, name)
+
+    @property
+    def voices(self):
+        return self.handler.voices
+
+    def set_error_func(self, func):
+        self.handler.set_error_func(func)
+
+    def throw(self, message, *args, **kwargs):
+        self.handler.throw(message, *args, **kwargs)
+
+    def is_installed(self) -> bool:
+        return self.handler.is_installed()
+
+    def install(self):
+        return self.handler.install()
+
+    def get_setting(self, *args, **kwargs):
+        return self.handler.get_setting(*args, **kwargs)
+
+    def set_setting(self, key, value):
+        return self.handler.set_setting(key, value)
+
+    def get_all_settings(self) -> dict:
+        return self.handler.get_all_settings()
+
+    def get_extra_settings(self) -> list:
+        return self.handler.get_extra_settings()
+
+    def get_extra_settings_list(self) -> list:
+        return self.handler.get_extra_settings_list()
+
+    def set_extra_settings_update(self, callback):
+        self.handler.set_extra_settings_update(callback)
+
+    def settings_update(self):
+        self.handler.settings_update()
+
+    def get_voices(self):
+        return self.handler.get_voices()
+
+    def voice_available(self, voice):
+        return self.handler.voice_available(voice)
+
+    def get_current_voice(self):
+        return self.handler.get_current_voice()
+
+    def set_voice(self, voice):
+        self.handler.set_voice(voice)
+
+    def streaming_enabled(self) -> bool:
+        return self.handler.streaming_enabled()
+
+    def get_stream_format_args(self) -> list:
+        return self.handler.get_stream_format_args()
+
+    def connect(self, signal, callback):
+        # Handlers with their own playback call the callbacks themselves
+        super().connect(signal, callback)
+        self.handler.connect(signal, callback)
+
+    def stop(self):
+        super().stop()
+        self.handler.stop()
+
+    def destroy(self):
+        self.stop()
+        self.handler.destroy()
+
+    # --- Cache ---
+
+    @staticmethod
+    def clean_text(message: str) -> str:
+        """Text as it matters for the synthesis, without surrounding or repeated spaces"""
+        return re.sub(r"[ \t]+", " ", (message or "").strip())
+
+    def _make_key(self, message: str, kind: str) -> str | None:
+        try:
+            settings = json.dumps(self.handler.get_all_settings(), sort_keys=True, default=str)
+            return TTSAudioStore.make_key(self.handler.key, self.handler.get_current_voice(), settings, kind,
+                                          self.clean_text(message))
+        except Exception as e:
+            print(f"Error computing the TTS cache key: {e}")
+            return None
+
+    def _file_key(self, message: str) -> str | None:
+        return self._make_key(message, "file")
+
+    def _stream_key(self, message: str) -> str | None:
+        return self._make_key(message, "stream " + " ".join(self.handler.get_stream_format_args()))
+
+    def _overrides(self, name: str) -> bool:
+        """True if the wrapped handler has its own implementation of a TTSHandler method"""
+        return getattr(type(self.handler), name, None) is not getattr(TTSHandler, name)
+
+    def _lookup(self, key: str | None) -> str | None:
+        if key is None:
+            return None
+        try:
+            return self.store.get(key)
+        except Exception as e:
+            print(f"Error reading the TTS cache: {e}")
+            return None
+
+    def save_audio(self, message, file):
+        """Save the audio of message in file, synthesizing it only if not cached"""
+        key = self._file_key(message)
+        cached = self._lookup(key)
+        if cached is not None:
+            shutil.copyfile(cached, file)
+            return
+        self.handler.save_audio(message, file)
+        if key is not None and os.path.isfile(file) and os.path.getsize(file) > 0:
+            try:
+                self.store.put_file(key, file)
+            except Exception as e:
+                print(f"Error writing the TTS cache: {e}")
+
+    def get_audio_stream(self, message):
+        """Yield the audio of message, from the cache or while storing it"""
+        key = self._stream_key(message)
+        cached = self._lookup(key)
+        if cached is not None:
+            with open(cached, "rb") as f:
+                while chunk := f.read(_CHUNK_SIZE):
+                    yield chunk
+            return
+
+        writer = None
+        if key is not None:
+            try:
+                writer = self.store.open_writer(key)
+            except Exception as e:
+                print(f"Error writing the TTS cache: {e}")
+        complete = False
+        try:
+            for chunk in self.handler.get_audio_stream(message):
+                if writer is not None:
+                    writer.write(chunk)
+                yield chunk
+            complete = True
+        finally:
+            # Streams stopped halfway are not stored
+            if writer is not None:
+                try:
+                    if complete:
+                        writer.commit()
+                    else:
+                        writer.discard()
+                except Exception as e:
+                    print(f"Error writing the TTS cache: {e}")
+
+    def play_audio(self, message):
+        """Play the audio of message, straight from the cache file when stored"""
+        cached = self._lookup(self._file_key(message))
+        if cached is not None:
+            self.playsound(cached)
+        elif self._overrides("play_audio"):
+            # e.g. espeak speaks directly, its save_audio is not meant for playback
+            self.handler.play_audio(message)
+        else:
+            # Synthesized through save_audio, so the audio is stored
+            super().play_audio(message)
+
+    def play_audio_stream(self, message):
+        """Play streamed audio, from a cached file of the whole audio if there is one"""
+        cached = self._lookup(self._file_key(message))
+        if cached is not None:
+            self.playsound(cached)
+        elif self._overrides("play_audio_stream"):
+            self.handler.play_audio_stream(message)
+        else:
+            super().play_audio_stream(message)
@@ -4,8 +4,10 @@ import threading
 import json 
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 from gi.repository import GLib
 from ..utility.system import is_flatpak, can_escape_sandbox
+from .mcp_sessions import MCPSessionPool
 
 
 class _CachedTool:
@@ -22,20 +24,23 @@ class _CachedTool:
 class MCPIntegration(NewelleExtension):
     id = "mcp"
     name = "MCP"
+    # Seconds a server gets to answer a tool discovery
+    DISCOVERY_TIMEOUT = 30
 
     def __init__(self, pip_path, extension_path, settings):
         super().__init__(pip_path, extension_path, settings)
         self.mcp_servers = json.loads(self.settings.get_string("mcp-servers"))
         self.tools = []
         self.tools_dict = {}  # Maps tool_name -> server_info dict
-        self.stdio_sessions = {}  # Keep stdio sessions alive
+        self.server_tools = {}  # Maps server identifier -> list of its tools
+        self.discovery_stats = {}  # Maps server identifier -> result of its last discovery
+        self._tools_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
         self._cache_path = os.path.join(extension_path, "mcp_tool_cache.json")
 
-        if self._load_from_cache():
-            # Cache hit -- refresh in background so next startup stays fresh
-            threading.Thread(target=self._background_refresh, daemon=True).start()
-        else:
-            self.update_tools()
+        # Serve the cached tools at once, the refresh patches them as servers answer
+        self._load_from_cache()
+        self.update_tools()
 
     def _get_config_dir(self):
         """Return the Newelle config directory (where OAuth creds are stored)."""
@@ -126,29 +131,29 @@ class MCPIntegration(NewelleExtension):
             entry = cache.get(identifier)
             if not entry or "tools" not in entry:
                 continue
-            for td in entry["tools"]:
-                stub = _CachedTool(td["name"], td.get("description", ""), td.get("inputSchema", {}))
-                self.tools.append(stub)
-                self.tools_dict[stub.name] = server_info
+            self.server_tools[identifier] = [
+                _CachedTool(td["name"], td.get("description", ""), td.get("inputSchema", {}))
+                for td in entry["tools"]
+            ]
             loaded_any = True
+        self._update_tool_lists()
 
         return loaded_any
 
     def _save_cache(self):
         """Persist current tool metadata so future startups can skip connections."""
         cache: dict = {}
-        # Group tools by server identifier
-        for tool in self.tools:
-            server_info = self.tools_dict.get(tool.name, {})
-            identifier = self._get_server_identifier(server_info)
-            if identifier not in cache:
-                cache[identifier] = {"tools": [], "cached_at": time.time()}
-            schema = tool.inputSchema if hasattr(tool, "inputSchema") else {}
-            cache[identifier]["tools"].append({
-                "name": tool.name,
-                "description": tool.description,
-                "inputSchema": schema,
-            })
+        with self._tools_lock:
+            server_tools = dict(self.server_tools)
+        for identifier, tools in server_tools.items():
+            cache[identifier] = {"tools": [], "cached_at": time.time()}
+            for tool in tools:
+                schema = tool.inputSchema if hasattr(tool, "inputSchema") else {}
+                cache[identifier]["tools"].append({
+                    "name": tool.name,
+                    "description": tool.description,
+                    "inputSchema": schema,
+                })
         try:
             os.makedirs(os.path.dirname(self._cache_path), exist_ok=True)
             with open(self._cache_path, "w") as f:
@@ -156,17 +161,30 @@ class MCPIntegration(NewelleExtension):
         except OSError as e:
             print(f"MCP cache write error: {e}")
 
-    def _background_refresh(self):
-        """Re-fetch tools from all servers and update the cache."""
-        old_tools = self.tools
-        old_dict = self.tools_dict
-        self.tools = []
-        self.tools_dict = {}
-        self.async_get_tools()
-        if not self.tools:
-            # Restore from previous state if refresh fails entirely
-            self.tools = old_tools
-            self.tools_dict = old_dict
+    def _update_tool_lists(self):
+        """Rebuild self.tools and self.tools_dict from the tools of the configured servers"""
+        with self._tools_lock:
+            tools = []
+            tools_dict = {}
+            for server in self.mcp_servers:
+                server_info = self._get_server_info(server)
+                for tool in self.server_tools.get(self._get_server_identifier(server_info), []):
+                    tools.append(tool)
+                    tools_dict[tool.name] = server_info
+            removed = [tool.name for tool in self.tools if tool.name not in tools_dict]
+            if self.tools and not tools:
+                removed.append("tool_search")
+            self.tools = tools
+            self.tools_dict = tools_dict
+        return removed
+
+    def _set_server_tools(self, identifier, tools):
+        """Replace the tools of a server and patch the tool registry"""
+        with self._tools_lock:
+            self.server_tools[identifier] = tools
+        removed = self._update_tool_lists()
+        if hasattr(self, "ui_controller"):
+            self.ui_controller.update_extension_tools(self, removed)
 
     def add_mcp_server(self, url=None, title=None, bearer_token=None, client_id=None, custom_headers=None,
                        server_type="http", command=None, args=None, env=None, oauth_mode=False):
@@ -218,11 +236,8 @@ class MCPIntegration(NewelleExtension):
 
     def commit_mcp_server(self, server_info, tools):
         """Add a successfully probed server to the live registry."""
-        self.tools.extend(tools)
-        for tool in tools:
-            self.tools_dict[tool.name] = server_info
         self.mcp_servers.append(server_info)
-        self.ui_controller.require_tool_update()
+        self._set_server_tools(self._get_server_identifier(server_info), tools)
         self._save_cache()
         return True
 
@@ -243,45 +258,74 @@ class MCPIntegration(NewelleExtension):
                 break
         if server_to_remove:
             self.mcp_servers.remove(server_to_remove)
-        self.tools = []
-        self.tools_dict = {}
-        self.update_tools()
+            MCPSessionPool.get_instance().close(identifier)
+        with self._tools_lock:
+            self.server_tools.pop(identifier, None)
+        self.discovery_stats.pop(identifier, None)
+        removed = self._update_tool_lists()
         self._save_cache()
         if hasattr(self, "ui_controller"):
-            self.ui_controller.require_tool_update()
+            self.ui_controller.update_extension_tools(self, removed)
         return True
 
     def update_tools(self):
-        t = threading.Thread(target=self.async_get_tools)
+        t = threading.Thread(target=self.async_get_tools, daemon=True)
         t.start()
 
+    def _discover_server(self, server_info) -> list:
+        """Fetch the tools of a server, giving up after DISCOVERY_TIMEOUT seconds"""
+        if server_info.get("type") == "stdio":
+            return self.sync_get_tools_stdio(
+                server_info["command"],
+                server_info.get("args") or [],
+                server_info.get("env"),
+                timeout=self.DISCOVERY_TIMEOUT
+            )
+        return self.sync_get_tools(
+            server_info["url"],
+            server_info=server_info,
+            client_id=server_info.get("client_id"),
+            timeout=self.DISCOVERY_TIMEOUT
+        )
+
     def async_get_tools(self) -> list:
-        for server in self.mcp_servers:
-            server_info = self._get_server_info(server)
-            identifier = self._get_server_identifier(server_info)
-            print(f"Loading tools from: {identifier}")
+        """Fetch the tools of every server concurrently
+
+        The tools of each server replace its previous ones as soon as it
+        answers. Servers that fail or time out keep their previous tools.
+        """
+        with self._refresh_lock:
+            servers = [self._get_server_info(server) for server in self.mcp_servers]
+
+            def discover(server_info):
+                identifier = self._get_server_identifier(server_info)
+                start = time.monotonic()
+                try:
+                    tools = self._discover_server(server_info)
+                except Exception as e:
+                    error = str(e) or type(e).__name__
+                    self.discovery_stats[identifier] = {
+                        "duration": time.monotonic() - start, "error": error, "tools": None, "time": time.time()
+                    }
+                    print(f"Error fetching tools from {identifier}: {error}")
+                    return
+                duration = time.monotonic() - start
+                self.discovery_stats[identifier] = {
+                    "duration": duration, "error": None, "tools": len(tools), "time": time.time()
+                }
+                print(f"Loaded {len(tools)} tools from {identifier} in {duration:.2f}s")
+                try:
+                    self._set_server_tools(identifier, tools)
+                except Exception as e:
+                    # Must not abort the discovery of the other servers
+                    print(f"Error registering tools from {identifier}: {e}")
+
             try:
-                if server_info.get("type") == "stdio":
-                    tools = self.sync_get_tools_stdio(
-                        server_info["command"], 
-                        server_info.get("args") or [], 
-                        server_info.get("env")
-                    )
-                else:
-                    tools = self.sync_get_tools(
-                        server_info["url"],
-                        server_info=server_info,
-                        client_id=server_info.get("client_id")
-                    )
-                print(tools)
-                self.tools.extend(tools)
-                for tool in tools:
-                    self.tools_dict[tool.name] = server_info
-            except Exception as e:
-                print(f"Error fetching tools from {identifier}: {e}")
-        self._save_cache()
-        if hasattr(self, "ui_controller"):
-            self.ui_controller.require_tool_update()
+                if servers:
+                    with ThreadPoolExecutor(max_workers=len(servers), thread_name_prefix="newelle-mcp-discovery") as executor:
+                        list(executor.map(discover, servers))
+            finally:
+                self._save_cache()
         return self.tools
 
     def execute_tool(self, name) -> str:
@@ -405,13 +449,16 @@ class MCPIntegration(NewelleExtension):
         return result
 
     def get_tools(self) -> list:
+        with self._tools_lock:
+            mcp_tools, tools_dict = self.tools, self.tools_dict
         tools = []
-        for tool in self.tools:
-            server_info = self.tools_dict.get(tool.name, {})
+        for tool in mcp_tools:
+            server_info = tools_dict.get(tool.name, {})
             tools_group = server_info.get("title") or server_info.get("url", "MCP")
             tools.append(Tool(
                 tool.name, tool.description, self.execute_tool(tool.name),
                 tool.inputSchema, tools_group=tools_group, default_lazy_load=True,
+                concurrent=True,
             ))
         if tools:
             tool_search = Tool(
@@ -477,12 +524,10 @@ class MCPIntegration(NewelleExtension):
             process_env.update(env)
         return StdioServerParameters(command=command, args=args, env=process_env)
 
-    def sync_get_tools(self, url, headers=None, client_id=None, server_info=None):
-        """Synchronous wrapper to get available tools (HTTP)"""
-        import asyncio
-        from mcp import ClientSession
+    def _http_session_args(self, url, headers=None, server_info=None):
+        """Return the pool identifier, fingerprint and connect callable of an HTTP server"""
         from mcp.client.streamable_http import streamablehttp_client
-        
+
         if headers is None:
             headers = {}
         resolved_headers = self._build_headers(
@@ -491,68 +536,36 @@ class MCPIntegration(NewelleExtension):
             server_info
         )
         request_url = (self._get_mcp_url_for_request(server_info) or url) if server_info else url
-        
-        async def _async_get_tools():
-            client_kwargs = {"url": request_url, "headers": resolved_headers}
-            async with streamablehttp_client(**client_kwargs) as (read, write, _):
-                async with ClientSession(read, write) as session:
-                    await session.initialize()
-                    tools = await session.list_tools()
-                    return tools.tools
-        return asyncio.run(_async_get_tools())
+        # A refreshed OAuth token changes the headers, and opens a new session
+        identifier = self._get_server_identifier(server_info) if server_info and server_info.get("url") else url
+        fingerprint = (request_url, tuple(sorted(resolved_headers.items())))
+        return identifier, fingerprint, lambda: streamablehttp_client(url=request_url, headers=resolved_headers)
+
+    def _stdio_session_args(self, command, args=None, env=None):
+        """Return the pool identifier, fingerprint and connect callable of a stdio server"""
+        from mcp.client.stdio import stdio_client
+
+        args = args or []
+        identifier = self._get_server_identifier({"type": "stdio", "command": command, "args": args})
+        fingerprint = (command, tuple(args), json.dumps(env, sort_keys=True))
+        return identifier, fingerprint, lambda: stdio_client(self._stdio_server_params(command, args, env))
+
+    def sync_get_tools(self, url, headers=None, client_id=None, server_info=None, timeout=None):
+        """Synchronous wrapper to get available tools (HTTP)"""
+        return MCPSessionPool.get_instance().list_tools(*self._http_session_args(url, headers, server_info), timeout=timeout)
 
     def sync_call_tool(self, url, tool_name, arguments, headers=None, client_id=None, server_info=None):
         """Synchronous wrapper to call a tool"""
-        import asyncio
-        from mcp import ClientSession
-        from mcp.client.streamable_http import streamablehttp_client
-        
-        if headers is None:
-            headers = {}
-        resolved_headers = self._build_headers(
-            server_info.get("bearer_token") if server_info else None,
-            server_info.get("custom_headers") if server_info else headers,
-            server_info
+        return MCPSessionPool.get_instance().call_tool(
+            *self._http_session_args(url, headers, server_info), tool_name, arguments
         )
-        request_url = (self._get_mcp_url_for_request(server_info) or url) if server_info else url
-        
-        async def _async_call_tool():
-            client_kwargs = {"url": request_url, "headers": resolved_headers}
-            async with streamablehttp_client(**client_kwargs) as (read, write, _):
-                async with ClientSession(read, write) as session:
-                    await session.initialize()
-                    result = await session.call_tool(tool_name, arguments=arguments)
-                    return result
-        return asyncio.run(_async_call_tool())
-
-    def sync_get_tools_stdio(self, command, args=None, env=None):
+
+    def sync_get_tools_stdio(self, command, args=None, env=None, timeout=None):
         """Synchronous wrapper to get available tools from stdio server"""
-        import asyncio
-        from mcp.client.stdio import stdio_client
-        from mcp import ClientSession
-
-        async def _async_get_tools():
-            server_params = self._stdio_server_params(command, args, env)
-            async with stdio_client(server_params) as (read, write):
-                async with ClientSession(read, write) as session:
-                    await session.initialize()
-                    tools = await session.list_tools()
-                    return tools.tools
-        
-        return asyncio.run(_async_get_tools())
+        return MCPSessionPool.get_instance().list_tools(*self._stdio_session_args(command, args, env), timeout=timeout)
 
     def sync_call_tool_stdio(self, command, args, env, tool_name, arguments):
         """Synchronous wrapper to call a tool on stdio server"""
-        import asyncio
-        from mcp.client.stdio import stdio_client
-        from mcp import ClientSession
-
-        async def _async_call_tool():
-            server_params = self._stdio_server_params(command, args, env)
-            async with stdio_client(server_params) as (read, write):
-                async with ClientSession(read, write) as session:
-                    await session.initialize()
-                    result = await session.call_tool(tool_name, arguments=arguments)
-                    return result
-        
-        return asyncio.run(_async_call_tool())
+        return MCPSessionPool.get_instance().call_tool(
+            *self._stdio_session_args(command, args, env), tool_name, arguments
+        )
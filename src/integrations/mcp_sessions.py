@@ -0,0 +1,274 @@
+"""Long lived MCP client sessions.
+
+Opening an MCP session spawns the server process (often through npx or uvx,
+which take seconds to start) or opens an HTTP connection, then runs the
+initialize handshake. `MCPSessionPool` keeps one initialized session per
+configured server on a dedicated asyncio loop thread, so tool calls only
+pay for the request itself:
+
+    pool = MCPSessionPool.get_instance()
+    result = pool.call_tool(identifier, fingerprint, connect, "tool", {"a": 1})
+
+connect returns the async context manager opening the transport, like
+``stdio_client(params)``. The fingerprint holds everything the session was
+opened with (command, env, headers...), a session opened with a different
+one is closed and opened again.
+
+Sessions that were not used for a while are pinged before the next call,
+and restarted if the server stopped answering. Idle sessions are closed,
+servers failing to start are retried with exponential backoff, and the
+number of concurrent requests per server is limited.
+"""
+
+import asyncio
+import atexit
+import concurrent.futures
+import threading
+import time
+from typing import Any, Callable
+
+
+class _ServerSession:
+    """Session of one server, owned by a task of the pool loop"""
+
+    def __init__(self, fingerprint, max_concurrent: int):
+        self.fingerprint = fingerprint
+        self.session = None
+        self.task: asyncio.Task | None = None
+        self.closing = asyncio.Event()
+        self.start_lock = asyncio.Lock()
+        self.semaphore = asyncio.Semaphore(max_concurrent)
+        self.in_flight = 0
+        self.last_used = time.monotonic()
+        self.failures = 0
+        self.retry_at = 0.0
+        self.last_error: Exception | None = None
+
+    @property
+    def alive(self) -> bool:
+        return self.session is not None and self.task is not None and not self.task.done()
+
+
+class MCPSessionPool:
+    """Process-wide pool of initialized MCP client sessions
+
+    Args:
+        idle_timeout: seconds after which an unused session is closed
+        max_concurrent: requests sent to the same server at the same time
+    """
+    START_TIMEOUT = 60
+    CLOSE_TIMEOUT = 5
+    # Sessions unused for longer are pinged before a call
+    HEALTH_CHECK_AFTER = 30
+    PING_TIMEOUT = 5
+    BACKOFF_BASE = 1
+    BACKOFF_MAX = 60
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls) -> "MCPSessionPool":
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+                atexit.register(cls._instance.shutdown)
+            return cls._instance
+
+    def __init__(self, idle_timeout: float = 600, max_concurrent: int = 4):
+        self.idle_timeout = idle_timeout
+        self.max_concurrent = max_concurrent
+        self._sessions: dict[str, _ServerSession] = {}
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, daemon=True, name="newelle-mcp-sessions")
+        self._thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.create_task(self._reap_idle())
+        self._loop.run_forever()
+
+    def _submit(self, coro, timeout: float | None = None):
+        """Run a coroutine on the pool loop and wait for its result"""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout)
+
+    # --- Synchronous API ---
+
+    def call_tool(self, identifier: str, fingerprint, connect: Callable[[], Any], tool_name: str, arguments: dict):
+        """Call a tool on a server, opening its session if needed
+
+        Args:
+            identifier: unique identifier of the server
+            fingerprint: hashable value of the session configuration
+            connect: returns the async context manager opening the transport
+            tool_name: name of the tool
+            arguments: arguments of the tool
+        """
+        return self._submit(self._request(identifier, fingerprint, connect,
+                                          lambda session: session.call_tool(tool_name, arguments=arguments)))
+
+    def list_tools(self, identifier: str, fingerprint, connect: Callable[[], Any], timeout: float | None = None) -> list:
+        """Return the tools of a server, opening its session if needed
+
+        Raises TimeoutError if the server did not answer within timeout
+        seconds, the request is then cancelled.
+        """
+        future = asyncio.run_coroutine_threadsafe(
+            self._request(identifier, fingerprint, connect, lambda session: session.list_tools()), self._loop
+        )
+        try:
+            result = future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise TimeoutError(f"MCP server {identifier} did not answer in {timeout}s")
+        return result.tools
+
+    def close(self, identifier: str):
+        """Close the session of a server in the background, if open"""
+        asyncio.run_coroutine_threadsafe(self._close(identifier), self._loop)
+
+    def shutdown(self):
+        """Close every session, stopping the server processes"""
+        if self._loop.is_closed() or not self._loop.is_running():
+            return
+        try:
+            self._submit(self._close_all(), self.CLOSE_TIMEOUT * 2)
+        except Exception as e:
+            print(f"MCP: error closing sessions: {e}")
+
+    # --- Pool loop ---
+
+    async def _request(self, identifier: str, fingerprint, connect, send):
+        import anyio
+        from mcp.shared.exceptions import McpError
+
+        for attempt in range(2):
+            entry = await self._get_session(identifier, fingerprint, connect)
+            async with entry.semaphore:
+                entry.in_flight += 1
+                try:
+                    return await send(entry.session)
+                except McpError:
+                    # Error answered by the server, the session is fine
+                    raise
+                except (anyio.ClosedResourceError, anyio.BrokenResourceError):
+                    # The server exited, the request was not sent: retry it once on a new session
+                    await self._discard(identifier, entry)
+                    if attempt > 0:
+                        raise
+                except Exception:
+                    # Transport failure, open a new session on the next request
+                    await self._discard(identifier, entry)
+                    raise
+                finally:
+                    entry.in_flight -= 1
+                    entry.last_used = time.monotonic()
+
+    async def _get_session(self, identifier: str, fingerprint, connect) -> _ServerSession:
+        entry = self._sessions.get(identifier)
+        if entry is not None and entry.fingerprint != fingerprint:
+            await self._discard(identifier, entry)
+            entry = None
+        if entry is None:
+            entry = _ServerSession(fingerprint, self.max_concurrent)
+            self._sessions[identifier] = entry
+        async with entry.start_lock:
+            if entry.alive and time.monotonic() - entry.last_used > self.HEALTH_CHECK_AFTER:
+                if not await self._ping(entry):
+                    print(f"MCP: {identifier} stopped answering, restarting it")
+                    await self._stop(entry)
+            if not entry.alive:
+                await self._start(identifier, entry, connect)
+            entry.last_used = time.monotonic()
+        return entry
+
+    async def _ping(self, entry: _ServerSession) -> bool:
+        try:
+            await asyncio.wait_for(entry.session.send_ping(), self.PING_TIMEOUT)
+            return True
+        except Exception:
+            return False
+
+    async def _start(self, identifier: str, entry: _ServerSession, connect):
+        wait = entry.retry_at - time.monotonic()
+        if wait > 0:
+            raise RuntimeError(f"MCP server {identifier} failed to start, retrying in {wait:.0f}s: {entry.last_error}")
+        entry.closing = asyncio.Event()
+        ready = self._loop.create_future()
+        entry.task = self._loop.create_task(self._serve(entry, connect, ready))
+        try:
+            await asyncio.wait_for(asyncio.shield(ready), self.START_TIMEOUT)
+        except asyncio.CancelledError:
+            # The caller gave up, not a failure of the server
+            await self._stop(entry)
+            raise
+        except Exception as e:
+            await self._stop(entry)
+            entry.failures += 1
+            entry.last_error = e if not isinstance(e, asyncio.TimeoutError) else TimeoutError("initialize timed out")
+            entry.retry_at = time.monotonic() + min(self.BACKOFF_MAX, self.BACKOFF_BASE * 2 ** (entry.failures - 1))
+            raise
+        entry.failures = 0
+        entry.last_error = None
+
+    async def _serve(self, entry: _ServerSession, connect, ready: asyncio.Future):
+        """Keep a session open until it is closed
+
+        The transport and the session are entered and exited in this task,
+        as their cancel scopes require.
+        """
+        from mcp import ClientSession
+
+        try:
+            async with connect() as streams:
+                read, write = streams[0], streams[1]
+                async with ClientSession(read, write) as session:
+                    await session.initialize()
+                    entry.session = session
+                    ready.set_result(session)
+                    await entry.closing.wait()
+        except asyncio.CancelledError:
+            if not ready.done():
+                ready.cancel()
+        except Exception as e:
+            if not ready.done():
+                ready.set_exception(e)
+            else:
+                print(f"MCP: session closed with an error: {e}")
+        finally:
+            entry.session = None
+
+    async def _stop(self, entry: _ServerSession):
+        task = entry.task
+        entry.session = None
+        if task is None or task.done():
+            return
+        entry.closing.set()
+        try:
+            await asyncio.wait_for(asyncio.shield(task), self.CLOSE_TIMEOUT)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            task.cancel()
+        except Exception:
+            pass
+
+    async def _discard(self, identifier: str, entry: _ServerSession):
+        if self._sessions.get(identifier) is entry:
+            del self._sessions[identifier]
+        await self._stop(entry)
+
+    async def _close(self, identifier: str):
+        entry = self._sessions.get(identifier)
+        if entry is not None:
+            await self._discard(identifier, entry)
+
+    async def _close_all(self):
+        await asyncio.gather(*(self._close(identifier) for identifier in list(self._sessions)))
+
+    async def _reap_idle(self):
+        while True:
+            await asyncio.sleep(min(60, self.idle_timeout / 2))
+            now = time.monotonic()
+            for identifier, entry in list(self._sessions.items()):
+                if entry.alive and entry.in_flight == 0 and now - entry.last_used > self.idle_timeout:
+                    print(f"MCP: closing idle session of {identifier}")
+                    await self._discard(identifier, entry)
@@ -134,12 +134,12 @@ class MyApp(Adw.Application):
         }
 
         /* Chat history row styling */
-        .navigation-sidebar row.chat-row-selected {
+        .navigation-sidebar .chat-row-selected {
           background-color: alpha(@accent_bg_color, 0.15);
           border-radius: 6px;
         }
         
-        .navigation-sidebar row.chat-row-selected:hover {
+        .navigation-sidebar .chat-row-selected:hover {
           background-color: alpha(@accent_bg_color, 0.25);
         }
 
@@ -158,12 +158,12 @@ class MyApp(Adw.Application):
         }
 
         /* Folder row styling */
-        .navigation-sidebar row.folder-row {
+        .navigation-sidebar .folder-row {
           border-radius: 6px;
           margin-top: 2px;
         }
 
-        .navigation-sidebar row.folder-row-drop-hover {
+        .navigation-sidebar .folder-row-drop-hover {
           background-color: alpha(@accent_bg_color, 0.20);
           border-radius: 6px;
         }
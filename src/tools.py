@@ -1,3 +1,4 @@
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Any, Callable, Dict, List, Optional
 import inspect
 import threading
@@ -146,7 +147,7 @@ class Command:
         return func_to_call(**kwargs)
 
 class Tool:
-    def __init__(self, name: str, description: str, func: Callable, schema: Dict[str, Any] = None, run_on_main_thread: bool = False, title: str = None, prompt_editable: bool = True, restore_func: Callable = None, default_on: bool = True, tools_group: str = None, icon_name: str = None, default_lazy_load: bool = False):
+    def __init__(self, name: str, description: str, func: Callable, schema: Dict[str, Any] = None, run_on_main_thread: bool = False, title: str = None, prompt_editable: bool = True, restore_func: Callable = None, default_on: bool = True, tools_group: str = None, icon_name: str = None, default_lazy_load: bool = False, concurrent: bool = False):
         self.name = name
         self.description = description
         self.func = func
@@ -159,6 +160,9 @@ class Tool:
         self.tools_group = tools_group
         self.icon_name = icon_name
         self.default_lazy_load = default_lazy_load
+        # Non-interactive tools whose output can be awaited alongside the
+        # other tool calls of the same model turn (see ToolCallScheduler).
+        self.concurrent = concurrent
 
     def restore(self, **kwargs):
         if self.restore_func is not None:
@@ -210,21 +214,84 @@ class Tool:
                 kwargs.pop(param, None)
         return self.func(**kwargs)
 
+class ToolCallScheduler:
+    """Runs the independent tool calls of a model turn together.
+
+    Tools flagged ``concurrent`` return their ToolResult right away and
+    produce the output in the background, or are thread-safe and GTK-free.
+    A run of consecutive concurrent calls is started in order, on the main
+    thread when the caller requires it (only the widget part runs there),
+    otherwise on a bounded pool, and the outputs are collected afterwards in
+    call order. Every other call keeps running inline as a barrier.
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self.max_workers = max_workers
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def can_run_concurrently(self, tool: Tool | None) -> bool:
+        return tool is not None and tool.concurrent
+
+    @staticmethod
+    def completed(result=None, error: Exception | None = None) -> Future:
+        """Return a future already holding the result of a call started inline"""
+        future = Future()
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+        return future
+
+    def submit(self, tool: Tool, **kwargs) -> Future:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="newelle-tool"
+                )
+        return self._executor.submit(tool.execute, **kwargs)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
 class ToolRegistry:
     def __init__(self):
         self._tools: Dict[str, Tool] = {}
-
-    def register_tool(self, tool: Tool):
-        self._tools[tool.name] = tool
+        # Tool name -> extension that registered it, None for built-in tools
+        self._owners: Dict[str, Any] = {}
+        # Extensions update their tools from worker threads
+        self._lock = threading.Lock()
+
+    def register_tool(self, tool: Tool, owner: Any = None):
+        with self._lock:
+            self._tools[tool.name] = tool
+            self._owners[tool.name] = owner
     
-    def remove_tool(self, tool_name):
-        del self._tools[tool_name]
+    def remove_tool(self, tool_name, owner: Any = None) -> bool:
+        """Remove a tool, if owner is given only when that extension registered it
+
+        Returns:
+            bool: True if the tool was removed
+        """
+        with self._lock:
+            if tool_name not in self._tools:
+                return False
+            if owner is not None and self._owners.get(tool_name) is not owner:
+                return False
+            del self._tools[tool_name]
+            self._owners.pop(tool_name, None)
+            return True
 
     def get_tool(self, name: str) -> Optional[Tool]:
         return self._tools.get(name)
 
     def get_all_tools(self) -> List[Tool]:
-        return list(self._tools.values())
+        with self._lock:
+            return list(self._tools.values())
 
     def execute_tool(self, name: str, arguments: Dict[str, Any]) -> Any:
         tool = self.get_tool(name)
@@ -347,7 +414,9 @@ class ToolRegistry:
         """
         
         available_tools = []
-        for tool_name, tool_obj in self._tools.items():
+        with self._lock:
+            tools = list(self._tools.items())
+        for tool_name, tool_obj in tools:
             is_enabled = tool_obj.default_on
             if enabled_tools_dict is not None:
                 is_enabled = enabled_tools_dict.get(tool_name, tool_obj.default_on)
@@ -432,14 +501,14 @@ class ToolRegistry:
         return new_prompts
 
 
-def tool(name: str, description: str, run_on_main_thread: bool = False, title: str = None, prompt_editable: bool = True, restore_func: Callable = None, default_on: bool = True, tools_group: str = None, icon_name: str = None):
+def tool(name: str, description: str, run_on_main_thread: bool = False, title: str = None, prompt_editable: bool = True, restore_func: Callable = None, default_on: bool = True, tools_group: str = None, icon_name: str = None, concurrent: bool = False):
     """Decorator to register a function as a tool."""
     def decorator(func):
-        t = Tool(name, description, func, run_on_main_thread=run_on_main_thread, title=title, prompt_editable=prompt_editable, restore_func=restore_func, default_on=default_on, tools_group=tools_group, icon_name=icon_name)
+        t = Tool(name, description, func, run_on_main_thread=run_on_main_thread, title=title, prompt_editable=prompt_editable, restore_func=restore_func, default_on=default_on, tools_group=tools_group, icon_name=icon_name, concurrent=concurrent)
         return t
     return decorator
 
-def create_io_tool(name: str, description: str, func: Callable, title: str = None, create_separate_process=False, default_on: bool = True, tools_group: str = None, icon_name: str = None, default_lazy_load: bool = False) -> Tool:
+def create_io_tool(name: str, description: str, func: Callable, title: str = None, create_separate_process=False, default_on: bool = True, tools_group: str = None, icon_name: str = None, default_lazy_load: bool = False, concurrent: bool = False) -> Tool:
     def wrapper(**kwargs):
         result = ToolResult()
         def th():
@@ -448,7 +517,7 @@ def create_io_tool(name: str, description: str, func: Callable, title: str = Non
         GLib.idle_add(t.start)
         return result
 
-    t = Tool(name, description, wrapper, title=title, default_on=default_on, tools_group=tools_group, icon_name=icon_name, restore_func=None, default_lazy_load=default_lazy_load)
+    t = Tool(name, description, wrapper, title=title, default_on=default_on, tools_group=tools_group, icon_name=icon_name, restore_func=None, default_lazy_load=default_lazy_load, concurrent=concurrent)
     schema = t._generate_schema_from_func(func)
     t.schema = schema
     return t
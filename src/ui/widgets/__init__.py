@@ -30,6 +30,7 @@ from .question import QuestionWidget, RestoredQuestionWidget
 from .message import Message
 from .chatrow import ChatRow
 from .folderrow import FolderRow
+from .chat_sidebar import ChatSidebar
 from .chat_history import ChatHistory
 from .chat_tab import ChatTab
 from .mode_switcher import ModeButton
@@ -77,6 +78,7 @@ __all__ = [
     "Message",
     "ChatRow",
     "FolderRow",
+    "ChatSidebar",
     "ChatHistory",
     "ChatTab",
     "ModeButton",
@@ -1,14 +1,11 @@
 from gi.repository import Gtk, GLib, Gio, GObject, Gdk
 import threading
 import time
-import os
-import wave
 import pyaudio
 import gettext
-import tempfile
-from collections import deque
 
 from ...utility.strings import clean_bot_response, clean_message_tts
+from ...utility.audio_frames import PreRollBuffer
 from ...utility.vad import VoiceActivityDetector
 
 
@@ -770,7 +767,7 @@ class AvatarCallWidget(Gtk.Box):
         """Main recording loop with VAD"""
         audio_stream = None
         pyaudio_instance = None
-        audio_prebuffer = deque(maxlen=self.prebuffer_chunks)
+        audio_prebuffer = PreRollBuffer(self.prebuffer_chunks * self.chunk_size * self.channels)
         speech_buffer = []
         finalize_deadline = None
         capture_is_barge_in = False
@@ -865,7 +862,7 @@ class AvatarCallWidget(Gtk.Box):
                     if continuing_utterance:
                         finalize_deadline = None
                     else:
-                        speech_buffer = list(audio_prebuffer)
+                        speech_buffer = [audio_prebuffer.get()]
                         started_new_capture = True
                         capture_is_barge_in = (
                             turn_in_progress
@@ -995,27 +992,12 @@ class AvatarCallWidget(Gtk.Box):
         turn_thread.start()
 
     def _run_turn(self, audio_data, call_generation):
-        """Write one immutable capture, process it, and release the turn."""
-        temp_path = None
+        """Process one immutable capture and release the turn."""
         try:
             if not self._is_current_call(call_generation):
                 return
 
-            with tempfile.NamedTemporaryFile(
-                dir=self.controller.cache_dir,
-                prefix="call_recording_",
-                suffix=".wav",
-                delete=False,
-            ) as temporary_file:
-                temp_path = temporary_file.name
-
-            with wave.open(temp_path, 'wb') as wf:
-                wf.setnchannels(self.channels)
-                wf.setsampwidth(2)  # 16-bit
-                wf.setframerate(self.sample_rate)
-                wf.writeframes(audio_data)
-
-            self._recognize_and_respond(temp_path, call_generation)
+            self._recognize_and_respond(audio_data, call_generation)
         except Exception as e:
             import traceback
             print(f"Error processing call audio: {e}")
@@ -1028,13 +1010,6 @@ class AvatarCallWidget(Gtk.Box):
                 True,
             )
         finally:
-            if temp_path is not None:
-                try:
-                    os.remove(temp_path)
-                except FileNotFoundError:
-                    pass
-                except Exception as e:
-                    print(f"Could not remove temporary call recording: {e}")
             self._finish_turn(call_generation)
 
     def _finish_turn(self, call_generation):
@@ -1073,7 +1048,7 @@ class AvatarCallWidget(Gtk.Box):
             self.processing_thread = turn_thread
         turn_thread.start()
 
-    def _recognize_and_respond(self, audio_path, call_generation):
+    def _recognize_and_respond(self, audio_data, call_generation):
         """Recognize speech and get AI response"""
         try:
             if not self._is_current_call(call_generation):
@@ -1092,7 +1067,7 @@ class AvatarCallWidget(Gtk.Box):
                 return
 
             # Recognize
-            text = stt.recognize_file(audio_path)
+            text = stt.recognize_pcm(audio_data, self.sample_rate, self.channels)
             if not self._is_current_call(call_generation) or not text or text.strip() == "":
                 return
 
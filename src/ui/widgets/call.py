@@ -2,16 +2,12 @@ from gi.repository import Gtk, Adw, GLib, Gio, GObject, Gdk
 import threading
 import time
 import os
-import wave
-import struct
-import math
 import gettext
 import pyaudio
-import re
-import tempfile
-from collections import deque
 
-from ...utility.strings import clean_message_tts, remove_emoji, remove_markdown, remove_thinking_blocks
+from ...utility.speech_pipeline import SpeechLatencyTrace, SpeechPipeline
+from ...utility.streaming import StreamView, stream_updates
+from ...utility.audio_frames import PreRollBuffer, band_rms
 from ...utility.vad import VoiceActivityDetector
 
 
@@ -253,6 +249,9 @@ class CallPanel(Gtk.Box):
         self._active_turn_generation = None
         self._pending_barge_in = None
         self._barge_in_capture = False
+        self._speech_pipeline = None
+        # SpeechLatencyTrace of the last completed voice turn
+        self.latency_trace = None
 
         # Get username
         self.username = self.controller.newelle_settings.username
@@ -598,8 +597,7 @@ class CallPanel(Gtk.Box):
     def _on_speaker_clicked(self, button):
         """Handle speaker button click"""
         # Stop TTS playback
-        if hasattr(self.controller, 'handlers') and self.controller.handlers.tts:
-            self.controller.handlers.tts.stop()
+        self._stop_speaking()
 
     def _on_history_clicked(self, button):
         """Handle history toggle button click"""
@@ -708,8 +706,7 @@ class CallPanel(Gtk.Box):
             self.pyaudio_instance = None
         
         # Stop TTS
-        if hasattr(self.controller, 'handlers') and self.controller.handlers.tts:
-            self.controller.handlers.tts.stop()
+        self._stop_speaking()
         
         # Update UI
         GLib.idle_add(self._update_ui_after_end, ended_generation)
@@ -772,7 +769,7 @@ class CallPanel(Gtk.Box):
         """Main recording loop with VAD"""
         audio_stream = None
         pyaudio_instance = None
-        audio_prebuffer = deque(maxlen=self.prebuffer_chunks)
+        audio_prebuffer = PreRollBuffer(self.prebuffer_chunks * self.chunk_size * self.channels)
         speech_buffer = []
         finalize_deadline = None
         capture_is_barge_in = False
@@ -870,7 +867,7 @@ class CallPanel(Gtk.Box):
                     if continuing_utterance:
                         finalize_deadline = None
                     else:
-                        speech_buffer = list(audio_prebuffer)
+                        speech_buffer = [audio_prebuffer.get()]
                         started_new_capture = True
                         capture_is_barge_in = (
                             turn_in_progress
@@ -930,29 +927,13 @@ class CallPanel(Gtk.Box):
     def _update_waveform(self, audio_data):
         """Update waveform visualization"""
         # Calculate energy for visualization
-        count = len(audio_data) // 2
-        if count == 0:
+        if len(audio_data) < 2:
             return
         
         try:
-            shorts = struct.unpack("<" + str(count) + "h", audio_data)
-            # Split into segments for bars
-            segment_size = max(1, len(shorts) // 12)
-            
-            new_levels = []
-            for i in range(12):
-                start = i * segment_size
-                end = min(start + segment_size, len(shorts))
-                segment = shorts[start:end]
-                if segment:
-                    rms = math.sqrt(sum(s * s for s in segment) / len(segment))
-                    # Normalize and scale
-                    level = min(1.0, rms / 10000)
-                    new_levels.append(level)
-                else:
-                    new_levels.append(0)
-            
-            self.wave_levels = new_levels
+            # One RMS per bar, normalized and scaled
+            levels = band_rms(audio_data, 12) / 10000
+            self.wave_levels = [min(1.0, level) for level in levels.tolist()]
             GLib.idle_add(self._update_wave_bars)
         except Exception:
             pass
@@ -975,8 +956,7 @@ class CallPanel(Gtk.Box):
         
         # Interrupt TTS if playing
         if self.assistant_speaking:
-            if hasattr(self.controller, 'handlers') and self.controller.handlers.tts:
-                self.controller.handlers.tts.stop()
+            self._stop_speaking()
             self.assistant_speaking = False
     
     def _on_speech_ended(self, call_generation):
@@ -1035,27 +1015,12 @@ class CallPanel(Gtk.Box):
         turn_thread.start()
 
     def _run_turn(self, audio_data, call_generation):
-        """Write one immutable capture, process it, and release the turn."""
-        temp_path = None
+        """Process one immutable capture and release the turn."""
         try:
             if not self._is_current_call(call_generation):
                 return
 
-            with tempfile.NamedTemporaryFile(
-                dir=self.controller.cache_dir,
-                prefix="call_recording_",
-                suffix=".wav",
-                delete=False,
-            ) as temporary_file:
-                temp_path = temporary_file.name
-
-            with wave.open(temp_path, 'wb') as wf:
-                wf.setnchannels(self.channels)
-                wf.setsampwidth(2)  # 16-bit
-                wf.setframerate(self.sample_rate)
-                wf.writeframes(audio_data)
-
-            self._recognize_and_respond(temp_path, call_generation)
+            self._recognize_and_respond(audio_data, call_generation)
         except Exception as e:
             import traceback
             print(f"Error processing call audio: {e}")
@@ -1068,13 +1033,6 @@ class CallPanel(Gtk.Box):
                 True,
             )
         finally:
-            if temp_path is not None:
-                try:
-                    os.remove(temp_path)
-                except FileNotFoundError:
-                    pass
-                except Exception as e:
-                    print(f"Could not remove temporary call recording: {e}")
             self._finish_turn(call_generation)
 
     def _finish_turn(self, call_generation):
@@ -1113,7 +1071,7 @@ class CallPanel(Gtk.Box):
             self.processing_thread = turn_thread
         turn_thread.start()
     
-    def _recognize_and_respond(self, audio_path, call_generation):
+    def _recognize_and_respond(self, audio_data, call_generation):
         """Recognize speech and get AI response"""
         try:
             if not self._is_current_call(call_generation):
@@ -1132,7 +1090,7 @@ class CallPanel(Gtk.Box):
                 return
 
             # Recognize
-            text = stt.recognize_file(audio_path)
+            text = stt.recognize_pcm(audio_data, self.sample_rate, self.channels)
             if not self._is_current_call(call_generation) or not text or text.strip() == "":
                 return
 
@@ -1161,17 +1119,37 @@ class CallPanel(Gtk.Box):
             )
     
     def _get_ai_response(self, user_message, call_generation):
-        """Get AI response and play TTS using run_llm_with_tools"""
+        """Get AI response using run_llm_with_tools, speaking each sentence as soon as it is generated"""
+        pipeline = None
+        completed = False
         try:
             if not self._is_current_call(call_generation):
                 return
 
             if self.chat_id is None:
                 self.chat_id = self.controller.create_call_chat()
-            streaming_text = ""
-            def on_message_callback(text):
-                nonlocal streaming_text
-                streaming_text += text
+            trace = SpeechLatencyTrace()
+            tts = self.controller.handlers.tts
+            if tts:
+                pipeline = self._start_speech_pipeline(tts, call_generation, trace)
+            view = StreamView()
+
+            @stream_updates
+            def on_message_callback(update):
+                previous_length = len(view)
+                offset, delta, new_stream = view.apply(update)
+                if delta.strip():
+                    trace.mark("first_token")
+                if pipeline is None:
+                    return
+                if new_stream:
+                    # Next tool iteration, what the previous one said is still spoken
+                    pipeline.new_stream()
+                    pipeline.feed(view.text)
+                elif offset < previous_length:
+                    pipeline.rewrite(view.text)
+                else:
+                    pipeline.feed(delta)
 
             def on_tool_result_callback(tool_name, result):
                 tool_output = result.get_output() if result else "Tool executed"
@@ -1204,8 +1182,16 @@ class CallPanel(Gtk.Box):
                     response,
                     False,
                 )
-                response = clean_message_tts(response)
-                self._play_tts(response, call_generation)
+                if pipeline is not None:
+                    # Some handlers don't stream the end of what they return
+                    streamed = view.text
+                    if len(response) > len(streamed) and response.startswith(streamed):
+                        pipeline.feed(response[len(streamed):])
+                    pipeline.finish()
+                    pipeline.wait()
+                    completed = True
+            trace.mark("end_of_turn")
+            self.latency_trace = trace
 
         except Exception as e:
             import traceback
@@ -1220,25 +1206,20 @@ class CallPanel(Gtk.Box):
                 _("Error getting response. Please try again."),
                 True
             )
-    
-    def _clean_response(self, response):
-        """Clean response for TTS"""
-        response = remove_thinking_blocks(response)
-        response = remove_markdown(response)
-        response = re.sub(r'\[([^\]]+)\]\([^\)]+\)', r'\1', response)
-        # Remove emoji 
-        response = remove_emoji(response) 
-        return response.strip()
-    
-    def _play_tts(self, text, call_generation):
-        """Play TTS for the response"""
-        if not text or not self._is_current_call(call_generation):
-            return
-
-        tts = self.controller.handlers.tts
-        if not tts:
-            return
+        finally:
+            if pipeline is not None:
+                if not completed:
+                    pipeline.cancel()
+                if self._speech_pipeline is pipeline:
+                    self._speech_pipeline = None
+                GLib.idle_add(
+                    self._set_assistant_speaking,
+                    call_generation,
+                    False,
+                )
 
+    def _start_speech_pipeline(self, tts, call_generation, trace):
+        """Start speaking a turn, the assistant is speaking from the first sentence to the last"""
         def on_tts_start():
             GLib.idle_add(
                 self._set_assistant_speaking,
@@ -1246,27 +1227,24 @@ class CallPanel(Gtk.Box):
                 True,
             )
 
-        def on_tts_stop():
-            GLib.idle_add(
-                self._set_assistant_speaking,
-                call_generation,
-                False,
-            )
-
         tts.connect("start", on_tts_start)
-        tts.connect("stop", on_tts_stop)
-
-        try:
-            tts.play(text)
-        except Exception as e:
-            import traceback
-            print(f"TTS error: {e}")
-            print(traceback.format_exc())
-            GLib.idle_add(
-                self._set_assistant_speaking,
-                call_generation,
-                False,
-            )
+        tts.connect("stop", lambda: None)
+        pipeline = SpeechPipeline(
+            tts,
+            lambda: self._is_current_call(call_generation),
+            lookahead=2,
+            trace=trace,
+        )
+        self._speech_pipeline = pipeline
+        return pipeline
+
+    def _stop_speaking(self):
+        """Stop TTS playback and drop the sentences of the answer not spoken yet"""
+        pipeline = self._speech_pipeline
+        if pipeline is not None:
+            pipeline.cancel()
+        if hasattr(self.controller, 'handlers') and self.controller.handlers.tts:
+            self.controller.handlers.tts.stop()
     
     def _set_assistant_speaking(self, call_generation, speaking):
         """Update assistant speaking state"""
@@ -1264,6 +1264,7 @@ class ChatHistory(Gtk.Box):
 
         apply_edit_stack.set_visible_child_name("edit")
         self.chat[int(gesture.get_name())]["Message"] = entry.get_text()
+        self.controller.mark_message_changed(self.chat_id, int(gesture.get_name()))
         self.controller.save_chats()
         content_box.remove(entry)
         content_box.append(
@@ -1337,6 +1338,7 @@ class ChatHistory(Gtk.Box):
         """Store prompt text on the most recently appended chat entry."""
         if prompt is not None and self.chat:
             self.chat[-1]["Prompt"] = prompt
+            self.controller.mark_message_changed(self.chat_id, len(self.chat) - 1)
 
     def show_prompt(self, button, id):
         """Show a prompt
@@ -0,0 +1,365 @@
+"""Chat sidebar listing folders and chats
+
+The sidebar is a Gtk.ListView, only the rows on screen have widgets and
+they are recycled while scrolling. Folders and chats are `SidebarItem`
+objects kept in Gio.ListStore models: folders and chats with branches hold
+their children in a store of their own, and a Gtk.TreeListModel flattens
+them into rows. The top level goes through a Gtk.FilterListModel, hiding
+call chats, and a Gtk.SortListModel, putting folders first and ordering
+chats by creation.
+
+`ChatSidebar.update` compares the chats with the items and only changes
+what differs: properties of existing items, whose rows update through
+notify, and the ranges of the stores that changed.
+"""
+import bisect
+
+from gi.repository import Adw, Gtk, Gio, Gdk, GLib, GObject
+
+from .chatrow import ChatRow
+from .folderrow import FolderRow
+
+
+class SidebarItem(GObject.Object):
+    """A folder or a chat of the sidebar
+
+    Args:
+        kind: "folder" or "chat"
+        item_id: id of the folder or chat
+        children: store of the items under this one, None if it has none
+        expanded: if the children are shown
+        call: if the chat is a call, calls are not listed
+    """
+    name = GObject.Property(type=str, default="")
+    selected = GObject.Property(type=bool, default=False)
+    is_open = GObject.Property(type=bool, default=False)
+    color = GObject.Property(type=str, default="")
+    icon = GObject.Property(type=str, default="")
+
+    def __init__(self, kind: str, item_id: int, children: Gio.ListStore | None = None,
+                 expanded: bool = True, call: bool = False):
+        super().__init__()
+        self.kind = kind
+        self.item_id = item_id
+        self.children = children
+        self.child_items = []
+        self.expanded = expanded
+        self.call = call
+        # Last values set, compared without reading the GObject properties
+        self._values = {}
+
+    def update(self, **values):
+        """Set properties, notifying only the ones that changed"""
+        for name, value in values.items():
+            if self._values.get(name) != value:
+                self._values[name] = value
+                self.set_property(name, value)
+
+
+class _SidebarCell(Adw.Bin):
+    """Child of a list item, showing the row of the item bound to it"""
+
+    def __init__(self, sidebar):
+        super().__init__()
+        self.sidebar = sidebar
+        self.chat_row = None
+        self.folder_row = None
+        self.item = None
+        self.depth = 0
+        self._notify_id = None
+
+    def _get_chat_row(self) -> ChatRow:
+        if self.chat_row is None:
+            window = self.sidebar.window
+            row = ChatRow()
+            row.connect_signals(
+                on_generate=window.generate_chat_name,
+                on_edit=lambda btn, row=row: window.edit_chat_name(btn, row.get_edit_stack()),
+                on_clone=window.copy_chat,
+                on_delete=window.remove_chat
+            )
+            middle_click = Gtk.GestureClick(button=2)
+            middle_click.connect("pressed", self._on_middle_click)
+            row.add_controller(middle_click)
+            self._add_click_gesture(row)
+            self.chat_row = row
+        return self.chat_row
+
+    def _on_middle_click(self, gesture, n_press, x, y):
+        if self.item is not None:
+            self.sidebar.window.add_chat_tab(self.item.item_id)
+
+    def _get_folder_row(self) -> FolderRow:
+        if self.folder_row is None:
+            window = self.sidebar.window
+            row = FolderRow()
+            row.connect_signals(
+                on_edit=lambda btn: window._edit_folder(row.folder_id),
+                on_delete=lambda btn: window._delete_folder(row.folder_id),
+                on_drop_chat=window._on_chat_dropped_on_folder,
+            )
+            self._add_click_gesture(row)
+            self.folder_row = row
+        return self.folder_row
+
+    def _add_click_gesture(self, row):
+        click = Gtk.GestureClick(button=1)
+        click.connect("released", self._on_released)
+        row.add_controller(click)
+
+    def _on_released(self, gesture, n_press, x, y):
+        if n_press == 1 and self.item is not None:
+            self.sidebar.activate_item(self.item)
+
+    def bind(self, item: SidebarItem, depth: int):
+        self.item = item
+        self.depth = depth
+        self.refresh()
+        self._notify_id = item.connect("notify", lambda *a: self.refresh())
+
+    def unbind(self):
+        if self.item is not None and self._notify_id is not None:
+            self.item.disconnect(self._notify_id)
+        self.item = None
+        self._notify_id = None
+        if self.chat_row is not None:
+            self.chat_row.stop_editing()
+
+    def refresh(self):
+        """Show the bound item again, after it changed"""
+        item = self.item
+        if item is None:
+            return
+        if item.kind == "folder":
+            row = self._get_folder_row()
+            row.set_folder(item.item_id, item.name, item.color, item.icon, item.expanded)
+        else:
+            row = self._get_chat_row()
+            row.set_chat(item.name, item.item_id, item.selected, self.depth, item.is_open)
+        if self.get_child() is not row:
+            self.set_child(row)
+
+
+class ChatSidebar(Gtk.ListView):
+    """List of the folders and chats of the window
+
+    Args:
+        window: the main window, handling the row actions
+    """
+
+    def __init__(self, window):
+        super().__init__(css_classes=["navigation-sidebar"])
+        self.window = window
+        self.reverse_order = False
+        self._items: dict[tuple, SidebarItem] = {}
+        self._root_items: list[SidebarItem] = []
+        # Sort keys of the listed top level items, and the path of every chat
+        self._root_keys: list[tuple] = []
+        self._chat_paths: dict[int, tuple] = {}
+        self._cells: dict[int, set] = {}
+        self._chats = {}
+        self._chat_id = None
+        self._open_chat_ids = set()
+        self._children_map = {}
+        self._last_click = 0
+
+        self.store = Gio.ListStore(item_type=SidebarItem)
+        self.filter = Gtk.CustomFilter.new(lambda item, *args: not item.call)
+        self.sorter = Gtk.CustomSorter.new(self._compare, None)
+        sorted_model = Gtk.SortListModel(model=Gtk.FilterListModel(model=self.store, filter=self.filter),
+                                         sorter=self.sorter)
+        self.tree = Gtk.TreeListModel.new(sorted_model, False, True, self._create_children)
+        self.selection = Gtk.SingleSelection(model=self.tree, autoselect=False, can_unselect=True)
+
+        factory = Gtk.SignalListItemFactory()
+        factory.connect("setup", self._on_setup)
+        factory.connect("bind", self._on_bind)
+        factory.connect("unbind", self._on_unbind)
+        self.set_factory(factory)
+        self.set_model(self.selection)
+        self.connect("activate", self._on_activate)
+
+        # Drop target on the list itself to remove a chat from its folder
+        unfolder_drop = Gtk.DropTarget.new(GObject.TYPE_STRING, Gdk.DragAction.MOVE)
+        unfolder_drop.connect("enter", window._on_unfolder_drop_enter)
+        unfolder_drop.connect("leave", window._on_unfolder_drop_leave)
+        unfolder_drop.connect("drop", window._on_unfolder_drop)
+        self.add_controller(unfolder_drop)
+
+    # --- Model ---
+
+    @staticmethod
+    def _create_children(item):
+        return item.children if item.children is not None and item.expanded else None
+
+    def _sort_key(self, item: SidebarItem) -> tuple:
+        # Folders first, in creation order, then chats in creation order
+        if item.kind == "folder":
+            return 0, item.item_id
+        return 1, -item.item_id if self.reverse_order else item.item_id
+
+    def _compare(self, a, b, *args):
+        key_a, key_b = self._sort_key(a), self._sort_key(b)
+        if key_a < key_b:
+            return Gtk.Ordering.SMALLER
+        if key_a > key_b:
+            return Gtk.Ordering.LARGER
+        return Gtk.Ordering.EQUAL
+
+    def update(self, chats: dict, folders: dict, chat_id: int, open_chat_ids: set, reverse_order: bool = False):
+        """Show the current chats and folders
+
+        Args:
+            chats: chats of the window, by id
+            folders: folders of the controller, by id
+            chat_id: id of the current chat
+            open_chat_ids: ids of the chats open in a tab
+            reverse_order: list the newest top level chats first
+        """
+        self._chats = chats
+        self._chat_id = chat_id
+        self._open_chat_ids = open_chat_ids
+        id_to_chat_id = {chat.get("id"): cid for cid, chat in chats.items()}
+        self._children_map = {}
+        foldered_chat_ids = set()
+        for folder in folders.values():
+            for cid in folder.get("chat_ids", []):
+                if cid in chats:
+                    foldered_chat_ids.add(cid)
+
+        top_level_ids = []
+        for cid, chat in chats.items():
+            parent_id = chat.get("branched_from")
+            if not chat.get("call", False) and parent_id and parent_id in id_to_chat_id:
+                self._children_map.setdefault(parent_id, []).append(cid)
+            elif cid not in foldered_chat_ids:
+                top_level_ids.append(cid)
+
+        previous_items = self._items
+        self._items = {}
+        self._chat_paths = {}
+        root_items = [self._sync_folder(fid, folder, previous_items) for fid, folder in folders.items()]
+        root_items += [self._sync_chat((("chat", cid),), cid, previous_items) for cid in top_level_ids]
+        self._sync_store(self.store, self._root_items, root_items)
+        self._root_items = root_items
+
+        if reverse_order != self.reverse_order:
+            self.reverse_order = reverse_order
+            self.sorter.changed(Gtk.SorterChange.DIFFERENT)
+        self._root_keys = sorted(self._sort_key(item) for item in root_items if not item.call)
+        self._sync_selection()
+
+    def _sync_chat(self, path: tuple, cid: int, previous_items: dict) -> SidebarItem:
+        chat = self._chats[cid]
+        child_ids = self._children_map.get(chat.get("id"), [])
+        item = previous_items.get(path)
+        if item is None or (item.children is not None) != bool(child_ids):
+            # Whether a row can be expanded is fixed when it is created
+            children = Gio.ListStore(item_type=SidebarItem) if child_ids else None
+            item = SidebarItem("chat", cid, children, call=chat.get("call", False))
+        self._items[path] = item
+        self._chat_paths[cid] = path
+        item.update(name=chat["name"], selected=cid == self._chat_id, is_open=cid in self._open_chat_ids)
+        if child_ids:
+            children = [self._sync_chat(path + (("chat", child_id),), child_id, previous_items) for child_id in child_ids]
+            self._sync_store(item.children, item.child_items, children)
+            item.child_items = children
+        return item
+
+    def _sync_folder(self, fid: int, folder: dict, previous_items: dict) -> SidebarItem:
+        path = (("folder", fid),)
+        expanded = folder.get("expanded", True)
+        item = previous_items.get(path)
+        if item is None or item.expanded != expanded:
+            # The tree asks for the children of new rows only, toggling replaces the row
+            previous = item
+            item = SidebarItem("folder", fid, Gio.ListStore(item_type=SidebarItem), expanded=expanded)
+            if previous is not None:
+                item.children, item.child_items = previous.children, previous.child_items
+        self._items[path] = item
+        item.update(name=folder["name"], color=folder.get("color", "#3584e4"), icon=folder.get("icon", "folder-symbolic"))
+        children = [self._sync_chat(path + (("chat", cid),), cid, previous_items)
+                    for cid in folder.get("chat_ids", []) if cid in self._chats]
+        self._sync_store(item.children, item.child_items, children)
+        item.child_items = children
+        return item
+
+    @staticmethod
+    def _sync_store(store: Gio.ListStore, current: list, items: list):
+        """Replace the part of store that differs between current and items"""
+        start = 0
+        while start < len(current) and start < len(items) and current[start] is items[start]:
+            start += 1
+        end_current, end_items = len(current), len(items)
+        while end_current > start and end_items > start and current[end_current - 1] is items[end_items - 1]:
+            end_current -= 1
+            end_items -= 1
+        if start < end_current or start < end_items:
+            store.splice(start, end_current - start, items[start:end_items])
+
+    def _sync_selection(self):
+        selected = self.selection.get_selected_item()
+        if selected is not None:
+            item = selected.get_item()
+            if item.kind == "chat" and item.item_id == self._chat_id:
+                return
+        self.selection.set_selected(self._chat_position(self._chat_id))
+
+    def _chat_position(self, chat_id: int) -> int:
+        """Return the row of a chat, from its path, without going through the other rows"""
+        path = self._chat_paths.get(chat_id)
+        if path is None or self._items[path[:1]].call:
+            return Gtk.INVALID_LIST_POSITION
+        parent = self._items[path[:1]]
+        row = self.tree.get_child_row(bisect.bisect_left(self._root_keys, self._sort_key(parent)))
+        for depth in range(2, len(path) + 1):
+            if row is None:
+                # Inside a collapsed row
+                return Gtk.INVALID_LIST_POSITION
+            item = self._items[path[:depth]]
+            row = row.get_child_row(parent.child_items.index(item))
+            parent = item
+        return row.get_position() if row is not None else Gtk.INVALID_LIST_POSITION
+
+    # --- Rows ---
+
+    def _on_setup(self, factory, list_item):
+        list_item.set_child(_SidebarCell(self))
+
+    def _on_bind(self, factory, list_item):
+        cell = list_item.get_child()
+        tree_row = list_item.get_item()
+        item = tree_row.get_item()
+        cell.bind(item, tree_row.get_depth())
+        list_item.set_selectable(item.kind == "chat")
+        if item.kind == "chat":
+            self._cells.setdefault(item.item_id, set()).add(cell)
+
+    def _on_unbind(self, factory, list_item):
+        cell = list_item.get_child()
+        if cell.item is not None and cell.item.kind == "chat":
+            cells = self._cells.get(cell.item.item_id)
+            if cells is not None:
+                cells.discard(cell)
+                if not cells:
+                    del self._cells[cell.item.item_id]
+        cell.unbind()
+
+    def refresh_chat(self, chat_id: int):
+        """Show the chat again in its rows, resetting their buttons"""
+        for cell in list(self._cells.get(chat_id, ())):
+            cell.refresh()
+
+    # --- Activation ---
+
+    def activate_item(self, item: SidebarItem):
+        self._last_click = GLib.get_monotonic_time()
+        self.window.on_chat_row_activated(item)
+
+    def _on_activate(self, list_view, position):
+        # Clicks are handled by the rows, this is for the keyboard and the double click
+        if GLib.get_monotonic_time() - self._last_click < 500_000:
+            return
+        tree_row = self.tree.get_row(position)
+        if tree_row is not None:
+            self.window.on_chat_row_activated(tree_row.get_item())
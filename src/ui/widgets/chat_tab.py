@@ -31,6 +31,7 @@ from ...utility.strings import (
 from ...utility.system import is_flatpak
 from ...utility.media import extract_supported_files
 from ...tools import Command
+from ...utility.streaming import StreamUpdate, stream_updates
 
 _ = gettext.gettext
 
@@ -54,6 +55,7 @@ class ChatTab(Gtk.Box):
         self.window = window
         self._chat_id = chat_id
         self.controller = window.controller
+        self.controller.pin_chat(chat_id)
         self.tab_page = None  # Will be set after tab is added to TabView
         
         # Streaming state - isolated per tab
@@ -63,6 +65,12 @@ class ChatTab(Gtk.Box):
         self.streaming_lock = threading.Lock()
         self.streamed_content = ""
         self._stream_target_content = ""
+        # Latest StreamUpdate, its text is only built when it is revealed
+        self._stream_target_update = None
+        self._stream_changed_from = None
+        self._stream_target_raw_length = 0
+        # If the revealed text is known to be a prefix of the target
+        self._stream_visible_is_prefix = True
         self._stream_reveal_source_id = None
         self._stream_reveal_generation = None
         self.is_thinking = False
@@ -899,7 +907,9 @@ class ChatTab(Gtk.Box):
         self.history_stack.set_transition_duration(300)
         
         # Update internal chat_id
+        self.controller.unpin_chat(self._chat_id)
         self._chat_id = chat_id
+        self.controller.pin_chat(chat_id)
         
         # Update tab title
         self._update_tab_title()
@@ -1012,6 +1022,10 @@ class ChatTab(Gtk.Box):
             with self.streaming_lock:
                 self.streamed_content = ""
                 self._stream_target_content = ""
+                self._stream_target_update = None
+                self._stream_changed_from = None
+                self._stream_target_raw_length = 0
+                self._stream_visible_is_prefix = True
                 self.streaming_pending = False
             GLib.idle_add(
                 self.create_streaming_message_label,
@@ -1154,6 +1168,7 @@ class ChatTab(Gtk.Box):
                 and self.chat[assistant_index].get("Message") == message_label
             ):
                 self.chat[assistant_index]["OpenAIResponse"] = response_metadata
+                self.controller.mark_message_changed(self._chat_id, assistant_index)
                 self.save_chat()
         
         if waiting_for_tools:
@@ -1248,22 +1263,50 @@ class ChatTab(Gtk.Box):
         self.streaming_box.set_overflow(Gtk.Overflow.VISIBLE)
 
         with self.streaming_lock:
-            has_pending_text = bool(self._stream_target_content)
+            has_pending_text = bool(self._stream_target_content) or self._stream_target_update is not None
         if has_pending_text:
             self._start_stream_reveal(stream_number_variable)
         
-    def update_message(self, message, stream_number_variable, *args):
+    @stream_updates
+    def update_message(self, message: StreamUpdate | str, stream_number_variable, *args):
         """Update message label when streaming (thread-safe)."""
         if self.stream_number_variable != stream_number_variable:
             return
 
         with self.streaming_lock:
-            self._stream_target_content = message
+            if isinstance(message, StreamUpdate):
+                previous = self._stream_target_update
+                if previous is not None and previous.stream is not message.stream:
+                    self._stream_changed_from = 0
+                elif self._stream_changed_from is None:
+                    self._stream_changed_from = message.offset
+                else:
+                    self._stream_changed_from = min(self._stream_changed_from, message.offset)
+                self._stream_target_update = message
+            else:
+                self._stream_target_update = None
+                self._stream_changed_from = None
+                self._stream_target_content = message
+                self._stream_visible_is_prefix = False
             if self.streaming_pending:
                 return
             self.streaming_pending = True
         GLib.idle_add(self._queue_stream_reveal, stream_number_variable)
 
+    def _materialize_stream_target(self) -> str:
+        """Build the text of the latest stream update, call with streaming_lock held."""
+        update = self._stream_target_update
+        if update is not None:
+            raw = update.text
+            # Text streamed after the previous target only extends it
+            if self._stream_changed_from < self._stream_target_raw_length:
+                self._stream_visible_is_prefix = False
+            self._stream_target_update = None
+            self._stream_changed_from = None
+            self._stream_target_raw_length = len(raw)
+            self._stream_target_content = raw.strip()
+        return self._stream_target_content
+
     def _queue_stream_reveal(self, stream_number_variable):
         """Coalesce producer updates and start the main-thread reveal loop."""
         if self.stream_number_variable != stream_number_variable:
@@ -1303,8 +1346,9 @@ class ChatTab(Gtk.Box):
             return GLib.SOURCE_CONTINUE
 
         with self.streaming_lock:
-            target_content = self._stream_target_content
+            target_content = self._materialize_stream_target()
             visible_content = self.streamed_content
+            visible_is_prefix = self._stream_visible_is_prefix
             if target_content == visible_content:
                 self.streaming_pending = False
                 self._stream_reveal_source_id = None
@@ -1316,9 +1360,10 @@ class ChatTab(Gtk.Box):
             or settings.get_property("gtk-enable-animations")
         )
 
+        extends_visible = visible_is_prefix or target_content.startswith(visible_content)
         if not animations_enabled or not self.get_mapped():
             next_content = target_content
-        elif target_content.startswith(visible_content):
+        elif extends_visible:
             remaining = len(target_content) - len(visible_content)
             reveal_count = max(
                 1,
@@ -1336,11 +1381,15 @@ class ChatTab(Gtk.Box):
 
         with self.streaming_lock:
             self.streamed_content = next_content
+            # A newer update may have arrived, it is checked on the next reveal
+            if self._stream_target_update is None and self._stream_target_content is target_content:
+                self._stream_visible_is_prefix = True
 
         if self.current_streaming_message is not None:
             self.current_streaming_message.update_content(
                 next_content,
                 is_streaming=True,
+                extended=extends_visible,
             )
             self.chat_history.scrolled_chat()
 
@@ -1386,6 +1435,7 @@ class ChatTab(Gtk.Box):
         self.chat[-1]["Prompt"] = prompt
         self.chat[-1]["InputTokens"] = self.last_token_num[0]
         self.chat[-1]["OutputTokens"] = self.last_token_num[1]
+        self.controller.mark_message_changed(self._chat_id, len(self.chat) - 1)
         
     def reload_message(self, message_id: int):
         """Reload a message in the chat history."""
@@ -4,76 +4,43 @@ import unicodedata
 from gi.repository import Adw, Gtk, Gio, Gdk, GLib, GObject, Pango
 
 
-class ChatRow(Gtk.ListBoxRow):
-    """A chat row widget styled according to Adwaita HIG"""
+class ChatRow(Gtk.Box):
+    """A chat row widget styled according to Adwaita HIG
+
+    Rows are recycled by the chat sidebar, set_chat shows another chat in
+    the same widgets.
+    """
     
-    def __init__(self, chat_name: str, chat_index: int, is_selected: bool = False, level: int = 0, is_open: bool = False):
+    def __init__(self, chat_name: str = "", chat_index: int = 0, is_selected: bool = False, level: int = 0, is_open: bool = False):
         super().__init__()
-        self.chat_index = chat_index
-        self.is_selected = is_selected
-        self.level = level
-        self.is_open = is_open
-        
-        # Process chat name: Remove new lines and limit to 8 words
-        processed_name = chat_name.replace("\n", " ").strip()
-        words = processed_name.split()
-        if len(words) > 8:
-            processed_name = " ".join(words[:8]) + "..."
-        else:
-            processed_name = " ".join(words)
-        
-        self.chat_name = processed_name
-        
-        # Check for emoji/symbol at the beginning using unicodedata
-        first_emoji = None
-        if processed_name:
-            first_char = processed_name[0]
-            # 'So' is Symbol, Other (includes most emojis)
-            # We also check if it's high-surrogate or special char by looking at category
-            if unicodedata.category(first_char) in ["So", "Sk"]:
-                first_emoji = first_char
-                display_name = processed_name[1:].strip()
-                # Handle cases where the symbol might be multi-character/combined
-                # (Simple approach: just take the first code point for now as is common)
-                if not display_name and len(words) > 1:
-                    display_name = processed_name
-            else:
-                display_name = processed_name
-        else:
-            display_name = processed_name
+        self.name_entry = None
 
         # Create main container
-        margin_start = 12 + (level * 20)
         self.main_box = Gtk.Box(
             orientation=Gtk.Orientation.HORIZONTAL,
             spacing=6,
             margin_top=6,
             margin_bottom=6,
-            margin_start=margin_start,
             margin_end=6,
+            hexpand=True,
         )
-        self.set_child(self.main_box)
-        
-        # Chat icon/indicator
-        if first_emoji:
-            self.chat_icon = Gtk.Label(label=first_emoji)
-            self.chat_icon.set_size_request(16, 16)
-        else:
-            self.chat_icon = Gtk.Image.new_from_icon_name("chat-bubbles-text-symbolic")
+        self.append(self.main_box)
         
-        self.chat_icon.add_css_class("dim-label")
-        self.main_box.append(self.chat_icon)
+        # Chat icon/indicator, an emoji starting the name replaces the icon
+        self.emoji_label = Gtk.Label()
+        self.emoji_label.set_size_request(16, 16)
+        self.main_box.append(self.emoji_label)
+        self.chat_image = Gtk.Image.new_from_icon_name("chat-bubbles-text-symbolic")
+        self.main_box.append(self.chat_image)
+        self.chat_icon = self.chat_image
         
         # Chat name label
         self.name_label = Gtk.Label(
-            label=display_name,
             xalign=0,
             hexpand=True,
             ellipsize=Pango.EllipsizeMode.END,
             max_width_chars=30,
         )
-        if chat_name != display_name:
-            self.set_tooltip_text(chat_name)
         self.main_box.append(self.name_label)
         
         # Actions revealer (revealed on hover)
@@ -99,13 +66,7 @@ class ChatRow(Gtk.ListBoxRow):
         self.actions_box.append(self.edit_stack)
         
         # Generate name button
-        self.generate_button = Gtk.Button(
-            icon_name="magic-wand-symbolic",
-            css_classes=["flat", "circular", "success"],
-            valign=Gtk.Align.CENTER,
-            tooltip_text=_("Generate name"),
-        )
-        self.generate_button.set_name(str(chat_index))
+        self.generate_button = Gtk.Button(valign=Gtk.Align.CENTER, tooltip_text=_("Generate name"))
         self.edit_stack.add_named(self.generate_button, "generate")
         
         # Edit name button
@@ -115,9 +76,7 @@ class ChatRow(Gtk.ListBoxRow):
             valign=Gtk.Align.CENTER,
             tooltip_text=_("Edit name"),
         )
-        self.edit_button.set_name(str(chat_index))
         self.edit_stack.add_named(self.edit_button, "edit")
-        self.edit_stack.set_visible_child_name("edit")
         
         # Clone button
         self.clone_button = Gtk.Button(
@@ -126,7 +85,6 @@ class ChatRow(Gtk.ListBoxRow):
             valign=Gtk.Align.CENTER,
             tooltip_text=_("Duplicate chat"),
         )
-        self.clone_button.set_name(str(chat_index))
         self.actions_box.append(self.clone_button)
         
         # Delete button
@@ -134,16 +92,86 @@ class ChatRow(Gtk.ListBoxRow):
             icon_name="user-trash-symbolic",
             css_classes=["flat", "circular", "error"],
             valign=Gtk.Align.CENTER,
-            tooltip_text=_("Delete chat"),
         )
-        self.delete_button.set_name(str(chat_index))
         self.actions_box.append(self.delete_button)
         
+        # Add hover controllers
+        hover_controller = Gtk.EventControllerMotion()
+        hover_controller.connect("enter", self._on_hover_enter)
+        hover_controller.connect("leave", self._on_hover_leave)
+        self.add_controller(hover_controller)
+
+        # Drag source so chats can be dragged into folders
+        drag_source = Gtk.DragSource(actions=Gdk.DragAction.MOVE)
+        drag_source.connect("prepare", self._on_drag_prepare)
+        drag_source.connect("drag-begin", self._on_drag_begin)
+        self.add_controller(drag_source)
+
+        self.set_chat(chat_name, chat_index, is_selected, level, is_open)
+
+    def set_chat(self, chat_name: str, chat_index: int, is_selected: bool = False, level: int = 0, is_open: bool = False):
+        """Show a chat in the row, leaving name editing"""
+        self.chat_index = chat_index
+        self.is_selected = is_selected
+        self.level = level
+        self.is_open = is_open
+        
+        # Process chat name: Remove new lines and limit to 8 words
+        processed_name = chat_name.replace("\n", " ").strip()
+        words = processed_name.split()
+        if len(words) > 8:
+            processed_name = " ".join(words[:8]) + "..."
+        else:
+            processed_name = " ".join(words)
+        
+        self.chat_name = processed_name
+        
+        # Check for emoji/symbol at the beginning using unicodedata
+        first_emoji = None
+        if processed_name:
+            first_char = processed_name[0]
+            # 'So' is Symbol, Other (includes most emojis)
+            # We also check if it's high-surrogate or special char by looking at category
+            if unicodedata.category(first_char) in ["So", "Sk"]:
+                first_emoji = first_char
+                display_name = processed_name[1:].strip()
+                # Handle cases where the symbol might be multi-character/combined
+                # (Simple approach: just take the first code point for now as is common)
+                if not display_name and len(words) > 1:
+                    display_name = processed_name
+            else:
+                display_name = processed_name
+        else:
+            display_name = processed_name
+
+        self.main_box.set_margin_start(12 + (level * 20))
+
+        # Chat icon/indicator
+        self.emoji_label.set_visible(first_emoji is not None)
+        self.chat_image.set_visible(first_emoji is None)
+        if first_emoji:
+            self.emoji_label.set_label(first_emoji)
+            self.chat_icon = self.emoji_label
+        else:
+            self.chat_icon = self.chat_image
+        
+        self.name_label.set_label(display_name)
+        self.set_tooltip_text(chat_name if chat_name != display_name else None)
+
+        for button in (self.generate_button, self.edit_button, self.clone_button, self.delete_button):
+            button.set_name(str(chat_index))
+        self.stop_editing()
+
         # Apply selected styling
+        for css_class in ("chat-row-selected", "chat-row", "chat-locked"):
+            self.remove_css_class(css_class)
+        for icon in (self.emoji_label, self.chat_image):
+            icon.remove_css_class("accent")
+            icon.add_css_class("dim-label")
+        self.name_label.remove_css_class("heading")
+        self.name_label.remove_css_class("window-bar-label")
         if is_selected:
             self.add_css_class("chat-row-selected")
-            if isinstance(self.chat_icon, Gtk.Image):
-                self.chat_icon.set_from_icon_name("chat-bubbles-text-symbolic")
             self.chat_icon.remove_css_class("dim-label")
             self.chat_icon.add_css_class("accent")
             self.name_label.add_css_class("heading")
@@ -151,22 +179,46 @@ class ChatRow(Gtk.ListBoxRow):
             self.delete_button.set_sensitive(False)
             self.delete_button.set_tooltip_text(_("Cannot delete current chat"))
         else:
+            self.delete_button.set_sensitive(True)
+            self.delete_button.set_tooltip_text(_("Delete chat"))
             self.add_css_class("chat-row")
             if is_open:
                 self.add_css_class("chat-locked")
                 self.name_label.add_css_class("window-bar-label")
-        
-        # Add hover controllers
-        hover_controller = Gtk.EventControllerMotion()
-        hover_controller.connect("enter", self._on_hover_enter)
-        hover_controller.connect("leave", self._on_hover_leave)
-        self.add_controller(hover_controller)
 
-        # Drag source so chats can be dragged into folders
-        drag_source = Gtk.DragSource(actions=Gdk.DragAction.MOVE)
-        drag_source.connect("prepare", self._on_drag_prepare)
-        drag_source.connect("drag-begin", self._on_drag_begin)
-        self.add_controller(drag_source)
+    def start_editing(self, on_done):
+        """Replace the name label with an entry
+
+        Args:
+            on_done: called with the entered text when it is activated
+        """
+        if self.name_entry is None:
+            self.name_entry = Gtk.Entry(hexpand=True)
+            self.name_entry.connect("activate", lambda entry: self._on_edit_done(entry.get_text()))
+            self.main_box.insert_child_after(self.name_entry, self.name_label)
+            self.name_label.set_visible(False)
+        self._on_edit_callback = on_done
+        return self.name_entry
+
+    def _on_edit_done(self, text):
+        callback = self._on_edit_callback
+        self.stop_editing()
+        if callback is not None:
+            callback(text)
+
+    def stop_editing(self):
+        """Leave name editing and reset the action buttons"""
+        self._on_edit_callback = None
+        if self.name_entry is not None:
+            self.main_box.remove(self.name_entry)
+            self.name_entry = None
+        self.name_label.set_visible(True)
+        self.edit_stack.set_visible_child_name("edit")
+        # The generate button shows a spinner, then a warning while naming
+        self.generate_button.set_icon_name("magic-wand-symbolic")
+        self.generate_button.set_css_classes(["flat", "circular", "success"])
+        self.generate_button.set_can_target(True)
+        self.generate_button.set_has_frame(True)
     
     def _on_hover_enter(self, controller, x, y):
         """Show action buttons on hover"""
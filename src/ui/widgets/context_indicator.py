@@ -78,7 +78,7 @@ class ContextIndicator(Gtk.MenuButton):
 
     def update_from_chat(self, controller) -> None:
         """Estimate context stats from the current chat without running the full trim pipeline."""
-        from ...utility.strings import count_message_tokens
+        from ...utility.strings import count_message_tokens_many
         from ...utility.context_manager import TrimResult
 
         settings = controller.newelle_settings
@@ -91,8 +91,9 @@ class ContextIndicator(Gtk.MenuButton):
             return
 
         chat = controller.chat
-        history = controller.get_history(chat=chat)
-        total = sum(count_message_tokens(m.get("Message", "")) + 4 for m in history)
+        history = controller.get_history(chat=chat, copy_chat=False)
+        messages = [m.get("Message", "") for m in history]
+        total = sum(tokens + 4 for tokens in count_message_tokens_many(messages, controller.get_token_model()))
 
         GLib.idle_add(self.update_stats, TrimResult(
             original_tokens=total,
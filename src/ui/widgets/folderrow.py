@@ -1,24 +1,45 @@
 """Folder row widget for the chat sidebar"""
 import gettext
+import re
 from gi.repository import Gtk, Gdk, GLib, GObject, Pango
 
 _ = gettext.gettext
 
 
-class FolderRow(Gtk.ListBoxRow):
-    """A collapsible folder row that accepts chat drops"""
+# Colors that already have a CSS class tinting folder icons
+_color_classes: dict[str, str] = {}
 
-    def __init__(self, folder_id: int, folder_name: str, folder_color: str,
+
+def _color_css_class(color: str) -> str:
+    """Return the CSS class tinting an icon with color, registering it once"""
+    css_class = _color_classes.get(color)
+    if css_class is None:
+        css_class = "folder-icon-" + re.sub(r"[^a-zA-Z0-9]", "-", color)
+        css_provider = Gtk.CssProvider()
+        css_provider.load_from_data(
+            f".{css_class} {{ color: {color}; }}".encode()
+        )
+        display = Gdk.Display.get_default()
+        if display:
+            Gtk.StyleContext.add_provider_for_display(
+                display, css_provider, Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION + 1
+            )
+        _color_classes[color] = css_class
+    return css_class
+
+
+class FolderRow(Gtk.Box):
+    """A collapsible folder row that accepts chat drops
+
+    Rows are recycled by the chat sidebar, set_folder shows another folder
+    in the same widgets.
+    """
+
+    def __init__(self, folder_id: int = 0, folder_name: str = "", folder_color: str = "#3584e4",
                  folder_icon: str = "folder-symbolic", expanded: bool = True):
         super().__init__()
-        self.folder_id = folder_id
-        self.folder_name = folder_name
-        self.folder_color = folder_color
-        self.folder_icon = folder_icon
-        self.is_expanded = expanded
         self.add_css_class("folder-row")
-        self.set_selectable(False)
-        self.set_activatable(True)
+        self._color_class = None
 
         self.main_box = Gtk.Box(
             orientation=Gtk.Orientation.HORIZONTAL,
@@ -27,24 +48,22 @@ class FolderRow(Gtk.ListBoxRow):
             margin_bottom=6,
             margin_start=8,
             margin_end=6,
+            hexpand=True,
         )
-        self.set_child(self.main_box)
+        self.append(self.main_box)
 
         # Expand/collapse chevron
-        chevron_icon = "pan-down-symbolic" if expanded else "pan-end-symbolic"
-        self.chevron = Gtk.Image.new_from_icon_name(chevron_icon)
+        self.chevron = Gtk.Image()
         self.chevron.add_css_class("dim-label")
         self.main_box.append(self.chevron)
 
         # Colored folder icon
-        self.icon_widget = Gtk.Image.new_from_icon_name(folder_icon)
+        self.icon_widget = Gtk.Image()
         self.icon_widget.set_pixel_size(16)
-        self._apply_icon_color()
         self.main_box.append(self.icon_widget)
 
         # Folder name
         self.name_label = Gtk.Label(
-            label=folder_name,
             xalign=0,
             hexpand=True,
             ellipsize=Pango.EllipsizeMode.END,
@@ -94,20 +113,28 @@ class FolderRow(Gtk.ListBoxRow):
         self.add_controller(drop_target)
 
         self._on_drop_callback = None
+        self.set_folder(folder_id, folder_name, folder_color, folder_icon, expanded)
+
+    def set_folder(self, folder_id: int, folder_name: str, folder_color: str,
+                   folder_icon: str = "folder-symbolic", expanded: bool = True):
+        """Show a folder in the row"""
+        self.folder_id = folder_id
+        self.folder_name = folder_name
+        self.folder_color = folder_color
+        self.folder_icon = folder_icon
+        self.name_label.set_label(folder_name)
+        self.icon_widget.set_from_icon_name(folder_icon)
+        self._apply_icon_color()
+        self.set_expanded(expanded)
 
     def _apply_icon_color(self):
-        """Tint the folder icon with the folder's color via a per-instance CSS class."""
-        css_class = f"folder-icon-{self.folder_id}"
-        css_provider = Gtk.CssProvider()
-        css_provider.load_from_data(
-            f".{css_class} {{ color: {self.folder_color}; }}".encode()
-        )
-        self.icon_widget.add_css_class(css_class)
-        display = Gdk.Display.get_default()
-        if display:
-            Gtk.StyleContext.add_provider_for_display(
-                display, css_provider, Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION + 1
-            )
+        """Tint the folder icon with the folder's color via a per-color CSS class."""
+        css_class = _color_css_class(self.folder_color)
+        if self._color_class != css_class:
+            if self._color_class is not None:
+                self.icon_widget.remove_css_class(self._color_class)
+            self.icon_widget.add_css_class(css_class)
+            self._color_class = css_class
 
     def set_expanded(self, expanded: bool):
         self.is_expanded = expanded
@@ -9,7 +9,7 @@ import tempfile
 import socket
 from gi.repository import Gtk, GLib, Pango, GdkPixbuf, Gio, Gdk
 
-from ...utility.message_chunk import get_message_chunks, MessageChunk
+from ...utility.message_chunk import get_message_chunks, IncrementalChunker, MessageChunk
 from ...utility.source_attribution import CitationSource, extract_source_section
 from ...utility.strings import markwon_to_pango, remove_thinking_blocks, simple_markdown_to_pango, quote_string
 from pylatexenc.latex2text import LatexNodes2Text
@@ -67,6 +67,11 @@ class Message(Gtk.Box):
         # State tracking
         self.widgets_map = [] # List of tuples (chunk_type, widget, chunk_data)
         self.streaming = False
+        self._chunker = IncrementalChunker()
+        # If every streamed update since the last parse only appended text
+        self._stream_extended = False
+        # (chunk count, widget count, codeblock_id) of the finalized chunks already rendered
+        self._stable_render = None
         self.state = {
             "codeblock_id": -1,
             "id_message": id_message,
@@ -95,8 +100,15 @@ class Message(Gtk.Box):
         # Initial render
         self.update_content(message)
 
-    def update_content(self, message: str, is_streaming: bool = False):
-        """Update the message content safely from any thread."""
+    def update_content(self, message: str, is_streaming: bool = False, extended: bool = False):
+        """Update the message content safely from any thread.
+
+        Args:
+            message: full text of the message
+            is_streaming: if the message is still being generated
+            extended: if the caller knows message only appends to the previous content
+        """
+        self._stream_extended = self._stream_extended and extended
         self.message = message
         self.streaming = is_streaming
         self._render_serial = getattr(self, '_render_serial', 0) + 1
@@ -121,15 +133,41 @@ class Message(Gtk.Box):
         if not sources:
             self.sources_button = None
 
-        chunks = get_message_chunks(render_message, allow_latex=self.controller.newelle_settings.display_latex)
-        if sources:
-            signature = "\n".join(f"{source.number}:{source.raw}" for source in sources)
-            chunks.append(MessageChunk(type="sources", text=signature))
+        allow_latex = self.controller.newelle_settings.display_latex
         current_widget_idx = 0
+        first_chunk = 0
         temp_state = self.state.copy()
         temp_state["codeblock_id"] = -1 
+        if self.streaming:
+            # Only the open tail of a streamed message is parsed again, and
+            # finalized chunks that already have their widgets are skipped
+            if self._chunker.allow_latex != allow_latex:
+                self._chunker = IncrementalChunker(allow_latex)
+            diff = self._chunker.feed(render_message, extended=self._stream_extended)
+            self._stream_extended = True
+            chunks = list(diff.chunks)
+            finalized_count = diff.stable_count + len(diff.finalized)
+            stable_render = self._stable_render
+            if (
+                stable_render is not None
+                and stable_render[0] <= diff.stable_count
+                and stable_render[1] <= len(self.widgets_map)
+            ):
+                first_chunk, current_widget_idx, temp_state["codeblock_id"] = stable_render
+        else:
+            self._chunker.reset()
+            self._stream_extended = True
+            chunks = get_message_chunks(render_message, allow_latex=allow_latex)
+            finalized_count = -1
+        self._stable_render = None
+        if sources:
+            signature = "\n".join(f"{source.number}:{source.raw}" for source in sources)
+            chunks.append(MessageChunk(type="sources", text=signature))
         
-        for chunk in chunks:
+        for index in range(first_chunk, len(chunks)):
+            chunk = chunks[index]
+            if index == finalized_count:
+                self._stable_render = (index, current_widget_idx, temp_state["codeblock_id"])
             if current_widget_idx < len(self.widgets_map):
                 w_type, widget, w_data = self.widgets_map[current_widget_idx]
                 if self._can_update_widget(w_type, widget, chunk):
@@ -143,6 +181,8 @@ class Message(Gtk.Box):
             
             self._process_chunk(chunk, self, temp_state, self.restore, self.is_user, self.chunk_uuid)
             current_widget_idx = len(self.widgets_map)
+        if finalized_count == len(chunks):
+            self._stable_render = (finalized_count, current_widget_idx, temp_state["codeblock_id"])
         
         self.state = temp_state
         if current_widget_idx < len(self.widgets_map):
@@ -835,6 +875,7 @@ class Message(Gtk.Box):
 
         if id_message < len(chat) and chat[id_message]["User"] == "Console":
             chat[id_message]["Message"] = output
+            self.controller.mark_message_changed(self._get_chat_tab().chat_id, id_message)
         else:
             chat.append({"User": "Console", "Message": " " + output})
 
@@ -11,6 +11,9 @@ class UIController:
     def require_tool_update(self):
         self.window.controller.require_tool_update()
 
+    def update_extension_tools(self, extension, removed: list[str]):
+        self.window.controller.update_extension_tools(extension, removed)
+
     def refresh_extension_resources(self, refreshes):
         """Refresh extension-backed UI surfaces that are currently alive."""
         self.window.extensionloader = self.window.controller.extensionloader
@@ -193,6 +196,9 @@ class HeadlessController(UIController):
     def require_tool_update(self):
         self.controller.require_tool_update()
 
+    def update_extension_tools(self, extension, removed: list[str]):
+        self.controller.update_extension_tools(extension, removed)
+
     def refresh_extension_resources(self, refreshes):
         pass
 
@@ -0,0 +1,143 @@
+"""Analysis of 16 bit PCM frames captured from the microphone.
+
+These run on every frame for as long as the microphone is open, so frames
+are read in place with ``np.frombuffer`` and reduced with ``np.einsum``,
+which accumulates in float64 without building a temporary array.
+"""
+
+import numpy as np
+
+
+def frame_samples(frame: bytes) -> np.ndarray:
+    """View a frame of little endian 16 bit samples, without copying it"""
+    return np.frombuffer(frame, dtype="<i2", count=len(frame) // 2)
+
+
+def rms(frame: bytes, remove_dc: bool = False) -> float:
+    """Root mean square of a frame, in sample units (0 to 32768)
+
+    Args:
+        frame: 16 bit PCM audio
+        remove_dc: measure around the mean of the frame instead of zero
+    """
+    samples = frame_samples(frame)
+    count = len(samples)
+    if count == 0:
+        return 0.0
+    mean_square = float(np.einsum("i,i->", samples, samples, dtype=np.float64)) / count
+    if remove_dc:
+        mean = float(samples.sum(dtype=np.float64)) / count
+        mean_square = max(0.0, mean_square - mean * mean)
+    return mean_square ** 0.5
+
+
+def band_rms(frame: bytes, bands: int) -> np.ndarray:
+    """Root mean square of each of bands consecutive parts of a frame
+
+    Samples past the last whole part are ignored. Parts beyond the end of
+    frames shorter than bands are 0.
+    """
+    samples = frame_samples(frame)
+    levels = np.zeros(bands, dtype=np.float64)
+    size = len(samples) // bands
+    if size == 0:
+        levels[:len(samples)] = np.abs(samples)
+        return levels
+    parts = samples[:size * bands].reshape(bands, size)
+    np.sqrt(np.einsum("ij,ij->i", parts, parts, dtype=np.float64) / size, out=levels)
+    return levels
+
+
+def zero_crossing_rate(frame: bytes) -> float:
+    """Fraction of consecutive samples of a frame that change sign"""
+    samples = frame_samples(frame)
+    if len(samples) < 2:
+        return 0.0
+    signs = np.signbit(samples)
+    return np.count_nonzero(signs[1:] != signs[:-1]) / (len(samples) - 1)
+
+
+class NoiseFloor:
+    """Running mean of the last values of a noise measurement
+
+    Args:
+        size: number of values averaged
+        initial: value until min_count values were added
+        min_count: values needed before the mean is used
+    """
+
+    def __init__(self, size: int = 50, initial: float = 0.0, min_count: int = 10):
+        self.initial = initial
+        self.min_count = min_count
+        self._values = np.zeros(size, dtype=np.float64)
+        self._next = 0
+        self._count = 0
+        self._sum = 0.0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def value(self) -> float:
+        if self._count < self.min_count:
+            return self.initial
+        return self._sum / self._count
+
+    def add(self, value: float):
+        if self._count == len(self._values):
+            self._sum -= self._values[self._next]
+        else:
+            self._count += 1
+        self._values[self._next] = value
+        self._sum += value
+        self._next = (self._next + 1) % len(self._values)
+
+    def reset(self):
+        self._next = 0
+        self._count = 0
+        self._sum = 0.0
+
+
+class PreRollBuffer:
+    """Ring buffer keeping the last seconds of audio before speech starts
+
+    Frames are copied into preallocated memory, reading the pre-roll back
+    is the only allocation.
+
+    Args:
+        samples: capacity, in samples
+    """
+
+    def __init__(self, samples: int):
+        self._buffer = np.zeros(max(1, samples), dtype="<i2")
+        self._end = 0
+        self._length = 0
+
+    def __len__(self) -> int:
+        """Number of samples held"""
+        return self._length
+
+    def append(self, frame: bytes):
+        samples = frame_samples(frame)
+        capacity = len(self._buffer)
+        if len(samples) >= capacity:
+            self._buffer[:] = samples[-capacity:]
+            self._end = 0
+            self._length = capacity
+            return
+        first = min(len(samples), capacity - self._end)
+        self._buffer[self._end:self._end + first] = samples[:first]
+        self._buffer[:len(samples) - first] = samples[first:]
+        self._end = (self._end + len(samples)) % capacity
+        self._length = min(capacity, self._length + len(samples))
+
+    def get(self) -> bytes:
+        """Return the samples held, oldest first"""
+        start = self._end - self._length
+        if start >= 0:
+            return self._buffer[start:self._end].tobytes()
+        return self._buffer[start:].tobytes() + self._buffer[:self._end].tobytes()
+
+    def clear(self):
+        self._end = 0
+        self._length = 0
@@ -1,9 +1,9 @@
 import pyaudio 
 import wave
-import struct
 from typing import Callable
 import os
 import math
+from .audio_frames import rms
 
 class AudioRecorder:
     """Record audio with optional auto-stop on silence detection."""
@@ -67,11 +67,4 @@ class AudioRecorder:
 
     def _calculate_rms(self, data):
         """Calculate the root mean square of the audio data."""
-        count = len(data) // 2  # Each sample is 2 bytes (16-bit)
-        format = "<" + str(count) + "h"  # little-endian signed shorts
-        shorts = struct.unpack(format, data)
-        mean = sum(shorts) / count
-        shorts_demeaned = [sample - mean for sample in shorts]
-        sum_squares = sum(sample * sample for sample in shorts_demeaned)
-        rms = (sum_squares / count) ** 0.5
-        return rms
+        return rms(data, remove_dc=True)
@@ -0,0 +1,573 @@
+"""SQLite storage for chats and folders.
+
+Replaces the single ``chats.pkl`` file that was rewritten on every save.
+Every message is its own row, so saving after an assistant turn or a tool
+result only writes the rows that changed since the previous save:
+
+    store = ChatStore(os.path.join(data_dir, "chats.db"))
+    data = store.load(legacy_path=os.path.join(data_dir, "chats.pkl"))
+    ...
+    store.save(chats, next_chat_id, folders, next_folder_id)
+
+`ChatStore.load` returns the same dict that used to be pickled, migrating
+the legacy pickle on first run. Only the chat index (names, folders,
+profiles, message counts) is read at startup: every chat is a `LazyChat`
+that reads its messages the first time ``chat["chat"]`` is accessed. Once
+more than `ChatStore.max_loaded_chats` message lists are in memory, the
+least recently used ones are dropped at the end of the next save, except
+for chats pinned with `ChatStore.pin` (open tabs, running generations).
+Reads never write to the database. Loaded message lists are `MessageList`
+objects that report the messages added, replaced or removed, so a save only
+pickles those; edits inside a message are reported with
+`ChatStore.message_changed`. The database runs in WAL mode with full
+synchronous commits, and every save is a single transaction, so a crash
+leaves either the previous or the new state on disk, as the old
+temp-file-and-rename approach did. The WAL is checkpointed and the file
+vacuumed on a background thread once enough rows have been written.
+"""
+
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value BLOB NOT NULL);
+CREATE TABLE IF NOT EXISTS chats (
+    id INTEGER PRIMARY KEY,
+    data BLOB NOT NULL,
+    updated REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS messages (
+    chat_id INTEGER NOT NULL,
+    idx INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (chat_id, idx)
+);
+"""
+
+# Rows written before the WAL is checkpointed on a background thread
+COMPACT_AFTER_ROWS = 2000
+# Fraction of free pages that triggers a VACUUM during compaction
+VACUUM_FREE_RATIO = 0.25
+# Chats whose messages are kept in memory at the same time
+MAX_LOADED_CHATS = 16
+
+
+class MessageList(list):
+    """Message list of a loaded chat, reporting the messages that change to the store
+
+    Adding, replacing and removing messages is seen, edits inside a message
+    are not and go through `ChatStore.message_changed`. Copies and slices
+    are plain lists.
+    """
+
+    def __init__(self, store: "ChatStore", chat_id: int, messages=()):
+        super().__init__(messages)
+        self._store = store
+        self._chat_id = chat_id
+
+    def _changed(self, index: int, onward: bool = False):
+        self._store.message_changed(self._chat_id, index, onward)
+
+    def _position(self, index: int) -> int:
+        if index < 0:
+            index += len(self)
+        return min(max(index, 0), len(self))
+
+    def _slice_start(self, key: slice) -> int:
+        start, stop, step = key.indices(len(self))
+        return start if step == 1 else 0
+
+    def __setitem__(self, key, value):
+        if isinstance(key, slice):
+            start = self._slice_start(key)
+            super().__setitem__(key, value)
+            self._changed(start, True)
+        else:
+            index = self._position(key)
+            super().__setitem__(key, value)
+            self._changed(index)
+
+    def __delitem__(self, key):
+        start = self._slice_start(key) if isinstance(key, slice) else self._position(key)
+        super().__delitem__(key)
+        self._changed(start, True)
+
+    def __iadd__(self, messages):
+        start = len(self)
+        super().__iadd__(messages)
+        self._changed(start, True)
+        return self
+
+    def __imul__(self, count):
+        super().__imul__(count)
+        self._changed(0, True)
+        return self
+
+    def append(self, message):
+        super().append(message)
+        self._changed(len(self) - 1)
+
+    def extend(self, messages):
+        start = len(self)
+        super().extend(messages)
+        self._changed(start, True)
+
+    def insert(self, index, message):
+        start = self._position(index)
+        super().insert(index, message)
+        self._changed(start, True)
+
+    def pop(self, index=-1):
+        start = self._position(index)
+        message = super().pop(index)
+        self._changed(start, True)
+        return message
+
+    def remove(self, message):
+        del self[self.index(message)]
+
+    def clear(self):
+        super().clear()
+        self._changed(0, True)
+
+    def sort(self, *args, **kwargs):
+        super().sort(*args, **kwargs)
+        self._changed(0, True)
+
+    def reverse(self):
+        super().reverse()
+        self._changed(0, True)
+
+    def __reduce__(self):
+        # Pickled and deep-copied as a plain list
+        return (list, (list(self),))
+
+
+class LazyChat(dict):
+    """Chat record whose "chat" message list is read from the store on first access.
+
+    It behaves like the plain dict it replaces: ``chat["chat"]``,
+    ``chat.get("chat")``, iteration, copies and pickling all see the
+    messages. Only `is_loaded` and `message_count` peek without loading.
+    """
+
+    def __init__(self, store: "ChatStore", chat_id: int, data: dict, message_count: int = 0, updated: float = 0):
+        super().__init__(data)
+        self._store = store
+        self._chat_id = chat_id
+        self._message_count = message_count
+        self.updated = updated
+
+    def is_loaded(self) -> bool:
+        return dict.__contains__(self, "chat")
+
+    @property
+    def message_count(self) -> int:
+        messages = dict.get(self, "chat")
+        return len(messages) if messages is not None else self._message_count
+
+    def _ensure_loaded(self):
+        if not self.is_loaded():
+            self._store.load_messages(self._chat_id, self)
+
+    def unload(self):
+        messages = dict.pop(self, "chat", None)
+        if messages is not None:
+            self._message_count = len(messages)
+
+    def __missing__(self, key):
+        if key == "chat":
+            self._ensure_loaded()
+            return dict.__getitem__(self, "chat")
+        raise KeyError(key)
+
+    def __getitem__(self, key):
+        if key == "chat":
+            self._store.touch(self._chat_id)
+        return super().__getitem__(key)
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        if key == "chat":
+            self._store.touch(self._chat_id, self)
+            self._store.messages_replaced(self._chat_id)
+
+    def get(self, key, default=None):
+        if key == "chat":
+            return self["chat"]
+        return super().get(key, default)
+
+    def __contains__(self, key):
+        return key == "chat" or super().__contains__(key)
+
+    def __iter__(self):
+        self._ensure_loaded()
+        return super().__iter__()
+
+    def __len__(self):
+        return super().__len__() + (0 if self.is_loaded() else 1)
+
+    def keys(self):
+        self._ensure_loaded()
+        return super().keys()
+
+    def values(self):
+        self._ensure_loaded()
+        return super().values()
+
+    def items(self):
+        self._ensure_loaded()
+        return super().items()
+
+    def copy(self):
+        self._ensure_loaded()
+        return dict(super().items())
+
+    def __reduce__(self):
+        # Pickled and deep-copied as a plain dict
+        return (dict, (self.copy(),))
+
+
+class ChatStore:
+    """Persists the controller chats dict, writing only what changed.
+
+    The store keeps the pickled rows of the persisted chats and messages.
+    The messages reported as changed by a `MessageList` or
+    `message_changed` are pickled on save and written if they differ.
+    Message lists the store does not track, like the plain lists of new
+    chats or lists assigned to ``chat["chat"]``, are compared whole,
+    pickled again, when they were used since the last save.
+    """
+
+    def __init__(self, path: str, max_loaded_chats: int = MAX_LOADED_CHATS):
+        self.path = path
+        self.max_loaded_chats = max_loaded_chats
+        self._lock = threading.RLock()
+        self._conn = None
+        # Snapshots of what is on disk, pickled rows for chats and messages,
+        # messages only for loaded chats
+        self._meta = {}
+        self._chat_meta = {}
+        self._messages = {}
+        # Chats with messages in memory, least recently used first
+        self._loaded = OrderedDict()
+        # chat id -> number of users keeping its messages loaded
+        self._pins = {}
+        # Changes since the last save: indices of changed messages, index from
+        # which every message changed, chats to compare whole, chats used
+        self._changed_messages: dict[int, set] = {}
+        self._changed_from: dict[int, int] = {}
+        self._rescan = set()
+        self._used = set()
+        self._written_rows = 0
+        self._compacting = False
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = self._open(self.path)
+        return self._conn
+
+    @staticmethod
+    def _open(path: str) -> sqlite3.Connection:
+        conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=FULL")
+        conn.executescript(_SCHEMA)
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(chats)")]
+        if "updated" not in columns:
+            conn.execute("ALTER TABLE chats ADD COLUMN updated REAL NOT NULL DEFAULT 0")
+        return conn
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # Loading
+    def load(self, legacy_path: str | None = None) -> dict | None:
+        """Load the chat index and folders.
+
+        Args:
+            legacy_path: path of the old pickle, migrated if the database does not exist yet
+
+        Returns:
+            dict with chats, next_chat_id, folders and next_folder_id, or None if nothing was saved yet.
+            The chats are `LazyChat` records whose messages are read on first access.
+        """
+        with self._lock:
+            if not os.path.exists(self.path):
+                if legacy_path is None or not os.path.exists(legacy_path):
+                    return None
+                self.migrate_pickle(legacy_path)
+            conn = self._connect()
+            rows = conn.execute("SELECT key, value FROM meta").fetchall()
+            meta = {key: pickle.loads(value) for key, value in rows}
+            if "next_chat_id" not in meta:
+                return None
+            chats = {}
+            query = """
+                SELECT c.id, c.data, c.updated, COUNT(m.idx)
+                FROM chats c LEFT JOIN messages m ON m.chat_id = c.id
+                GROUP BY c.id ORDER BY c.id
+            """
+            for chat_id, data, updated, message_count in conn.execute(query):
+                chats[chat_id] = LazyChat(self, chat_id, pickle.loads(data), message_count, updated)
+            # The snapshot must not share objects the controller mutates in place
+            self._meta = {key: pickle.loads(value) for key, value in rows}
+            self._chat_meta = {chat_id: pickle.dumps(self._strip_messages(chat)) for chat_id, chat in chats.items()}
+            self._messages = {}
+            self._loaded = OrderedDict()
+            self._forget_changes()
+            return {
+                "chats": chats,
+                "next_chat_id": meta["next_chat_id"],
+                "folders": meta.get("folders", {}),
+                "next_folder_id": meta.get("next_folder_id", 0),
+            }
+
+    def load_messages(self, chat_id: int, chat: LazyChat):
+        """Read the messages of a chat into its record"""
+        with self._lock:
+            if chat.is_loaded():
+                return
+            rows = [
+                data
+                for (data,) in self._connect().execute(
+                    "SELECT data FROM messages WHERE chat_id = ? ORDER BY idx", (chat_id,)
+                )
+            ]
+            self._messages[chat_id] = rows
+            dict.__setitem__(chat, "chat", MessageList(self, chat_id, (pickle.loads(data) for data in rows)))
+            self._loaded[chat_id] = chat
+            self._loaded.move_to_end(chat_id)
+
+    def touch(self, chat_id: int, chat: LazyChat | None = None):
+        """Mark a chat as recently used"""
+        with self._lock:
+            self._used.add(chat_id)
+            if chat is not None:
+                self._loaded[chat_id] = chat
+            elif chat_id not in self._loaded:
+                return
+            self._loaded.move_to_end(chat_id)
+
+    def message_changed(self, chat_id: int, index: int, onward: bool = False):
+        """Record that a message of a chat changed, so the next save writes it
+
+        Args:
+            chat_id: id of the chat
+            index: index of the message, not negative
+            onward: if every message from index on changed, e.g. after an insertion
+        """
+        with self._lock:
+            if onward:
+                self._changed_from[chat_id] = min(index, self._changed_from.get(chat_id, index))
+            else:
+                self._changed_messages.setdefault(chat_id, set()).add(index)
+
+    def messages_replaced(self, chat_id: int):
+        """Record that the message list of a chat was assigned, to compare it whole on save"""
+        with self._lock:
+            self._rescan.add(chat_id)
+
+    def _forget_changes(self, chat_id: int | None = None):
+        if chat_id is None:
+            self._changed_messages.clear()
+            self._changed_from.clear()
+            self._rescan.clear()
+            self._used.clear()
+            return
+        self._changed_messages.pop(chat_id, None)
+        self._changed_from.pop(chat_id, None)
+        self._rescan.discard(chat_id)
+        self._used.discard(chat_id)
+
+    def pin(self, chat_id: int):
+        """Keep the messages of a chat loaded until a matching `unpin`"""
+        with self._lock:
+            self._pins[chat_id] = self._pins.get(chat_id, 0) + 1
+
+    def unpin(self, chat_id: int):
+        with self._lock:
+            count = self._pins.get(chat_id, 0) - 1
+            if count > 0:
+                self._pins[chat_id] = count
+            else:
+                self._pins.pop(chat_id, None)
+
+    def _evict(self):
+        """Unload the least recently used chats over the limit, right after they were saved"""
+        for chat_id, chat in list(self._loaded.items())[:-1]:
+            if len(self._loaded) <= self.max_loaded_chats:
+                break
+            # A pinned list would keep receiving messages after eviction
+            if chat_id in self._pins:
+                continue
+            chat.unload()
+            self._messages.pop(chat_id, None)
+            self._forget_changes(chat_id)
+            del self._loaded[chat_id]
+
+    def migrate_pickle(self, legacy_path: str):
+        """Convert the legacy chats pickle into a new database.
+
+        The database is written next to the final path and renamed into
+        place, so an interrupted migration is simply retried on next start.
+        The pickle is kept as a ``.bak`` file.
+        """
+        with open(legacy_path, "rb") as f:
+            raw = pickle.load(f)
+        if isinstance(raw, dict) and "chats" in raw:
+            chats = raw["chats"]
+            next_chat_id = raw.get("next_chat_id", max(chats.keys(), default=0) + 1)
+            folders = raw.get("folders", {})
+            next_folder_id = raw.get("next_folder_id", 0)
+        else:
+            # Old list format
+            chats = {i: entry for i, entry in enumerate(raw)}
+            next_chat_id = len(chats)
+            folders = {}
+            next_folder_id = 0
+
+        temporary_path = self.path + ".migrating"
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(temporary_path + suffix):
+                os.unlink(temporary_path + suffix)
+        conn = self._open(temporary_path)
+        try:
+            with conn:
+                conn.execute("BEGIN")
+                self._write_meta(conn, "next_chat_id", next_chat_id)
+                self._write_meta(conn, "folders", folders)
+                self._write_meta(conn, "next_folder_id", next_folder_id)
+                for chat_id, chat in chats.items():
+                    conn.execute("INSERT INTO chats (id, data) VALUES (?, ?)",
+                                 (chat_id, pickle.dumps(self._strip_messages(chat))))
+                    conn.executemany(
+                        "INSERT INTO messages (chat_id, idx, data) VALUES (?, ?, ?)",
+                        ((chat_id, idx, pickle.dumps(message)) for idx, message in enumerate(chat.get("chat", []))),
+                    )
+            # Fold the WAL into the main file so a single rename moves everything
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            conn.execute("PRAGMA journal_mode=DELETE")
+        finally:
+            conn.close()
+        os.replace(temporary_path, self.path)
+        os.replace(legacy_path, legacy_path + ".bak")
+
+    # Saving
+    def save(self, chats: dict, next_chat_id: int, folders: dict, next_folder_id: int):
+        """Write the differences between the given state and the last saved one in one transaction"""
+        with self._lock:
+            conn = self._connect()
+            written = 0
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                for key, value in (("next_chat_id", next_chat_id), ("folders", folders), ("next_folder_id", next_folder_id)):
+                    if key not in self._meta or self._meta[key] != value:
+                        self._write_meta(conn, key, value)
+                        self._meta[key] = pickle.loads(pickle.dumps(value))
+                        written += 1
+
+                for chat_id in list(self._chat_meta.keys()):
+                    if chat_id not in chats:
+                        conn.execute("DELETE FROM chats WHERE id = ?", (chat_id,))
+                        conn.execute("DELETE FROM messages WHERE chat_id = ?", (chat_id,))
+                        del self._chat_meta[chat_id]
+                        self._messages.pop(chat_id, None)
+                        self._loaded.pop(chat_id, None)
+                        self._forget_changes(chat_id)
+                        written += 1
+
+                for chat_id, chat in list(chats.items()):
+                    written += self._save_chat(conn, chat_id, chat)
+            self._forget_changes()
+            for chat_id, chat in list(chats.items()):
+                if not isinstance(chat, LazyChat):
+                    # New chats are plain dicts, made lazy so they can be evicted too
+                    chats[chat_id] = LazyChat(self, chat_id, chat)
+                    self._loaded[chat_id] = chats[chat_id]
+            if len(self._loaded) > self.max_loaded_chats:
+                self._evict()
+            self._written_rows += written
+            if self._written_rows >= COMPACT_AFTER_ROWS and not self._compacting:
+                self._written_rows = 0
+                self._compacting = True
+                threading.Thread(target=self.compact, daemon=True).start()
+
+    def _save_chat(self, conn: sqlite3.Connection, chat_id: int, chat: dict) -> int:
+        written = 0
+        meta = pickle.dumps(self._strip_messages(chat))
+        if self._chat_meta.get(chat_id) != meta:
+            conn.execute("INSERT OR REPLACE INTO chats (id, data, updated) VALUES (?, ?, ?)",
+                         (chat_id, meta, time.time()))
+            self._chat_meta[chat_id] = meta
+            written += 1
+
+        messages = dict.get(chat, "chat")
+        if messages is None:
+            # Not loaded, so not modified
+            return written
+        if chat_id not in self._messages:
+            # New chat
+            conn.execute("DELETE FROM messages WHERE chat_id = ?", (chat_id,))
+            self._messages[chat_id] = []
+        saved = self._messages[chat_id]
+        tracked = isinstance(messages, MessageList) and messages._chat_id == chat_id
+        if chat_id in self._rescan or (not tracked and (chat_id in self._used or chat_id in self._pins)):
+            # Nothing reported the changes, possibly inside messages
+            indices = range(len(messages))
+        else:
+            indices = {index for index in self._changed_messages.get(chat_id, ()) if index < len(messages)}
+            indices.update(range(min(self._changed_from.get(chat_id, len(saved)), len(saved)), len(messages)))
+            indices = sorted(indices)
+        rows = []
+        for idx in indices:
+            # Compared pickled, a shallow copy would share nested lists and dicts
+            data = pickle.dumps(messages[idx])
+            if idx >= len(saved) or saved[idx] != data:
+                rows.append((chat_id, idx, data))
+        if len(saved) > len(messages):
+            conn.execute("DELETE FROM messages WHERE chat_id = ? AND idx >= ?", (chat_id, len(messages)))
+            del saved[len(messages):]
+            written += 1
+        if rows:
+            conn.executemany("INSERT OR REPLACE INTO messages (chat_id, idx, data) VALUES (?, ?, ?)", rows)
+            for _cid, idx, data in rows:
+                if idx < len(saved):
+                    saved[idx] = data
+                else:
+                    saved.append(data)
+            written += len(rows)
+        if written:
+            conn.execute("UPDATE chats SET updated = ? WHERE id = ?", (time.time(), chat_id))
+        return written
+
+    def compact(self):
+        """Checkpoint the WAL into the database file and vacuum it if it has many free pages"""
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+                free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                if page_count and free_pages / page_count > VACUUM_FREE_RATIO:
+                    conn.execute("VACUUM")
+        except sqlite3.Error as e:
+            print("Error compacting chat store: " + str(e))
+        finally:
+            self._compacting = False
+
+    @staticmethod
+    def _write_meta(conn: sqlite3.Connection, key: str, value):
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, pickle.dumps(value)))
+
+    @staticmethod
+    def _strip_messages(chat: dict) -> dict:
+        # dict.items skips LazyChat loading
+        return {key: value for key, value in dict.items(chat) if key != "chat"}
@@ -1,6 +1,9 @@
-import copy
+import hashlib
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass, field
-from .strings import count_message_tokens, remove_thinking_blocks
+import numpy as np
+from .strings import count_message_tokens, count_message_tokens_many, remove_thinking_blocks
 
 
 SUMMARIZE_PROMPT = """Summarize the following conversation messages into a concise paragraph.
@@ -21,6 +24,62 @@ class TrimResult:
     max_tokens: int = 0
 
 
+class MessageEmbeddingCache:
+    """Embeddings of chat messages kept across turns, so only new messages are embedded.
+
+    Entries are keyed by the embedding model and the message UUID, or a hash of
+    the text for messages without one, and evicted least recently used first.
+    """
+
+    def __init__(self, max_entries: int = 8192):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _message_key(message: dict) -> str:
+        text = message.get("Message", "")
+        uuid = message.get("UUID")
+        # The text hash also covers edits of a message that keeps its UUID
+        digest = hashlib.sha1(text.encode("utf-8", "replace")).hexdigest()
+        return f"{uuid}:{digest}" if uuid else digest
+
+    def get_embeddings(self, embedding_handler, messages: list[dict], extra_texts: list[str] | None = None) -> tuple[np.ndarray, np.ndarray | None]:
+        """Get the embeddings of messages, embedding only the ones not cached
+
+        Args:
+            embedding_handler: EmbeddingHandler to use
+            messages: messages to embed
+            extra_texts: texts embedded in the same call, without caching
+
+        Returns:
+            float32 matrices with a row per message and per extra text
+        """
+        model_id = embedding_handler.get_model_id()
+        keys = [(model_id, self._message_key(message)) for message in messages]
+        with self._lock:
+            cached = [self._entries.get(key) for key in keys]
+            for key, embedding in zip(keys, cached):
+                if embedding is not None:
+                    self._entries.move_to_end(key)
+        extra_texts = extra_texts or []
+        missing = [i for i, embedding in enumerate(cached) if embedding is None]
+        texts = list(extra_texts) + [messages[i].get("Message", "") for i in missing]
+        extra = None
+        if texts:
+            embedded = np.asarray(embedding_handler.get_embedding(texts), dtype=np.float32)
+            extra = embedded[:len(extra_texts)]
+            with self._lock:
+                for i, embedding in zip(missing, embedded[len(extra_texts):]):
+                    cached[i] = embedding
+                    self._entries[keys[i]] = embedding
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        if not cached:
+            return np.empty((0, 0), dtype=np.float32), extra
+        return np.stack(cached), extra
+
+
 class ContextManager:
     """Token-aware context manager that trims chat history to fit within a token budget.
 
@@ -39,12 +98,17 @@ class ContextManager:
         embedding_handler=None,
         llm_handler=None,
         summarization_enabled: bool = False,
+        embedding_cache: MessageEmbeddingCache | None = None,
+        model: str = "gpt-4o-mini",
     ):
         self.max_tokens = max_tokens
         self.suggested_tokens = suggested_tokens
         self.embedding_handler = embedding_handler
         self.llm_handler = llm_handler
         self.summarization_enabled = summarization_enabled
+        self.embedding_cache = embedding_cache if embedding_cache is not None else MessageEmbeddingCache()
+        # Model whose tokenizer counts the tokens
+        self.model = model
 
     def trim(
         self,
@@ -69,7 +133,8 @@ class ContextManager:
                 max_tokens=self.max_tokens,
             )
 
-        history = copy.deepcopy(history)
+        # Messages are replaced, never modified, so a shallow copy is enough
+        history = list(history)
         n = len(history)
 
         recent_start = max(0, n - self.RECENT_WINDOW)
@@ -81,8 +146,8 @@ class ContextManager:
 
         # Phase 2: count tokens per message
         msg_tokens = [
-            count_message_tokens(m.get("Message", "")) + self.TOKEN_OVERHEAD_PER_MSG
-            for m in history
+            tokens + self.TOKEN_OVERHEAD_PER_MSG
+            for tokens in count_message_tokens_many([m.get("Message", "") for m in history], self.model)
         ]
         original_tokens = sum(msg_tokens) + prompts_token_count
 
@@ -133,24 +198,23 @@ class ContextManager:
 
         # Phase 6: optional summarization of dropped messages
         result_history = []
+        trimmed_tokens = prompts_token_count
         if dropped_indices:
             dropped_indices.sort()
             dropped_messages = [history[i] for i in dropped_indices]
             if self.summarization_enabled and self.llm_handler is not None:
                 summary = self._summarize_dropped(dropped_messages)
                 if summary:
+                    summary_message = f"[Previous conversation summary]\n{summary}"
                     result_history.append({
                         "User": "User",
-                        "Message": f"[Previous conversation summary]\n{summary}",
+                        "Message": summary_message,
                     })
+                    trimmed_tokens += count_message_tokens(summary_message, self.model) + self.TOKEN_OVERHEAD_PER_MSG
 
         for i in sorted(keep_set):
             result_history.append(history[i])
-
-        trimmed_tokens = sum(
-            count_message_tokens(m.get("Message", "")) + self.TOKEN_OVERHEAD_PER_MSG
-            for m in result_history
-        ) + prompts_token_count
+            trimmed_tokens += msg_tokens[i]
 
         return TrimResult(
             history=result_history,
@@ -190,24 +254,14 @@ class ContextManager:
     ) -> dict[int, float]:
         """Compute cosine similarity between older messages and the current query."""
         try:
-            texts = [history[i].get("Message", "") for i in indices]
-            all_texts = [query] + texts
-            embeddings = self.embedding_handler.get_embedding(all_texts)
-
-            query_emb = embeddings[0]
-            similarities = {}
-
-            for j, idx in enumerate(indices):
-                msg_emb = embeddings[j + 1]
-                dot = float(sum(a * b for a, b in zip(query_emb, msg_emb)))
-                norm_q = float(sum(a * a for a in query_emb)) ** 0.5
-                norm_m = float(sum(a * a for a in msg_emb)) ** 0.5
-                if norm_q > 0 and norm_m > 0:
-                    similarities[idx] = dot / (norm_q * norm_m)
-                else:
-                    similarities[idx] = 0.0
-
-            return similarities
+            message_embeddings, query_embeddings = self.embedding_cache.get_embeddings(
+                self.embedding_handler, [history[i] for i in indices], [query]
+            )
+            query_emb = query_embeddings[0]
+            norms = np.linalg.norm(message_embeddings, axis=1) * np.linalg.norm(query_emb)
+            dots = message_embeddings @ query_emb
+            scores = np.divide(dots, norms, out=np.zeros_like(dots), where=norms > 0)
+            return {idx: float(score) for idx, score in zip(indices, scores)}
         except Exception:
             return {i: i / max(len(indices), 1) for i in indices}
 
@@ -1,7 +1,7 @@
 import re
 import json
 from dataclasses import dataclass, field
-from typing import List, Optional, Any
+from typing import List, Optional, Any, Tuple
 
 @dataclass
 class MessageChunk:
@@ -414,101 +414,166 @@ def find_tool_calls(text: str) -> List[MessageChunk]:
 # Main Function
 # ============================================================
 
-def get_message_chunks(message: str, allow_latex: bool = True) -> List[MessageChunk]:
+def _next_major_match(message: str, pos: int) -> Tuple[Optional[re.Match], Optional[str]]:
+    """Return the first CodeBlock or ThinkingBlock starting at or after pos."""
+    code_match = _CODEBLOCK_PATTERN.search(message, pos)
+    think_match = _THINK_PATTERN.search(message, pos)
+
+    if code_match and think_match:
+        if code_match.start() < think_match.start():
+            return code_match, "code"
+        return think_match, "think"
+    elif code_match:
+        return code_match, "code"
+    elif think_match:
+        return think_match, "think"
+    return None, None
+
+
+def _is_closed_major_match(match: re.Match) -> bool:
+    """Whether a major match ended on its closing delimiter rather than on the end of text.
+
+    Both patterns capture their content in a non-greedy group followed by
+    either the closing delimiter or \\Z, so the closing delimiter was matched
+    exactly when the content group ends before the match does.
     """
-    Main function to parse message into chunks.
-    Priority: Thinking Blocks OR CodeBlocks (by order of appearance) -> Naked Tools -> Markdown/Latex.
+    return match.end(match.lastindex) < match.end()
+
+
+def _append_text_chunks(text: str, allow_latex: bool, flat_chunks: List[MessageChunk]):
+    """Processes text between major chunks: naked tool calls, then Markdown/Latex."""
+    naked_tool_chunks = find_tool_calls(text)
+    for chunk in naked_tool_chunks:
+        if chunk.type == "tool_call":
+            flat_chunks.append(chunk)
+        else:
+            flat_chunks.extend(process_text_segment(chunk.text, allow_latex))
+
+
+def _append_major_chunk(match: re.Match, match_type: str, flat_chunks: List[MessageChunk]):
+    if match_type == "think":
+        think_content = match.group(1).strip()
+        # User Requirement: Everything inside thinking should not be chunked.
+        flat_chunks.append(MessageChunk(type="thinking", text=think_content))
+
+    elif match_type == "code":
+        lang = match.group(1).strip() if match.group(1) else ""
+        code_content = match.group(2)
+
+        # Check if this code block is actually a tool call
+        tool_obj = parse_potential_tool_json(code_content)
+        if tool_obj:
+            tool_name = tool_obj.get("name", tool_obj.get("tool", tool_obj.get("function", "unknown")))
+            tool_args = tool_obj.get("arguments", tool_obj.get("arguements", tool_obj.get("parameters", {})))
+            flat_chunks.append(MessageChunk(
+                type="tool_call",
+                text=code_content,
+                tool_name=tool_name,
+                tool_args=tool_args,
+                tool_id=str(tool_obj.get("id") or "")
+            ))
+        else:
+            flat_chunks.append(MessageChunk(type="codeblock", text=code_content, lang=lang))
+
+
+def _scan_flat_chunks(message: str, pos: int, allow_latex: bool, closed_only: bool = False) -> Tuple[List[MessageChunk], int]:
+    """
+    Collects flat chunks from pos onwards and returns them with the position reached.
+    If closed_only is set, stops before the first major chunk that is still open
+    and leaves the text after the last closed major chunk unprocessed.
     """
     flat_chunks = []
-    
+    length = len(message)
+
     # We will iterate through the message looking for the next "Major" chunk
     # Major chunks are: CodeBlocks, ThinkingBlocks.
     # While iterating, we process the text BETWEEN major chunks using standard text processing.
-    
-    pos = 0
-    length = len(message)
-    
     while pos < length:
-        # Search for next CodeBlock starting at or after pos
-        code_match = _CODEBLOCK_PATTERN.search(message, pos)
-        
-        # Search for next ThinkBlock starting at or after pos
-        think_match = _THINK_PATTERN.search(message, pos)
-        
-        # Determine which comes first
-        next_match = None
-        match_type = None # "code" or "think"
-        
-        if code_match and think_match:
-            if code_match.start() < think_match.start():
-                next_match = code_match
-                match_type = "code"
-            else:
-                next_match = think_match
-                match_type = "think"
-        elif code_match:
-            next_match = code_match
-            match_type = "code"
-        elif think_match:
-            next_match = think_match
-            match_type = "think"
-            
+        next_match, match_type = _next_major_match(message, pos)
+
         if next_match:
+            if closed_only and not _is_closed_major_match(next_match):
+                break
             start, end = next_match.span()
-            
+
             # Process text BEFORE the match
             if start > pos:
-                pre_text = message[pos:start]
-                
-                # Check for "naked" tool calls in pre_text
-                naked_tool_chunks = find_tool_calls(pre_text)
-                for chunk in naked_tool_chunks:
-                    if chunk.type == "tool_call":
-                        flat_chunks.append(chunk)
-                    else:
-                        flat_chunks.extend(process_text_segment(chunk.text, allow_latex))
-            
+                _append_text_chunks(message[pos:start], allow_latex, flat_chunks)
+
             # Process the MATCH content
-            if match_type == "think":
-                think_content = next_match.group(1).strip()
-                # User Requirement: Everything inside thinking should not be chunked.
-                flat_chunks.append(MessageChunk(type="thinking", text=think_content))
-                
-            elif match_type == "code":
-                lang = next_match.group(1).strip() if next_match.group(1) else ""
-                code_content = next_match.group(2)
-                
-                # Check if this code block is actually a tool call
-                tool_obj = parse_potential_tool_json(code_content)
-                if tool_obj:
-                    tool_name = tool_obj.get("name", tool_obj.get("tool", tool_obj.get("function", "unknown")))
-                    tool_args = tool_obj.get("arguments", tool_obj.get("arguements", tool_obj.get("parameters", {})))
-                    flat_chunks.append(MessageChunk(
-                        type="tool_call",
-                        text=code_content,
-                        tool_name=tool_name,
-                        tool_args=tool_args,
-                        tool_id=str(tool_obj.get("id") or "")
-                    ))
-                else:
-                    flat_chunks.append(MessageChunk(type="codeblock", text=code_content, lang=lang))
-            
+            _append_major_chunk(next_match, match_type, flat_chunks)
             pos = end
         else:
+            if closed_only:
+                break
             # No more matches, process remainder
             remaining_text = message[pos:]
             if remaining_text:
-                naked_tool_chunks = find_tool_calls(remaining_text)
-                for chunk in naked_tool_chunks:
-                    if chunk.type == "tool_call":
-                        flat_chunks.append(chunk)
-                    else:
-                        flat_chunks.extend(process_text_segment(chunk.text, allow_latex))
+                _append_text_chunks(remaining_text, allow_latex, flat_chunks)
             pos = length
 
+    return flat_chunks, pos
+
+
+def get_message_chunks(message: str, allow_latex: bool = True) -> List[MessageChunk]:
+    """
+    Main function to parse message into chunks.
+    Priority: Thinking Blocks OR CodeBlocks (by order of appearance) -> Naked Tools -> Markdown/Latex.
+    """
+    flat_chunks, _ = _scan_flat_chunks(message, 0, allow_latex)
     return _group_inline_chunks(flat_chunks)
 
 
+@dataclass
+class ChunkDiff:
+    """Result of feeding a message to an IncrementalChunker."""
+    chunks: List[MessageChunk]  # Full chunk list, same as get_message_chunks(message)
+    stable_count: int  # Leading chunks already finalized by a previous feed
+    finalized: List[MessageChunk]  # Chunks finalized by this feed
+    updated: List[MessageChunk]  # Chunks of the open tail, reparsed on every feed
+
+
+class IncrementalChunker:
+    """
+    Stateful get_message_chunks for a message that grows by appending, as during streaming.
+
+    A closed CodeBlock or ThinkingBlock can't be changed by text appended after it and
+    always ends a chunk, so everything up to the last closed major chunk is parsed
+    once and kept. Each feed only parses the tail after it.
+    """
+
+    def __init__(self, allow_latex: bool = True):
+        self.allow_latex = allow_latex
+        self.reset()
+
+    def reset(self):
+        self._prefix = ""
+        self._finalized: List[MessageChunk] = []
+
+    def feed(self, message: str, extended: bool = False) -> ChunkDiff:
+        """Parse message, extended tells that it only appends to the last fed message"""
+        if not extended and not message.startswith(self._prefix):
+            # The message was rewritten instead of extended
+            self.reset()
+        stable_count = len(self._finalized)
+        pos = len(self._prefix)
+
+        flat_chunks, pos = _scan_flat_chunks(message, pos, self.allow_latex, closed_only=True)
+        finalized = _group_inline_chunks(flat_chunks)
+        if pos > len(self._prefix):
+            self._finalized.extend(finalized)
+            self._prefix = message[:pos]
+
+        tail_chunks, _ = _scan_flat_chunks(message, pos, self.allow_latex)
+        updated = _group_inline_chunks(tail_chunks)
+        return ChunkDiff(
+            chunks=self._finalized + updated,
+            stable_count=stable_count,
+            finalized=finalized,
+            updated=updated,
+        )
+
+
 def _group_inline_chunks(flat_chunks: List[MessageChunk]) -> List[MessageChunk]:
     """Groups consecutive Text and LatexInline chunks."""
     grouped_chunks = []
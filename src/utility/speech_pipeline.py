@@ -0,0 +1,320 @@
+"""Speak a streamed LLM answer sentence by sentence.
+
+Waiting for the whole answer before synthesizing it makes the time to the
+first audio the full generation time plus the full synthesis time.
+`SentenceSplitter` cuts the stream into sentences as they complete, holding
+back text inside code fences, think blocks and tool call JSON, and
+`SpeechPipeline` synthesizes them in a worker thread while the previous
+sentence plays and the model keeps generating:
+
+    pipeline = SpeechPipeline(tts, is_active)
+    pipeline.feed(delta)          # from the stream callback
+    pipeline.finish()             # once generation is done
+    pipeline.wait()               # returns when everything was played
+    pipeline.cancel()             # barge-in: stop now, drop the rest
+"""
+
+import os
+import queue
+import re
+import threading
+import time
+from typing import Callable
+
+from ..handlers.tts import TTSHandler
+from .message_chunk import find_tool_calls
+from .strings import clean_message_tts
+
+# Sentence ends, fences, think tags and braces, in the order they appear
+_TOKENS = re.compile(r"```|~~~|<think>|</think>|[{}]|[.!?…。！？]+[\"'”’)\]]*(?=\s)|\n")
+# Keys that start a tool call, see message_chunk.find_tool_calls
+_TOOL_KEYS = ('"tool"', '"name"', '"function"')
+_TOOL_START = re.compile(r'\{\s*"(?:tool|name|function)"\s*:')
+
+
+def _tool_call_start(text: str) -> bool | None:
+    """Return if text, starting with a brace in prose, opens a tool call, None if it is too short to tell"""
+    if _TOOL_START.match(text):
+        return True
+    body = text[1:].lstrip()
+    if not body:
+        return None
+    for key in _TOOL_KEYS:
+        if key.startswith(body) or (body.startswith(key) and not body[len(key):].strip()):
+            return None
+    return False
+
+
+def _ends_at_line_start(text: str, previous: bool) -> bool:
+    """Return if the text following text starts a line, previous if text is blank without newlines"""
+    if text[text.rfind("\n") + 1:].strip():
+        return False
+    return "\n" in text or previous
+
+
+def _speaks_directly(tts) -> bool:
+    """Return if the handler, or the one a cache wraps, plays text itself instead of through save_audio"""
+    handler = getattr(tts, "handler", tts)
+    return type(handler).play_audio is not TTSHandler.play_audio
+
+
+class SentenceSplitter:
+    """Incremental sentence splitter for streamed text
+
+    Sentences shorter than min_chars, like list numbers, are kept with the
+    text after them. Braces only hold text back when they open JSON at the
+    start of a line or a tool call, a brace in prose is spoken as usual.
+    """
+
+    def __init__(self, min_chars: int = 4):
+        self.min_chars = min_chars
+        self.pending = ""
+        self.consumed = 0
+        # If pending starts a line
+        self.line_start = True
+
+    def reset(self):
+        """Start a new stream"""
+        self.pending = ""
+        self.consumed = 0
+        self.line_start = True
+
+    def feed(self, delta: str) -> list[str]:
+        """Add streamed text, return the sentences it completed"""
+        self.pending += delta
+        return self._split()
+
+    def rewrite(self, text: str) -> list[str]:
+        """Replace the whole streamed text, return the sentences it completed
+
+        Sentences already returned can't be taken back, only the text after
+        them is replaced.
+        """
+        self.consumed = min(self.consumed, len(text))
+        self.pending = text[self.consumed:]
+        self.line_start = _ends_at_line_start(text[:self.consumed], True)
+        return self._split()
+
+    def flush(self) -> list[str]:
+        """Return the text left once the stream is over"""
+        rest = self.pending
+        self.consumed += len(rest)
+        self.pending = ""
+        self.line_start = _ends_at_line_start(rest, self.line_start)
+        return [rest] if rest.strip() else []
+
+    def _split(self) -> list[str]:
+        fence = None
+        thinking = False
+        braces = 0
+        sentences = []
+        start = 0
+        for match in _TOKENS.finditer(self.pending):
+            token = match.group()
+            if token in ("```", "~~~"):
+                if fence is None:
+                    fence = token
+                elif fence == token:
+                    fence = None
+            elif fence is not None:
+                continue
+            elif token == "<think>":
+                thinking = True
+            elif token == "</think>":
+                thinking = False
+            elif token == "{":
+                if braces == 0:
+                    position = match.start()
+                    line_begin = self.pending.rfind("\n", 0, position) + 1
+                    at_line_start = not self.pending[line_begin:position].strip() and (line_begin > 0 or self.line_start)
+                    opens = True if at_line_start else _tool_call_start(self.pending[position:])
+                    if opens is None:
+                        # Wait for the text after the brace
+                        break
+                    if not opens:
+                        continue
+                braces += 1
+            elif token == "}":
+                braces = max(0, braces - 1)
+            elif not thinking and braces == 0:
+                end = match.end()
+                if len(self.pending[start:end].strip()) >= self.min_chars:
+                    sentences.append(self.pending[start:end])
+                    start = end
+        self.line_start = _ends_at_line_start(self.pending[:start], self.line_start)
+        self.consumed += start
+        self.pending = self.pending[start:]
+        return sentences
+
+
+def clean_sentence(text: str) -> str:
+    """Clean one sentence for TTS, dropping tool calls"""
+    text = "".join(chunk.text for chunk in find_tool_calls(text) if chunk.type != "tool_call")
+    return clean_message_tts(text).strip()
+
+
+class SpeechLatencyTrace:
+    """Times of the steps of a voice turn, relative to its start"""
+
+    def __init__(self):
+        self.start = time.monotonic()
+        self.marks: dict[str, float] = {}
+
+    def mark(self, name: str):
+        """Record the first time name happened"""
+        self.marks.setdefault(name, time.monotonic() - self.start)
+
+    def summary(self) -> str:
+        return ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.marks.items())
+
+
+class SpeechPipeline:
+    """Synthesize and play sentences while the answer is still generated
+
+    Args:
+        tts: the TTS handler
+        is_active: the pipeline stops once it returns False
+        lookahead: synthesized sentences waiting to be played at most
+        trace: latency trace, gets first_audio marked
+    """
+
+    def __init__(self, tts, is_active: Callable[[], bool] = lambda: True, lookahead: int = 2,
+                 trace: SpeechLatencyTrace | None = None):
+        self.tts = tts
+        self.is_active = is_active
+        self.trace = trace
+        self.splitter = SentenceSplitter()
+        self.spoken = []
+        self._sentences = queue.Queue()
+        self._audio = queue.Queue(maxsize=max(1, lookahead))
+        self._cancelled = threading.Event()
+        self._synth_thread = threading.Thread(target=self._synthesize, daemon=True, name="newelle-speech-synth")
+        self._play_thread = threading.Thread(target=self._play, daemon=True, name="newelle-speech-play")
+        self._synth_thread.start()
+        self._play_thread.start()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def feed(self, delta: str):
+        """Add streamed text"""
+        self._queue(self.splitter.feed(delta))
+
+    def rewrite(self, text: str):
+        """Replace the text of the current stream"""
+        self._queue(self.splitter.rewrite(text))
+
+    def new_stream(self):
+        """Speak what is left of the current stream and start a new one"""
+        self._queue(self.splitter.flush())
+        self.splitter.reset()
+
+    def finish(self):
+        """Speak what is left, no more text is coming"""
+        self._queue(self.splitter.flush())
+        self._sentences.put(None)
+
+    def wait(self):
+        """Wait until everything was played or the pipeline was cancelled"""
+        self._play_thread.join()
+
+    def cancel(self):
+        """Stop playing and drop the sentences not played yet"""
+        self._cancelled.set()
+        self._sentences.put(None)
+        self.tts.stop()
+        # Unblock the synthesis thread if it waits for room in the queue
+        self._drain_audio()
+
+    def _stopped(self) -> bool:
+        return self._cancelled.is_set() or not self.is_active()
+
+    def _queue(self, sentences: list[str]):
+        for sentence in sentences:
+            sentence = clean_sentence(sentence)
+            if sentence and not self._stopped():
+                self._sentences.put(sentence)
+
+    def _drain_audio(self):
+        while True:
+            try:
+                item = self._audio.get_nowait()
+            except queue.Empty:
+                return
+            if item is not None and item[1] is not None:
+                self._remove(item[1])
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _put_audio(self, item) -> bool:
+        while not self._stopped():
+            try:
+                self._audio.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _synthesize(self):
+        try:
+            while not self._stopped():
+                try:
+                    sentence = self._sentences.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if sentence is None or self._stopped():
+                    break
+                if self.tts.streaming_enabled() or _speaks_directly(self.tts):
+                    # Streamed while played or spoken by the handler, nothing to prepare
+                    path = None
+                else:
+                    path = os.path.join(self.tts.path, self.tts.get_tempname("wav"))
+                    try:
+                        self.tts.save_audio(sentence, path)
+                    except Exception as e:
+                        print(f"TTS error: {e}")
+                        continue
+                if not self._put_audio((sentence, path)) and path is not None:
+                    self._remove(path)
+        finally:
+            # End of the answer, after a cancellation the player stops by itself
+            self._put_audio(None)
+            if self._stopped():
+                self._drain_audio()
+
+    def _play(self):
+        while not self._stopped():
+            try:
+                item = self._audio.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is None:
+                break
+            sentence, path = item
+            if self._stopped():
+                if path is not None:
+                    self._remove(path)
+                break
+            if self.trace is not None:
+                self.trace.mark("first_audio")
+            try:
+                if path is None and self.tts.streaming_enabled():
+                    self.tts.play_audio_stream(sentence)
+                elif path is None:
+                    # e.g. espeak, its save_audio is not meant for playback
+                    self.tts.play_audio(sentence)
+                else:
+                    self.tts.playsound(path)
+                self.spoken.append(sentence)
+            except Exception as e:
+                print(f"TTS error: {e}")
+            finally:
+                if path is not None:
+                    self._remove(path)
+        self._drain_audio()
@@ -0,0 +1,207 @@
+"""Delta based streaming protocol between LLM handlers and their consumers.
+
+Handlers stream through a StreamBuffer. Callbacks marked with
+``stream_updates`` receive a StreamUpdate per change, carrying only the new
+text and where it starts; the cumulative text is built lazily, when the
+consumer asks for it. Unmarked callbacks keep receiving the whole stripped
+message on every update, as before.
+"""
+import threading
+from typing import Callable
+
+
+def stream_updates(func: Callable) -> Callable:
+    """Mark a streaming callback as accepting StreamUpdate objects"""
+    func.accepts_stream_updates = True
+    return func
+
+
+def accepts_stream_updates(func: Callable | None) -> bool:
+    """Return if a streaming callback was marked with stream_updates"""
+    return bool(getattr(func, "accepts_stream_updates", False))
+
+
+class StreamUpdate:
+    """One change of a streamed message.
+
+    After the update the message is the previous text cut at ``offset``
+    followed by ``delta``. Most updates are appends, where ``offset`` is the
+    previous length; handlers that rewrite text they already streamed emit a
+    smaller offset. Updates of a new generation carry a different ``stream``.
+    """
+    __slots__ = ("stream", "offset", "delta", "_pieces", "_end")
+
+    def __init__(self, stream: "StreamBuffer", offset: int, delta: str, pieces: list[str], end: int):
+        self.stream = stream
+        self.offset = offset
+        self.delta = delta
+        self._pieces = pieces
+        self._end = end
+
+    @property
+    def end(self) -> int:
+        """Length of the message after this update"""
+        return self._end
+
+    @property
+    def text(self) -> str:
+        """Whole message as of this update, built on demand"""
+        return self.stream._join(self._pieces)[:self._end]
+
+    def __str__(self) -> str:
+        return self.text
+
+
+class StreamBuffer:
+    """Producer side of a stream, owned by the handler generating the text
+
+    Args:
+        on_update: callback given to generate_text_stream
+        extra_args: extra arguments passed to the callback after the update
+        min_delta: pending characters needed before an append is emitted
+    """
+
+    def __init__(self, on_update: Callable | None, extra_args: list | tuple = (), min_delta: int = 2):
+        self.on_update = on_update
+        self.extra_args = tuple(extra_args)
+        self.min_delta = min_delta
+        self.wants_updates = accepts_stream_updates(on_update)
+        self._lock = threading.Lock()
+        # A rewrite swaps the list, so updates created before keep a
+        # consistent view of the text they described
+        self._pieces: list[str] = []
+        self._length = 0
+        self._pending: list[str] = []
+        self._pending_offset: int | None = None
+        self._pending_length = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    @property
+    def text(self) -> str:
+        """Raw text streamed so far"""
+        return self._join(self._pieces)
+
+    def _join(self, pieces: list[str]) -> str:
+        with self._lock:
+            if len(pieces) > 1:
+                pieces[:] = ["".join(pieces)]
+            return pieces[0] if pieces else ""
+
+    def append(self, delta: str):
+        """Append text at the end of the message"""
+        if not delta:
+            return
+        with self._lock:
+            if self._pending_offset is None:
+                self._pending_offset = self._length
+            self._pieces.append(delta)
+            self._pending.append(delta)
+            self._length += len(delta)
+            self._pending_length += len(delta)
+            ready = self._pending_length >= self.min_delta
+        if ready:
+            self.flush()
+
+    def replace(self, text: str):
+        """Replace the whole message, emitting only the part that changed"""
+        current = self.text
+        if text == current:
+            return
+        if text.startswith(current):
+            self.append(text[len(current):])
+            return
+        offset = 0
+        limit = min(len(text), len(current))
+        while offset < limit and text[offset] == current[offset]:
+            offset += 1
+        with self._lock:
+            self._pieces = [text]
+            self._length = len(text)
+            if self._pending_offset is not None:
+                offset = min(offset, self._pending_offset)
+            self._pending_offset = offset
+            self._pending = [text[offset:]]
+            self._pending_length = len(text) - offset
+        self.flush()
+
+    def flush(self):
+        """Emit pending changes, if any"""
+        with self._lock:
+            if self._pending_offset is None:
+                return
+            update = StreamUpdate(self, self._pending_offset, "".join(self._pending), self._pieces, self._length)
+            self._pending = []
+            self._pending_offset = None
+            self._pending_length = 0
+        if self.on_update is None:
+            return
+        if self.wants_updates:
+            self.on_update(update, *self.extra_args)
+        else:
+            self.on_update(update.text.strip(), *self.extra_args)
+
+    def finish(self, text: str | None = None) -> str:
+        """Emit the final message and return it
+
+        Args:
+            text: final text if it differs from the streamed one
+        """
+        if text is not None:
+            self.replace(text)
+        self.flush()
+        return self.text
+
+
+class StreamView:
+    """Consumer side of a stream, rebuilds the message from the updates
+
+    Accepts StreamUpdate objects and, for callers that still pass them,
+    cumulative strings.
+    """
+
+    def __init__(self):
+        self.stream = None
+        self._pieces: list[str] = []
+        self._length = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    @property
+    def text(self) -> str:
+        if len(self._pieces) > 1:
+            self._pieces = ["".join(self._pieces)]
+        return self._pieces[0] if self._pieces else ""
+
+    def apply(self, update: StreamUpdate | str) -> tuple[int, str, bool]:
+        """Apply an update
+
+        Returns:
+            tuple: (offset, delta, new_stream), new_stream is True when the
+                update starts a new generation and the view was reset
+        """
+        if isinstance(update, StreamUpdate):
+            new_stream = update.stream is not self.stream
+            if new_stream:
+                self.stream = update.stream
+                self._pieces = []
+                self._length = 0
+            offset, delta = update.offset, update.delta
+        else:
+            text = str(update)
+            current = self.text
+            if text.startswith(current):
+                offset, delta, new_stream = len(current), text[len(current):], False
+            else:
+                offset, delta, new_stream = 0, text, True
+            if new_stream:
+                self.stream = None
+        if offset < self._length:
+            self._pieces = [self.text[:offset]] if offset > 0 else []
+            self._length = offset
+        if delta:
+            self._pieces.append(delta)
+            self._length += len(delta)
+        return offset, delta, new_stream
@@ -3,6 +3,11 @@ import html
 import xml 
 import xml.dom.minidom
 import json
+import functools
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable
 from gi.repository import GLib
 import tiktoken
 from .media import extract_file, extract_image, extract_video
@@ -77,18 +82,132 @@ def clean_message_tts(text: str) -> str:
     text = text.strip()
 
     return text
+
+
+# Tokenizer factories by model family, the last registered match wins.
+# A family matches every model whose name, without a provider prefix like
+# "openai/", starts with it.
+_TOKENIZER_FACTORIES: "OrderedDict[str, Callable[[str], Any]]" = OrderedDict()
+# Token counts by (tokenizer name, kind, text hash), least recently used first
+_TOKEN_COUNT_CACHE: "OrderedDict[tuple, int]" = OrderedDict()
+_TOKEN_COUNT_CACHE_SIZE = 8192
+_token_count_lock = threading.Lock()
+
+
+def register_tokenizer(family: str, factory: Callable[[str], Any]):
+    """Register a tokenizer for a model family
+
+    Args:
+        family: prefix of the model names using this tokenizer
+        factory: called with the model name, returns an object with encode(text) -> list,
+            and optionally encode_batch(texts) -> list[list]
+    """
+    _TOKENIZER_FACTORIES[family] = factory
+    get_tokenizer.cache_clear()
+
+
+@functools.lru_cache(maxsize=32)
+def get_tokenizer(model: str = "gpt-4o-mini"):
+    """Get the tokenizer for a model, created once per model"""
+    name = model.rsplit("/", 1)[-1].lower()
+    for family, factory in reversed(_TOKENIZER_FACTORIES.items()):
+        if name.startswith(family):
+            return factory(model)
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def _tiktoken_factory(encoding: str) -> Callable[[str], Any]:
+    return lambda model: tiktoken.get_encoding(encoding)
+
+
+# OpenAI families, also known under names tiktoken does not map, like
+# "openai/gpt-4o" on OpenRouter or newer snapshots
+for _family, _encoding in (
+    ("gpt-3.5", "cl100k_base"),
+    ("gpt-4", "cl100k_base"),
+    ("gpt-4o", "o200k_base"),
+    ("chatgpt-4o", "o200k_base"),
+    ("gpt-4.1", "o200k_base"),
+    ("gpt-4.5", "o200k_base"),
+    ("gpt-5", "o200k_base"),
+    ("gpt-oss", "o200k_base"),
+    ("o1", "o200k_base"),
+    ("o3", "o200k_base"),
+    ("o4", "o200k_base"),
+):
+    register_tokenizer(_family, _tiktoken_factory(_encoding))
+
+
+def _tokenizer_name(model: str) -> str:
+    try:
+        tokenizer = get_tokenizer(model)
+    except Exception:
+        return model
+    return getattr(tokenizer, "name", model)
+
+
+def _text_key(text: str) -> bytes:
+    """Key of a text in the token count cache, so it does not keep the text itself"""
+    return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+def _cached_token_count(key: tuple) -> int | None:
+    with _token_count_lock:
+        count = _TOKEN_COUNT_CACHE.get(key)
+        if count is not None:
+            _TOKEN_COUNT_CACHE.move_to_end(key)
+        return count
+
+
+def _store_token_count(key: tuple, count: int):
+    with _token_count_lock:
+        _TOKEN_COUNT_CACHE[key] = count
+        while len(_TOKEN_COUNT_CACHE) > _TOKEN_COUNT_CACHE_SIZE:
+            _TOKEN_COUNT_CACHE.popitem(last=False)
+
+
+def _encode_count(text: str, model: str) -> int:
+    try:
+        return len(get_tokenizer(model).encode(text))
+    except Exception:
+        return len(text) // 4
+
+
 def count_tokens(text: str, model: str = "gpt-4o-mini") -> int:
     """
     Count the number of tokens in a string
     """
-    try:
+    key = (_tokenizer_name(model), "text", _text_key(text))
+    count = _cached_token_count(key)
+    if count is None:
+        count = _encode_count(text, model)
+        _store_token_count(key, count)
+    return count
+
+def count_tokens_many(texts: list[str], model: str = "gpt-4o-mini") -> list[int]:
+    """
+    Count the number of tokens of many strings, encoding the ones not in the cache in one batch
+    """
+    name = _tokenizer_name(model)
+    counts = [_cached_token_count((name, "text", _text_key(text))) for text in texts]
+    missing = list({texts[i] for i, count in enumerate(counts) if count is None})
+    if missing:
         try:
-            encoding = tiktoken.encoding_for_model(model)
-        except KeyError:
-            encoding = tiktoken.get_encoding("cl100k_base")
-        return len(encoding.encode(text))
-    except Exception:
-        return len(text) // 4
+            tokenizer = get_tokenizer(model)
+            if hasattr(tokenizer, "encode_batch"):
+                encoded = dict(zip(missing, (len(tokens) for tokens in tokenizer.encode_batch(missing))))
+            else:
+                encoded = {text: len(tokenizer.encode(text)) for text in missing}
+        except Exception:
+            # Some text can't be encoded, count them one by one with the fallback
+            encoded = {text: _encode_count(text, model) for text in missing}
+        for text, count in encoded.items():
+            _store_token_count((name, "text", _text_key(text)), count)
+        counts = [encoded[text] if count is None else count for text, count in zip(texts, counts)]
+    return counts
 
 def count_message_tokens(message: str, model: str = "gpt-4o-mini") -> int:
     """Count the textual tokens in a chat message.
@@ -97,7 +216,24 @@ def count_message_tokens(message: str, model: str = "gpt-4o-mini") -> int:
     Exclude their path or base64 payload so pasted images do not appear to use
     hundreds of thousands of text tokens.
     """
-    return count_tokens(clean_prompt(message), model)
+    key = (_tokenizer_name(model), "message", _text_key(message))
+    count = _cached_token_count(key)
+    if count is None:
+        count = count_tokens(clean_prompt(message), model)
+        _store_token_count(key, count)
+    return count
+
+def count_message_tokens_many(messages: list[str], model: str = "gpt-4o-mini") -> list[int]:
+    """Count the textual tokens of many chat messages, see count_message_tokens"""
+    name = _tokenizer_name(model)
+    counts = [_cached_token_count((name, "message", _text_key(message))) for message in messages]
+    missing = [i for i, count in enumerate(counts) if count is None]
+    if missing:
+        cleaned = count_tokens_many([clean_prompt(messages[i]) for i in missing], model)
+        for i, count in zip(missing, cleaned):
+            counts[i] = count
+            _store_token_count((name, "message", _text_key(messages[i])), count)
+    return counts
 
 def quote_string(s):
     if "'" in s:
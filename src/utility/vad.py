@@ -1,6 +1,4 @@
-import math
-import struct
-import array
+from .audio_frames import NoiseFloor, rms
 
 try:
     from pysilero_vad import SileroVoiceActivityDetector
@@ -30,8 +28,7 @@ class VoiceActivityDetector:
         self._is_speaking = False
         
         self._noise_floor = 0.01
-        self._noise_samples = []
-        self._max_noise_samples = 50
+        self._noise_samples = NoiseFloor(size=50, initial=0.01, min_count=10)
         
         self._try_load_silero()
     
@@ -63,29 +60,15 @@ class VoiceActivityDetector:
         return self._chunk_samples
     
     def _calculate_energy(self, audio_data: bytes) -> float:
-        """Calculate RMS energy of audio chunk"""
-        if len(audio_data) == 0:
-            return 0
-        count = len(audio_data) // 2
-        if count == 0:
-            return 0
-        format_str = "<" + str(count) + "h"
-        try:
-            shorts = struct.unpack(format_str, audio_data)
-            normalized = [s / 32768.0 for s in shorts]
-            rms = math.sqrt(sum(s * s for s in normalized) / len(normalized))
-            return rms
-        except Exception:
-            return 0
+        """Calculate RMS energy of audio chunk, between 0 and 1"""
+        return rms(audio_data) / 32768.0
     
     def _update_noise_floor(self, energy: float):
         """Update adaptive noise floor"""
         if not self._is_speaking and energy < self._energy_threshold * 2:
-            self._noise_samples.append(energy)
-            if len(self._noise_samples) > self._max_noise_samples:
-                self._noise_samples.pop(0)
-            if len(self._noise_samples) >= 10:
-                self._noise_floor = sum(self._noise_samples) / len(self._noise_samples)
+            self._noise_samples.add(energy)
+            if len(self._noise_samples) >= self._noise_samples.min_count:
+                self._noise_floor = self._noise_samples.value
                 self._energy_threshold = max(0.01, self._noise_floor * 2.5)
     
     def is_speech(self, frame: bytes) -> bool:
@@ -167,6 +150,6 @@ class VoiceActivityDetector:
         self._speech_frame_count = 0
         self._silence_frame_count = 0
         self._is_speaking = False
-        self._noise_samples = []
+        self._noise_samples.reset()
         self._noise_floor = 0.01
         self._energy_threshold = 0.015
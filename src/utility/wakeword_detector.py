@@ -13,21 +13,17 @@ When secondary STT is enabled:
 4. If wakeword detected, uses the normal STT to transcribe the full audio
 """
 
-import os
 import threading
 import time
-import uuid
-import wave
-from collections import deque
 from gi.repository import GLib
 
 try:
     import pyaudio
-    import array
     DEPENDENCIES_AVAILABLE = True
 except ImportError:
     DEPENDENCIES_AVAILABLE = False
 
+from .audio_frames import PreRollBuffer, rms
 from .vad import VoiceActivityDetector
 
 
@@ -148,18 +144,7 @@ class WakewordDetector:
         Returns:
             RMS energy value (0-32767 for 16-bit audio)
         """
-        try:
-            # Convert bytes to array of 16-bit integers
-            audio_data = array.array('h', frame)
-            if len(audio_data) == 0:
-                return 0
-
-            # Calculate RMS
-            sum_squares = sum(x * x for x in audio_data)
-            rms = (sum_squares / len(audio_data)) ** 0.5
-            return rms
-        except:
-            return 0
+        return rms(frame)
 
     def _init_audio(self):
         """Initialize PyAudio and unified VAD"""
@@ -204,73 +189,52 @@ class WakewordDetector:
                 pass
             self.audio = None
 
-    def _save_to_wav(self, frames, filename):
-        """Save audio frames to WAV file
-
-        Args:
-            frames: List of audio frames
-            filename: Output filename
-
-        Returns:
-            True if successful
-        """
-        try:
-            with wave.open(filename, 'wb') as wf:
-                wf.setnchannels(self.channels)
-                wf.setsampwidth(self.audio.get_sample_size(pyaudio.paInt16))
-                wf.setframerate(self.sample_rate)
-                wf.writeframes(b''.join(frames))
-            return True
-        except Exception as e:
-            print(f"WakewordDetector: Error saving WAV: {e}")
-            return False
-
-    def _transcribe_audio(self, temp_file):
-        """Transcribe audio file using STT handler
+    def _transcribe_audio(self, pcm):
+        """Transcribe audio using STT handler
 
         Args:
-            temp_file: Path to WAV file
+            pcm: Captured 16 bit PCM audio
 
         Returns:
             Transcribed text or None
         """
         print("recognizing")
         try:
-            result = self.stt_handler.recognize_file(temp_file)
+            result = self.stt_handler.recognize_pcm(pcm, self.sample_rate, self.channels)
             return result
         except Exception as e:
             print(f"WakewordDetector: Transcription error: {e}")
             return None
 
-    def _transcribe_audio_secondary(self, temp_file):
-        """Transcribe audio file using secondary STT handler
+    def _transcribe_audio_secondary(self, pcm):
+        """Transcribe audio using secondary STT handler
 
         Args:
-            temp_file: Path to WAV file
+            pcm: Captured 16 bit PCM audio
 
         Returns:
             Transcribed text or None
         """
         print("recognizing with secondary STT")
         try:
-            result = self.secondary_stt_handler.recognize_file(temp_file)
+            result = self.secondary_stt_handler.recognize_pcm(pcm, self.sample_rate, self.channels)
             return result
         except Exception as e:
             print(f"WakewordDetector: Secondary transcription error: {e}")
             return None
 
-    def _transcribe_audio_wakeword(self, temp_file):
-        """Transcribe audio file using wakeword handler
+    def _transcribe_audio_wakeword(self, pcm):
+        """Transcribe audio using wakeword handler
 
         Args:
-            temp_file: Path to WAV file
+            pcm: Captured 16 bit PCM audio
 
         Returns:
             Detected wakewords or None
         """
         print("recognizing with wakeword handler")
         try:
-            result = self.wakeword_handler.recognize_file(temp_file)
+            result = self.wakeword_handler.recognize_pcm(pcm, self.sample_rate, self.channels)
             return result
         except Exception as e:
             print(f"WakewordDetector: Wakeword handler error: {e}")
@@ -285,30 +249,18 @@ class WakewordDetector:
         if not frames or len(frames) == 0:
             return
 
-        # Save to temp file in GLib cache directory
-        temp_file_path = None
-        temp_file_secondary = None
         try:
             # Notify UI that transcription is starting
             if self.on_transcribing:
                 GLib.idle_add(self.on_transcribing)
 
-            # Use GLib cache directory for temp files
-            cache_dir = GLib.get_user_cache_dir()
-            wakeword_cache_dir = os.path.join(cache_dir, "newelle", "wakeword")
-            os.makedirs(wakeword_cache_dir, exist_ok=True)
-
-            # Create unique temp file name
-            import uuid
-            temp_file_path = os.path.join(wakeword_cache_dir, f"speech_{uuid.uuid4().hex}.wav")
-
-            if not self._save_to_wav(frames, temp_file_path):
-                return
+            # Handed to the STT handlers in memory
+            pcm = b''.join(frames)
 
             # Wakeword handler workflow: use specialized wakeword detection model
             if self.wakeword_handler is not None:
                 print("WakewordDetector: Checking with wakeword handler")
-                wakeword_result = self._transcribe_audio_wakeword(temp_file_path)
+                wakeword_result = self._transcribe_audio_wakeword(pcm)
                 
                 # Check if wakeword was detected by the specialized model
                 wakeword_detected = False
@@ -331,7 +283,7 @@ class WakewordDetector:
 
                 if wakeword_detected:
                     print(f"WakewordDetector: Wakeword found, transcribing full audio with primary STT")
-                    result = self._transcribe_audio(temp_file_path)
+                    result = self._transcribe_audio(pcm)
                     if result:
                         result_lower = result.lower()
                         # Remove the wakeword from the result
@@ -347,40 +299,34 @@ class WakewordDetector:
                     return
             # Secondary STT workflow: check first N seconds for wakeword
             elif self.secondary_stt_handler is not None:
-                # Calculate how many frames for the check duration
+                # Calculate how many bytes for the check duration
                 check_frames_count = int(self.secondary_stt_check_duration * self.sample_rate / self.chunk_size)
-                check_frames = frames[:check_frames_count]
+                check_bytes = check_frames_count * self.chunk_size * self.channels * 2
 
-                # Save first N seconds to temp file
-                temp_file_secondary = os.path.join(wakeword_cache_dir, f"secondary_{uuid.uuid4().hex}.wav")
-                if not self._save_to_wav(check_frames, temp_file_secondary):
-                    # Fall back to normal workflow if secondary fails
-                    self.secondary_stt_handler = None
+                # Transcribe first N seconds with secondary STT
+                print(f"WakewordDetector: Checking first {self.secondary_stt_check_duration}s with secondary STT")
+                secondary_result = self._transcribe_audio_secondary(pcm[:check_bytes])
+
+                # Check for wakeword in secondary transcription
+                wakeword_detected = False
+                if secondary_result:
+                    result_lower = secondary_result.lower()
+                    for wakeword in self.wakewords:
+                        if wakeword in result_lower:
+                            wakeword_detected = True
+                            print(f"WakewordDetector: Wakeword '{wakeword}' detected in secondary check!")
+                            break
+
+                # Only transcribe full audio if wakeword was detected
+                if wakeword_detected:
+                    print(f"WakewordDetector: Wakeword found, transcribing full audio with primary STT")
+                    result = self._transcribe_audio(pcm)
                 else:
-                    # Transcribe with secondary STT
-                    print(f"WakewordDetector: Checking first {self.secondary_stt_check_duration}s with secondary STT")
-                    secondary_result = self._transcribe_audio_secondary(temp_file_secondary)
-
-                    # Check for wakeword in secondary transcription
-                    wakeword_detected = False
-                    if secondary_result:
-                        result_lower = secondary_result.lower()
-                        for wakeword in self.wakewords:
-                            if wakeword in result_lower:
-                                wakeword_detected = True
-                                print(f"WakewordDetector: Wakeword '{wakeword}' detected in secondary check!")
-                                break
-
-                    # Only transcribe full audio if wakeword was detected
-                    if wakeword_detected:
-                        print(f"WakewordDetector: Wakeword found, transcribing full audio with primary STT")
-                        result = self._transcribe_audio(temp_file_path)
-                    else:
-                        print(f"WakewordDetector: No wakeword in secondary check, skipping full transcription")
-                        return
+                    print(f"WakewordDetector: No wakeword in secondary check, skipping full transcription")
+                    return
             else:
                 # Normal workflow: transcribe full audio
-                result = self._transcribe_audio(temp_file_path)
+                result = self._transcribe_audio(pcm)
 
             # For secondary STT and normal workflows, check for wakeword in result
             if self.wakeword_handler is None:
@@ -411,13 +357,6 @@ class WakewordDetector:
             # Notify UI that transcription is done
             if self.on_transcribing_done:
                 GLib.idle_add(self.on_transcribing_done)
-            # Cleanup temp files
-            for temp_file in [temp_file_path, temp_file_secondary]:
-                if temp_file and os.path.exists(temp_file):
-                    try:
-                        os.remove(temp_file)
-                    except Exception as e:
-                        print(f"WakewordDetector: Error removing temp file: {e}")
 
     def _detection_loop(self):
         """Main detection loop (runs in daemon thread)"""
@@ -426,7 +365,7 @@ class WakewordDetector:
 
             # Pre-buffer to capture audio before speech starts
             pre_buffer_size = int(self.pre_buffer_duration * self.sample_rate / self.chunk_size)
-            pre_buffer = deque(maxlen=pre_buffer_size)
+            pre_buffer = PreRollBuffer(pre_buffer_size * self.chunk_size * self.channels)
 
             # State tracking
             in_speech = False
@@ -496,7 +435,7 @@ class WakewordDetector:
                         if consecutive_speech_frames >= self.min_speech_frames and not in_speech:
                             # Speech started - capture pre-buffer
                             in_speech = True
-                            speech_frames = list(pre_buffer)
+                            speech_frames = [pre_buffer.get()]
                             print("WakewordDetector: Speech started")
                             # Notify UI that speech detection started
                             if self.on_speech_started:
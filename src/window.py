@@ -26,7 +26,7 @@ from .ui.profile import ProfileDialog
 from .ui.presentation import PresentationWindow
 from .ui.widgets import File, CopyBox, BarChartBox, MarkupTextView, DocumentReaderWidget, TipsCarousel, BrowserWidget, Terminal, CodeEditorWidget, ToolWidget, CallPanel, AvatarCallWidget
 from .ui.explorer import ExplorerPanel
-from .ui.widgets import MultilineEntry, ProfileRow, DisplayLatex, InlineLatex, ThinkingWidget, Message, ChatRow, FolderRow, ChatHistory, ChatTab
+from .ui.widgets import MultilineEntry, ProfileRow, DisplayLatex, InlineLatex, ThinkingWidget, Message, ChatRow, ChatSidebar, ChatHistory, ChatTab
 from .ui.stdout_monitor import StdoutMonitorDialog
 from .utility.stdout_capture import StdoutMonitor
 from .constants import AVAILABLE_LLMS, SCHEMA_ID, SETTINGS_GROUPS
@@ -242,13 +242,12 @@ class MainWindow(Adw.ApplicationWindow):
         self.chat_panel_header.pack_end(menu_button)
         
         # Chat list with navigation-sidebar styling for Adwaita look
-        self.chats_buttons_block = Gtk.ListBox(css_classes=["navigation-sidebar"])
-        self.chats_buttons_block.set_selection_mode(Gtk.SelectionMode.SINGLE)
+        self.chat_sidebar = ChatSidebar(self)
         self.chats_buttons_scroll_block = Gtk.ScrolledWindow(vexpand=True)
         self.chats_buttons_scroll_block.set_policy(
             Gtk.PolicyType.NEVER, Gtk.PolicyType.AUTOMATIC
         )
-        self.chats_buttons_scroll_block.set_child(self.chats_buttons_block)
+        self.chats_buttons_scroll_block.set_child(self.chat_sidebar)
         self.chats_secondary_box.append(self.chats_buttons_scroll_block)
         
         # Bottom button bar: New Chat + New Folder
@@ -695,6 +694,7 @@ class MainWindow(Adw.ApplicationWindow):
                 # Just switch to a new chat tab instead of closing
                 self.new_chat(None)
                 return True  # Prevent close, we'll handle it via new_chat
+            self.controller.unpin_chat(child.chat_id)
         
         return False  # Allow close
     
@@ -2482,126 +2482,31 @@ class MainWindow(Adw.ApplicationWindow):
             t.start()
 
     def update_history(self):
-        """Reload chats panel with Adwaita-styled ChatRow/FolderRow widgets, supporting folders and branching"""
+        """Refresh the chats panel, only the folders and chats that changed are updated"""
         self.focus_input()
-
-        list_box = Gtk.ListBox(css_classes=["navigation-sidebar"])
-        list_box.set_selection_mode(Gtk.SelectionMode.SINGLE)
-        self.chats_list_box = list_box
-        self.chats_buttons_scroll_block.set_child(list_box)
-
-        list_box.connect("row-activated", self.on_chat_row_activated)
-
-        middle_click_gesture = Gtk.GestureClick()
-        middle_click_gesture.set_button(2)
-        middle_click_gesture.connect("pressed", self._on_chat_row_middle_clicked, list_box)
-        list_box.add_controller(middle_click_gesture)
-
-        # Drop target on the list box itself to remove a chat from its folder
-        unfolder_drop = Gtk.DropTarget.new(GObject.TYPE_STRING, Gdk.DragAction.MOVE)
-        unfolder_drop.connect("enter", self._on_unfolder_drop_enter)
-        unfolder_drop.connect("leave", self._on_unfolder_drop_leave)
-        unfolder_drop.connect("drop", self._on_unfolder_drop)
-        list_box.add_controller(unfolder_drop)
-
-        # Build hierarchy map
-        id_to_chat_id = {chat.get("id"): cid for cid, chat in self.chats.items()}
-        children_map = {}
-        top_level_ids = []
-
-        # Collect chats that live inside a folder
-        foldered_chat_ids = set()
-        for folder in self.controller.folders.values():
-            for cid in folder.get("chat_ids", []):
-                if cid in self.chats:
-                    foldered_chat_ids.add(cid)
-
-        for cid, chat in self.chats.items():
-            if chat.get("call", False):
-                continue
-            parent_id = chat.get("branched_from")
-            if parent_id and parent_id in id_to_chat_id:
-                if parent_id not in children_map:
-                    children_map[parent_id] = []
-                children_map[parent_id].append(cid)
-            elif cid not in foldered_chat_ids:
-                top_level_ids.append(cid)
-
-        if self.controller.newelle_settings.reverse_order:
-            top_level_ids.reverse()
-
-        def add_chat_recursive(chat_id, level=0):
-            if chat_id not in self.chats:
-                return
-            chat_entry = self.chats[chat_id]
-            name = chat_entry["name"]
-            is_selected = (chat_id == self.chat_id)
-            is_open = self.get_tab_for_chat(chat_id) is not None
-
-            chat_row = ChatRow(
-                chat_name=name,
-                chat_index=chat_id,
-                is_selected=is_selected,
-                level=level,
-                is_open=is_open
-            )
-            chat_row.connect_signals(
-                on_generate=self.generate_chat_name,
-                on_edit=lambda btn, row=chat_row: self.edit_chat_name(btn, row.get_edit_stack()),
-                on_clone=self.copy_chat,
-                on_delete=self.remove_chat
-            )
-            list_box.append(chat_row)
-            if is_selected:
-                list_box.select_row(chat_row)
-
-            entry_uuid = chat_entry.get("id")
-            if entry_uuid in children_map:
-                for child_id in children_map[entry_uuid]:
-                    add_chat_recursive(child_id, level + 1)
-
-        # Render folders first
-        for fid, folder in self.controller.folders.items():
-            folder_row = FolderRow(
-                folder_id=fid,
-                folder_name=folder["name"],
-                folder_color=folder.get("color", "#3584e4"),
-                folder_icon=folder.get("icon", "folder-symbolic"),
-                expanded=folder.get("expanded", True),
-            )
-            folder_row.connect_signals(
-                on_edit=lambda btn, f_id=fid: self._edit_folder(f_id),
-                on_delete=lambda btn, f_id=fid: self._delete_folder(f_id),
-                on_drop_chat=self._on_chat_dropped_on_folder,
-            )
-            list_box.append(folder_row)
-
-            if folder.get("expanded", True):
-                for cid in folder.get("chat_ids", []):
-                    add_chat_recursive(cid, level=1)
-
-        # Render top-level (unfoldered) chats
-        for cid in top_level_ids:
-            add_chat_recursive(cid)
+        open_chat_ids = set()
+        for i in range(self.chat_tabs.get_n_pages()):
+            child = self.chat_tabs.get_nth_page(i).get_child()
+            if isinstance(child, ChatTab):
+                open_chat_ids.add(child.chat_id)
+        self.chat_sidebar.update(
+            self.chats,
+            self.controller.folders,
+            self.chat_id,
+            open_chat_ids,
+            self.controller.newelle_settings.reverse_order,
+        )
     
-    def on_chat_row_activated(self, listbox, row):
+    def on_chat_row_activated(self, item):
         """Handle chat/folder row activation"""
-        if isinstance(row, FolderRow):
-            self.controller.toggle_folder_expanded(row.folder_id)
+        if item.kind == "folder":
+            self.controller.toggle_folder_expanded(item.item_id)
             self.update_history()
             return
-        if not hasattr(row, 'chat_index'):
-            return
-        if row.chat_index == self.chat_id:
-            self.return_to_chat_panel(row)
+        if item.item_id == self.chat_id:
+            self.return_to_chat_panel(None)
         else:
-            self.chose_chat(row.chat_index)
-
-    def _on_chat_row_middle_clicked(self, gesture, n_press, x, y, list_box):
-        """Handle middle-click on a chat row to open it in a new tab"""
-        row = list_box.get_row_at_y(int(y))
-        if row is not None and hasattr(row, 'chat_index'):
-            self.add_chat_tab(row.chat_index)
+            self.chose_chat(item.item_id)
 
     # -- Folder helpers --
 
@@ -2610,14 +2515,14 @@ class MainWindow(Adw.ApplicationWindow):
         self.controller.move_chat_to_folder(chat_id, folder_id)
 
     def _on_unfolder_drop_enter(self, drop_target, x, y):
-        self.chats_list_box.add_css_class("unfolder-drop-area-hover")
+        self.chat_sidebar.add_css_class("unfolder-drop-area-hover")
         return Gdk.DragAction.MOVE
 
     def _on_unfolder_drop_leave(self, drop_target):
-        self.chats_list_box.remove_css_class("unfolder-drop-area-hover")
+        self.chat_sidebar.remove_css_class("unfolder-drop-area-hover")
 
     def _on_unfolder_drop(self, drop_target, value, x, y):
-        self.chats_list_box.remove_css_class("unfolder-drop-area-hover")
+        self.chat_sidebar.remove_css_class("unfolder-drop-area-hover")
         if value:
             try:
                 chat_id = int(value)
@@ -2830,65 +2735,16 @@ class MainWindow(Adw.ApplicationWindow):
         chat_id = int(button.get_name())
         if chat_id not in self.chats:
             return
-        # Show the generate chat name button
-        stack.set_visible_child_name("generate")
-        # Find the chat name button in the current list box
-        list_box = self.chats_list_box
-        if list_box is None:
-            return
-
-        # Find the row with this chat_id (iterate until get_row_at_index returns None)
-        row = None
-        i = 0
-        while True:
-            r = list_box.get_row_at_index(i)
-            if r is None:
-                break
-            if hasattr(r, "chat_index") and r.chat_index == chat_id:
-                row = r
-                break
-            i += 1
+        row = stack.get_ancestor(ChatRow)
         if row is None:
             return
+        # Show the generate chat name button
+        stack.set_visible_child_name("generate")
 
-        # Get the ChatRow's main_box containing the widgets
-        if not hasattr(row, 'main_box') or not hasattr(row, 'name_label'):
-            return
-
-        # Create an entry to replace the label
-        entry = Gtk.Entry()
-        entry.set_text(self.chats[chat_id]["name"])
-        entry.set_hexpand(True)
-        
-        # Store original label for restoration
-        original_label = row.name_label
-        
-        # Find the position of the label in the box and replace it
-        # The label is between the icon and the actions revealer
-        siblings = []
-        child = row.main_box.get_first_child()
-        while child:
-            siblings.append(child)
-            child = child.get_next_sibling()
-        
-        # Find and replace the name_label
-        label_index = siblings.index(original_label) if original_label in siblings else -1
-        if label_index >= 0:
-            row.main_box.remove(original_label)
-            # Insert entry at the same position
-            if label_index == 0:
-                row.main_box.prepend(entry)
-            else:
-                row.main_box.insert_child_after(entry, siblings[label_index - 1])
-        
-        # Focus the entry
-        entry.grab_focus()
-        entry.select_region(0, -1)  # Select all text
-        
         # Handle entry activation (Enter key)
-        def on_entry_activate(entry):
-            new_name = entry.get_text().strip()
-            if new_name:
+        def on_entry_activate(text):
+            new_name = text.strip()
+            if new_name and chat_id in self.chats:
                 self.chats[chat_id]["name"] = new_name
                 self.save_chat()
 
@@ -2898,8 +2754,14 @@ class MainWindow(Adw.ApplicationWindow):
                     tab_page.set_title(new_name)
                     
             self.update_history()
-             
-        entry.connect("activate", on_entry_activate)
+
+        # Replace the title with an entry
+        entry = row.start_editing(on_entry_activate)
+        entry.set_text(self.chats[chat_id]["name"])
+        
+        # Focus the entry
+        entry.grab_focus()
+        entry.select_region(0, -1)  # Select all text
         
     def new_chat(self, button, *a):
         """Create a new chat and open it in a new tab"""
@@ -3320,6 +3182,7 @@ class MainWindow(Adw.ApplicationWindow):
         message_content = self.chat[id_message]["Message"]
         replace = replace_codeblock(message_content, id_codeblock, new_content)
         self.chat[id_message]["Message"] = replace
+        self.controller.mark_message_changed(self.chat_id, id_message)
         self.reload_message(id_message)
         if editor is not None:
             editor.saved()
@@ -3351,26 +3214,28 @@ class MainWindow(Adw.ApplicationWindow):
     def generate_chat_name(self, button, multithreading=False):
         """Generate the name of the chat using llm. Reloaunches on another thread if not already in one"""
         if multithreading:
+            # Rows are recycled, the button may show another chat once done
+            chat_id = int(button.get_name())
             name = self.secondary_model.generate_chat_name(
                 self.prompts["generate_name_prompt"],
-                self.controller.get_history(self.chats[int(button.get_name())]["chat"])
+                self.controller.get_history(self.chats[chat_id]["chat"])
             )
             
             def on_complete():
                 if name is None:
-                    button.set_icon_name("warning-outline-symbolic")
-                    button.set_can_target(True)
-                    button.remove_css_class("suggested-action")
-                    button.add_css_class("error")
-                    GLib.timeout_add(2000, self.update_history)
+                    if button.get_name() == str(chat_id):
+                        button.set_icon_name("warning-outline-symbolic")
+                        button.set_can_target(True)
+                        button.remove_css_class("suggested-action")
+                        button.add_css_class("error")
+                    GLib.timeout_add(2000, self.chat_sidebar.refresh_chat, chat_id)
                 else:
                     clean_name = remove_thinking_blocks(name)
                     if clean_name is None:
-                        self.update_history()
+                        self.chat_sidebar.refresh_chat(chat_id)
                         return
                     clean_name = remove_markdown(clean_name)
-                    if clean_name != "Chat has been stopped":
-                        chat_id = int(button.get_name())
+                    if clean_name != "Chat has been stopped" and chat_id in self.chats:
                         self.chats[chat_id]["name"] = clean_name
 
                         # Update tab title if this chat is open in a tab
@@ -3379,6 +3244,7 @@ class MainWindow(Adw.ApplicationWindow):
                             tab_page.set_title(clean_name)
                             
                     self.update_history()
+                    self.chat_sidebar.refresh_chat(chat_id)
 
             GLib.idle_add(on_complete)
         else: